@@ -1,27 +1,36 @@
 # --- Imports nécessaires pour l'ensemble du script ---
+# Seuls des modules légers de la bibliothèque standard sont importés ici : pandas, openpyxl,
+# tkinter et concurrent.futures sont importés dans les fonctions qui en ont besoin, afin que
+# l'import du module (et le démarrage de chaque processus du mode batch) reste quasi instantané.
 import json
-import pandas as pd
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Border, Side, Font
-from openpyxl.utils import get_column_letter
 import hashlib
+import gzip
 import collections
+import contextlib
+import contextvars
+import copy
+import io
 import re
 import zipfile
 import shutil
 import tempfile
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import subprocess
+import sys
+import argparse
+import glob
+import time
+import traceback
 from datetime import datetime
 
-# --- Configuration du répertoire de sortie commun ---
+# --- Dossier Data Extractor historique (parcouru sous Windows pour trouver pbi-tools) ---
 output_directory = r"C:\Users\PREDATOR_PC\OneDrive\Bureau\Data Extractor"
 
-# Créer le répertoire de sortie s'il n'existe pas
-os.makedirs(output_directory, exist_ok=True)
-print(f"Répertoire de sortie configuré : {output_directory}")
+# Cache des DataModelSchema déjà extraits par pbi-tools (clé = empreinte de l'entrée DataModel)
+datamodelschema_cache_max_bytes = 512 * 1024 * 1024
+
+# Masque la console des sous-processus pbi-tools sous Windows (sans effet ailleurs)
+SUBPROCESS_CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
 # --- Fonctions Helper communes ---
 
@@ -51,17 +60,282 @@ def get_distinct_color(identifier):
 
     return f"{r:02X}{g:02X}{b:02X}"
 
-def read_file_with_multiple_encodings(file_path, encodings=['utf-16', 'utf-16-le', 'utf-8-sig', 'utf-8']):
-    """Tente de lire un fichier en utilisant une liste d'encodages donnés."""
-    for encoding in encodings:
+# Marques d'ordre des octets (BOM) reconnues, de la plus longue à la plus courte
+TEXT_BYTE_ORDER_MARKS = (
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+)
+
+# Premier caractère d'un document JSON, selon l'encodage
+JSON_OPENING_BRACES = {
+    'utf-8': b'{',
+    'utf-16-le': b'{\x00',
+    'utf-16-be': b'\x00{',
+}
+
+def detect_text_encoding(raw_bytes):
+    """
+    Détermine l'encodage d'un contenu texte à partir de ses premiers octets : BOM s'il y en a un,
+    sinon motif des octets nuls (UTF-16 sans BOM, comme l'entrée 'Layout' des .pbix), sinon UTF-8.
+    Retourne le tuple (encodage, longueur du BOM).
+    """
+    head = bytes(raw_bytes[:4])
+    for byte_order_mark, encoding in TEXT_BYTE_ORDER_MARKS:
+        if head.startswith(byte_order_mark):
+            return encoding, len(byte_order_mark)
+    if len(head) >= 2:
+        if head[0] != 0 and head[1] == 0:
+            return 'utf-16-le', 0
+        if head[0] == 0 and head[1] != 0:
+            return 'utf-16-be', 0
+    return 'utf-8', 0
+
+def find_json_start(raw_bytes, encoding, offset):
+    """Position (alignée sur la taille des caractères) de la première '{' du contenu, ou offset si absente."""
+    opening_brace = JSON_OPENING_BRACES[encoding]
+    index = raw_bytes.find(opening_brace, offset)
+    while index != -1 and (index - offset) % len(opening_brace):
+        index = raw_bytes.find(opening_brace, index + 1)
+    return index if index != -1 else offset
+
+def decode_text_bytes(raw_bytes, from_json_start=False):
+    """
+    Décode en une seule passe un contenu texte déjà en mémoire, après détection de son encodage.
+    Avec from_json_start, tout ce qui précède la première '{' est ignoré en découpant le tampon
+    (memoryview, sans copie) avant le décodage. Retourne None si le contenu n'est pas décodable.
+    """
+    encoding, byte_order_mark_length = detect_text_encoding(raw_bytes)
+    start = byte_order_mark_length
+    if from_json_start:
+        start = find_json_start(raw_bytes, encoding, start)
+    try:
+        return str(memoryview(raw_bytes)[start:], encoding)
+    except UnicodeDecodeError:
+        return None
+
+def read_text_file(file_path, from_json_start=False):
+    """Lit un fichier texte en une seule lecture binaire et le décode avec decode_text_bytes."""
+    with open(file_path, 'rb') as f:
+        content = decode_text_bytes(f.read(), from_json_start)
+    if content is None:
+        print(f"Erreur : Impossible de décoder le fichier {os.path.basename(file_path)}.")
+    return content
+
+# --- Analyse JSON : orjson s'il est installé, sinon le module json de la bibliothèque standard ---
+
+# Backend imposé par variable d'environnement : 'auto' (défaut), 'orjson' ou 'json'.
+# La variable est héritée par les processus du mode batch.
+JSON_BACKEND_ENVIRONMENT_VARIABLE = "DATA_EXTRACTOR_JSON_BACKEND"
+JSON_BACKENDS = ("auto", "orjson", "json")
+
+# Backend retenu pour le processus courant (choisi au premier appel de parse_json)
+json_backend = {"name": None, "loads": None}
+
+def select_json_backend(preferred=None):
+    """
+    Choisit la fonction d'analyse JSON : orjson si disponible (ou imposé), sinon json.loads.
+    preferred vaut 'auto', 'orjson' ou 'json' ; par défaut, la variable d'environnement
+    DATA_EXTRACTOR_JSON_BACKEND est utilisée. Retourne le nom du backend retenu.
+    """
+    preferred = (preferred or os.environ.get(JSON_BACKEND_ENVIRONMENT_VARIABLE) or "auto").lower()
+    json_backend["name"], json_backend["loads"] = "json", json.loads
+    if preferred in ("auto", "orjson"):
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-                return content
-        except (UnicodeDecodeError, Exception):
-            continue
-    print(f"Erreur : Impossible de lire le fichier {os.path.basename(file_path)} avec les encodages essayés.")
-    return None
+            import orjson
+            json_backend["name"], json_backend["loads"] = "orjson", orjson.loads
+        except ImportError:
+            if preferred == "orjson":
+                print("Avertissement : orjson n'est pas installé, utilisation du module json standard.")
+    return json_backend["name"]
+
+def parse_json(text):
+    """
+    Analyse un document JSON (chaîne ou octets UTF-8) avec le backend retenu.
+    orjson est plus strict que json (NaN, entiers hors 64 bits...) : en cas de refus, le document
+    est relu par json.loads, qui lève json.JSONDecodeError s'il est réellement invalide.
+    """
+    loads = json_backend["loads"]
+    if loads is None:
+        select_json_backend()
+        loads = json_backend["loads"]
+    if loads is json.loads:
+        return loads(text)
+    try:
+        return loads(text)
+    except ValueError:
+        return json.loads(text)
+
+# --- Instrumentation : durée, temps CPU, mémoire et volumes de chaque étape ---
+
+# Liste qui reçoit les mesures de measure_stage, dans l'ordre où les blocs mesurés se terminent.
+# process_powerbi_report en active une par rapport, les autres appelants avec collect_stage_metrics ;
+# hors collecteur, les mesures sont ignorées. La liste suit le contexte : les threads doivent être lancés avec
+# contextvars.copy_context().run pour que leurs mesures y soient ajoutées.
+stage_metrics_collector = contextvars.ContextVar("stage_metrics_collector", default=None)
+
+BYTES_PER_MIB = 1024 * 1024
+
+# Préfixe des métriques du fichier texte Prometheus (collecteur 'textfile' de node_exporter)
+PROMETHEUS_METRIC_PREFIX = "data_extractor"
+
+def get_peak_rss_bytes():
+    """
+    Pic de mémoire résidente du processus, en octets : module resource (Linux, macOS),
+    sinon psutil s'il est installé (Windows), sinon None.
+    """
+    try:
+        import resource
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est exprimé en octets sous macOS et en kilo-octets ailleurs
+        return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory_info = psutil.Process().memory_info()
+    return getattr(memory_info, "peak_wset", None) or memory_info.rss
+
+def get_children_cpu_seconds():
+    """Temps CPU (utilisateur + système) des processus enfants terminés, ou None si indisponible (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def get_traced_peak_bytes():
+    """Pic de mémoire allouée par Python depuis le démarrage de tracemalloc, ou None s'il n'est pas actif."""
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[1]
+
+@contextlib.contextmanager
+def collect_stage_metrics():
+    """Active, pour le contexte courant, un collecteur des mesures de measure_stage et fournit sa liste."""
+    metrics = []
+    token = stage_metrics_collector.set(metrics)
+    try:
+        yield metrics
+    finally:
+        stage_metrics_collector.reset(token)
+
+@contextlib.contextmanager
+def measure_stage(stage_name, kind="step", child_processes=False, **attributes):
+    """
+    Mesure un bloc de traitement et ajoute son enregistrement au collecteur actif : durée réelle, temps CPU
+    du thread courant (et, avec child_processes, des processus enfants terminés pendant le bloc, comme
+    pbi-tools), pic de mémoire résidente du processus en fin de bloc et sa hausse pendant le bloc, de même
+    pour la mémoire tracée si tracemalloc est actif. kind vaut 'stage' pour une étape de la chaîne et
+    'step' pour une sous-étape. L'appelant peut compléter l'enregistrement produit (ex. record["rows"]).
+    Les pics sont ceux du processus : quand deux étapes se chevauchent (Layout et pbi-tools),
+    la hausse mesurée pour l'une peut provenir de l'autre.
+    """
+    record = {"stage": stage_name, "kind": kind, **attributes}
+    peak_rss_before = get_peak_rss_bytes()
+    traced_peak_before = get_traced_peak_bytes()
+    children_cpu_before = get_children_cpu_seconds() if child_processes else None
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield record
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall_start, 4)
+        record["cpu_s"] = round(time.thread_time() - cpu_start, 4)
+        if children_cpu_before is not None:
+            record["children_cpu_s"] = round(get_children_cpu_seconds() - children_cpu_before, 4)
+        peak_rss = get_peak_rss_bytes()
+        if peak_rss is not None:
+            record["peak_rss_mib"] = round(peak_rss / BYTES_PER_MIB, 1)
+            record["peak_rss_increase_mib"] = round((peak_rss - peak_rss_before) / BYTES_PER_MIB, 1)
+        traced_peak = get_traced_peak_bytes()
+        if traced_peak is not None:
+            record["traced_peak_mib"] = round(traced_peak / BYTES_PER_MIB, 1)
+            record["traced_peak_increase_mib"] = round((traced_peak - (traced_peak_before or 0)) / BYTES_PER_MIB, 1)
+        collector = stage_metrics_collector.get()
+        if collector is not None:
+            collector.append(record)
+
+def summarize_stage_metrics(report_results):
+    """
+    Agrège les mesures de plusieurs rapports par étape (et cible) : nombre d'exécutions, durées et temps CPU
+    cumulés, lignes produites et pic de mémoire résidente le plus élevé. Retourne une liste triée par durée.
+    """
+    summary = {}
+    for report_result in report_results:
+        for record in report_result.get("metrics", []):
+            key = (record["stage"], record["kind"], record.get("target"))
+            entry = summary.setdefault(key, {"stage": record["stage"], "kind": record["kind"], "target": record.get("target"),
+                                             "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0, "max_peak_rss_mib": None})
+            entry["count"] += 1
+            entry["wall_s"] = round(entry["wall_s"] + record["wall_s"], 4)
+            entry["cpu_s"] = round(entry["cpu_s"] + record["cpu_s"] + record.get("children_cpu_s", 0), 4)
+            entry["rows"] += record.get("rows") or 0
+            if record.get("peak_rss_mib") is not None:
+                entry["max_peak_rss_mib"] = max(entry["max_peak_rss_mib"] or 0, record["peak_rss_mib"])
+    return sorted(summary.values(), key=lambda entry: entry["wall_s"], reverse=True)
+
+def escape_prometheus_label_value(value):
+    """Échappe une valeur d'étiquette selon le format texte de Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def write_prometheus_textfile(manifest, output_path):
+    """
+    Écrit les mesures d'une exécution batch au format texte de Prometheus (collecteur 'textfile'
+    de node_exporter) : durées, temps CPU, lignes et pic de mémoire par rapport et par étape,
+    succès et durée de chaque rapport, bilan du batch. Le fichier est remplacé de façon atomique.
+    """
+    samples = collections.defaultdict(dict)
+    for report_result in manifest["reports"]:
+        report_name = os.path.basename(report_result.get("output_dir") or report_result["file"])
+        samples["report_success"][(("report", report_name),)] = 1 if report_result["success"] else 0
+        samples["report_duration_seconds"][(("report", report_name),)] = report_result.get("timings", {}).get("total", 0)
+        for record in report_result.get("metrics", []):
+            labels = (("report", report_name), ("stage", record["stage"]), ("kind", record["kind"]), ("target", record.get("target") or ""))
+            # Une même étape peut être mesurée plusieurs fois pour un rapport : durées et lignes sont cumulées
+            for metric_name, value in (("stage_wall_seconds", record["wall_s"]),
+                                       ("stage_cpu_seconds", record["cpu_s"] + record.get("children_cpu_s", 0)),
+                                       ("stage_rows", record.get("rows"))):
+                if value is not None:
+                    samples[metric_name][labels] = samples[metric_name].get(labels, 0) + value
+            if record.get("peak_rss_mib") is not None:
+                peak_rss_bytes = int(record["peak_rss_mib"] * BYTES_PER_MIB)
+                samples["stage_peak_rss_bytes"][labels] = max(samples["stage_peak_rss_bytes"].get(labels, 0), peak_rss_bytes)
+    samples["batch_duration_seconds"][()] = manifest["duration_s"]
+    samples["batch_reports"][(("status", "succeeded"),)] = manifest["succeeded"]
+    samples["batch_reports"][(("status", "failed"),)] = manifest["failed"]
+    samples["batch_last_run_timestamp_seconds"][()] = int(time.time())
+
+    help_texts = {
+        "stage_wall_seconds": "Durée réelle de chaque étape, par rapport.",
+        "stage_cpu_seconds": "Temps CPU de chaque étape (processus enfants compris), par rapport.",
+        "stage_rows": "Lignes produites par chaque étape, par rapport.",
+        "stage_peak_rss_bytes": "Pic de mémoire résidente du processus en fin d'étape.",
+        "report_success": "1 si toutes les étapes du rapport ont réussi, 0 sinon.",
+        "report_duration_seconds": "Durée totale du traitement du rapport.",
+        "batch_duration_seconds": "Durée totale de l'exécution batch.",
+        "batch_reports": "Nombre de rapports traités, par statut.",
+        "batch_last_run_timestamp_seconds": "Horodatage de fin de la dernière exécution batch.",
+    }
+    lines = []
+    for metric_name, metric_samples in samples.items():
+        full_name = f"{PROMETHEUS_METRIC_PREFIX}_{metric_name}"
+        lines.append(f"# HELP {full_name} {help_texts[metric_name]}")
+        lines.append(f"# TYPE {full_name} gauge")
+        for labels, value in metric_samples.items():
+            label_text = ",".join(f'{name}="{escape_prometheus_label_value(label)}"' for name, label in labels)
+            lines.append(f"{full_name}{{{label_text}}} {value}" if label_text else f"{full_name} {value}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, output_path)
+    return output_path
 
 def normalize_expression(expression):
     """Convertit une expression (liste ou chaîne multiligne) en une seule chaîne lisible."""
@@ -79,6 +353,8 @@ def extract_table_column_names(json_data):
     en excluant les tables où isHidden est True.
     Retourne un DataFrame.
     """
+    import pandas as pd
+
     records = []
 
     model_info = json_data.get("model", {})
@@ -101,36 +377,31 @@ def extract_table_column_names(json_data):
 
     return pd.DataFrame(records)
 
-def run_tables_columns_extraction(datamodelschema_json_path, output_directory):
-    """Exécute l'extraction des tables/colonnes visibles et retourne le DataFrame."""
+def run_tables_columns_extraction(datamodel, output_directory):
+    """
+    Exécute l'extraction des tables/colonnes visibles à partir du modèle DataModelSchema
+    déjà chargé en mémoire et retourne le DataFrame.
+    """
     print(f"\n{'='*50}")
-    print("Début de l'extraction des tables et colonnes visibles à partir du fichier JSON.")
-    print(f"Source JSON : {datamodelschema_json_path}")
+    print("Début de l'extraction des tables et colonnes visibles à partir du modèle de données.")
 
-    if not datamodelschema_json_path or not os.path.exists(datamodelschema_json_path):
-        print("Erreur : Le fichier DataModelSchema.json n'a pas été trouvé pour l'extraction des tables et colonnes.")
+    if not datamodel:
+        print("Erreur : Aucun modèle DataModelSchema disponible pour l'extraction des tables et colonnes.")
         return None
 
     try:
-        with open(datamodelschema_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        import pandas as pd
 
-        df = extract_table_column_names(data)
+        df = extract_table_column_names(datamodel)
 
         if df.empty:
             df = pd.DataFrame(columns=["Nom de la Table", "Nom de la colonne"])
-            print("Aucune table ou colonne visible trouvée dans le fichier JSON.")
+            print("Aucune table ou colonne visible trouvée dans le modèle de données.")
         else:
             print(f"{len(df)} lignes (colonnes) trouvées pour les tables visibles.")
 
         return df
 
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier spécifié est introuvable à {datamodelschema_json_path}.")
-        return None
-    except json.JSONDecodeError:
-        print(f"Erreur : Impossible de décoder le fichier JSON. Assurez-vous qu'il est correctement formaté.")
-        return None
     except ImportError:
         print("Erreur : Les bibliothèques nécessaires (pandas) ne sont pas installées.")
         print("Veuillez les installer en exécutant : pip install pandas")
@@ -141,7 +412,10 @@ def run_tables_columns_extraction(datamodelschema_json_path, output_directory):
 
 # --- Fonctions pour l'extraction des données structurées ---
 
-def extract_source_info_from_m_expression(expression):
+# Longueur maximale de l'expression M affichée dans Data_Structure.xlsx
+EXPRESSION_DISPLAY_MAX_LENGTH = 500
+
+def extract_source_info_from_m_expression(expression, max_display_length=EXPRESSION_DISPLAY_MAX_LENGTH):
     """
     Tente d'extraire la source (chemin fichier/connexion) et le nom de la table source
     d'une expression M.
@@ -159,8 +433,8 @@ def extract_source_info_from_m_expression(expression):
         return source_path, source_table_name, expression_str, filter_steps
 
     display_expression = expression_str
-    if len(display_expression) > 500:
-        display_expression = display_expression[:500] + "..."
+    if max_display_length is not None and len(display_expression) > max_display_length:
+        display_expression = display_expression[:max_display_length] + "..."
 
     file_match = re.search(r'File\.Contents\("([^"]+)"\)', expression_str)
     if file_match:
@@ -182,13 +456,25 @@ def extract_source_info_from_m_expression(expression):
 
     return source_path, source_table_name, display_expression, filter_steps
 
-def process_data_model_for_structured_sheet(json_data):
+# Ordre des entités dans Data_Structure.xlsx (et noms des fichiers des sorties en colonnes)
+STRUCTURED_ENTITY_ORDER = (
+    "Tables", "Partitions", "Colonnes", "Variations Colonne",
+    "Mesures", "Hiérarchies", "Niveaux Hiérarchie",
+    "Relations", "Cultures", "Annotations"
+)
+
+def process_data_model_for_structured_sheet(json_data, truncate_expressions=True):
     """
     Extrait les données du modèle Power BI et les organise par type d'entité
     pour la génération du rapport structuré en une seule feuille.
+    Sans truncate_expressions (sorties en colonnes), l'expression M des partitions est conservée
+    en entier dans la colonne 'source.expression'.
     Retourne un dictionnaire de DataFrames.
     """
+    import pandas as pd
+
     model_info = json_data.get("model", {})
+    partition_expression_column = "source.expression (Tronqué)" if truncate_expressions else "source.expression"
 
     tables_list = []
     columns_list = []
@@ -249,7 +535,8 @@ def process_data_model_for_structured_sheet(json_data):
                         partition_source_type = source.get("type", "N/A")
                         expression = source.get("expression")
                         if expression:
-                            part_source_data, part_source_table_name, partition_expression_display, part_filter_steps = extract_source_info_from_m_expression(expression)
+                            part_source_data, part_source_table_name, partition_expression_display, part_filter_steps = extract_source_info_from_m_expression(
+                                expression, EXPRESSION_DISPLAY_MAX_LENGTH if truncate_expressions else None)
                             partition_expression_display = normalize_expression(partition_expression_display)
 
                     partitions_list.append({
@@ -257,7 +544,7 @@ def process_data_model_for_structured_sheet(json_data):
                         "Nom Tableau Parent": table_name,
                         "mode": partition_mode,
                         "source.type": partition_source_type,
-                        "source.expression (Tronqué)": partition_expression_display,
+                        partition_expression_column: partition_expression_display,
                         "Source de Données (Extrait)": part_source_data,
                         "Nom Table Source (Extrait)": part_source_table_name,
                         "Filtres (Extrait)": part_filter_steps,
@@ -497,28 +784,87 @@ def process_data_model_for_structured_sheet(json_data):
         "Annotations": pd.DataFrame(annotations_list),
     }
 
-    table_order = [
-        "Tables", "Partitions", "Colonnes", "Variations Colonne",
-        "Mesures", "Hiérarchies", "Niveaux Hiérarchie",
-        "Relations", "Cultures", "Annotations"
-    ]
-
     ordered_dfs = collections.OrderedDict()
-    for name in table_order:
+    for name in STRUCTURED_ENTITY_ORDER:
         if name in dfs and not dfs[name].empty:
             ordered_dfs[name] = dfs[name]
 
     return ordered_dfs
 
+# Colonnes désignant l'entité parente d'une ligne, par ordre de priorité, pour la coloration
+PARENT_IDENTIFIER_COLUMNS = [
+    ("Nom Tableau Parent", "Tableau"),
+    ("Nom Hiérarchie Parente", "Hiérarchie"),
+    ("Nom Colonne Parente", "Colonne"),
+    ("Nom Mesure Parent", "Mesure"),
+    ("Nom Partition Parente", "Partition"),
+    ("Nom Relation Parente", "Relation"),
+]
+
+# Colonne servant d'identifiant lorsque la ligne est elle-même l'entité parente
+SELF_IDENTIFIER_COLUMNS = {
+    "Tables": ("Nom Tableau", "Tableau"),
+    "Relations": ("Nom Relation", "Relation"),
+    "Cultures": ("Nom Culture", "Culture"),
+}
+
+def compute_column_widths(dfs):
+    """
+    Calcule en une passe vectorisée (avant toute écriture) la largeur de chaque colonne Excel,
+    toutes tables confondues : longueur maximale de l'en-tête et des valeurs (plafonnée à 80).
+    """
+    from openpyxl.utils import get_column_letter
+
+    global_column_widths = {}
+    for df in dfs.values():
+        for col_index, column_name in enumerate(df.columns, start=1):
+            width = len(str(column_name))
+            if not df.empty:
+                series = df.iloc[:, col_index - 1]
+                value_lengths = series.astype(str).str.len().mask(series.isna(), 0).clip(upper=80)
+                width = max(width, int(value_lengths.max()))
+            col_letter = get_column_letter(col_index)
+            global_column_widths[col_letter] = max(global_column_widths.get(col_letter, 0), width)
+    return global_column_widths
+
+def iter_parent_identifiers(df, table_title):
+    """Produit, pour chaque ligne du DataFrame, l'identifiant (type, nom) de l'entité parente utilisé pour la couleur."""
+    candidate_columns = [(df.columns.get_loc(column), kind) for column, kind in PARENT_IDENTIFIER_COLUMNS if column in df.columns]
+    self_column = SELF_IDENTIFIER_COLUMNS.get(table_title)
+    self_position = df.columns.get_loc(self_column[0]) if self_column and self_column[0] in df.columns else None
+
+    for row_values in df.itertuples(index=False, name=None):
+        parent_identifier = None
+        for position, kind in candidate_columns:
+            value = row_values[position]
+            if value and value != "N/A":
+                parent_identifier = (kind, value)
+                break
+        if parent_identifier is None and self_position is not None:
+            parent_identifier = (self_column[1], row_values[self_position])
+        yield parent_identifier
+
+def get_or_create_named_style(workbook, name, **style_attributes):
+    """Enregistre une seule fois un style nommé partagé dans le classeur et retourne son nom."""
+    from openpyxl.styles import NamedStyle
+
+    if name not in workbook.named_styles:
+        workbook.add_named_style(NamedStyle(name=name, **style_attributes))
+    return name
+
 def write_dfs_to_single_sheet(dfs, workbook, sheet_name="Structured Data"):
     """
     Écrit plusieurs DataFrames dans une seule feuille Excel sous forme de tableaux séparés.
     Applique le formatage et la coloration par parent.
+    Les lignes sont émises dans l'ordre avec sheet.append, ce qui permet d'utiliser un
+    classeur en écriture seule (Workbook(write_only=True)) à mémoire constante : les styles
+    sont partagés et les largeurs de colonnes sont calculées avant l'écriture.
     """
-    sheet = workbook.create_sheet(sheet_name)
-    current_row = 1
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill, Border, Side, Font
+    from openpyxl.utils import get_column_letter
 
-    global_column_widths = {}
+    sheet = workbook.create_sheet(sheet_name)
 
     thin_black_border = Border(
         left=Side(style='thin', color='000000'),
@@ -526,117 +872,106 @@ def write_dfs_to_single_sheet(dfs, workbook, sheet_name="Structured Data"):
         top=Side(style='thin', color='000000'),
         bottom=Side(style='thin', color='000000')
     )
+    header_style = get_or_create_named_style(
+        workbook, "Structure - En-tête",
+        fill=PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),
+        border=thin_black_border
+    )
 
     parent_colors = {}
-
-    title_cell = sheet.cell(row=current_row, column=1, value="Modèle de Données - Vue Structurée")
-    title_cell.font = Font(bold=True, size=16)
-    current_row += 2
+    # Une cellule modèle par style (en-tête, couleur de parent) : chaque cellule écrite copie
+    # son tableau de styles au lieu de réaffecter (et re-hacher) remplissage et bordure.
+    style_templates = {}
+
+    def styled_cell(value, font=None, style=None, fill=None, border=None):
+        cell = WriteOnlyCell(sheet, value=value)
+        if style:
+            cell.style = style
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if border:
+            cell.border = border
+        return cell
+
+    def cell_like(template_key, value):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell._style = copy.copy(style_templates[template_key]._style)
+        return cell
+
+    title_value = "Modèle de Données - Vue Structurée"
 
     if not dfs:
-        sheet.cell(row=current_row, column=1, value="Aucune donnée structurée à afficher.").font = Font(italic=True)
-        sheet.column_dimensions[get_column_letter(1)].width = (len(title_cell.value) + 4) * 1.1
+        sheet.column_dimensions[get_column_letter(1)].width = (len(title_value) + 4) * 1.1
+        sheet.append([styled_cell(title_value, font=Font(bold=True, size=16))])
+        sheet.append([])
+        sheet.append([styled_cell("Aucune donnée structurée à afficher.", font=Font(italic=True))])
         return
 
-    for table_title, df in dfs.items():
-        sheet.cell(row=current_row, column=1, value=table_title).font = Font(bold=True, size=14)
-        current_row += 1
+    # Les largeurs doivent être connues avant la première ligne en mode écriture seule
+    for col_letter, width in compute_column_widths(dfs).items():
+        adjusted_width = (width + 2) * 0.9
+        if adjusted_width > 80:
+            adjusted_width = 80
+        elif adjusted_width < 10:
+            adjusted_width = 10
+        sheet.column_dimensions[col_letter].width = adjusted_width
 
-        header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        if not df.empty:
-            for col_index, column_name in enumerate(df.columns, start=1):
-                cell = sheet.cell(row=current_row, column=col_index, value=column_name)
-                cell.fill = header_fill
-                cell.border = thin_black_border
-                col_letter = get_column_letter(col_index)
-                global_column_widths[col_letter] = max(global_column_widths.get(col_letter, 0), len(str(column_name)))
-        elif len(df.columns) > 0:
-            for col_index, column_name in enumerate(df.columns, start=1):
-                cell = sheet.cell(row=current_row, column=col_index, value=column_name)
-                cell.fill = header_fill
-                cell.border = thin_black_border
-                col_letter = get_column_letter(col_index)
-                global_column_widths[col_letter] = max(global_column_widths.get(col_letter, 0), len(str(column_name)))
-
-        current_row += 1
+    sheet.append([styled_cell(title_value, font=Font(bold=True, size=16))])
+    sheet.append([])
+
+    table_title_font = Font(bold=True, size=14)
+    for table_title, df in dfs.items():
+        sheet.append([styled_cell(table_title, font=table_title_font)])
+        sheet.append([styled_cell(column_name, style=header_style) for column_name in df.columns])
 
         if not df.empty:
-            for row_index_in_df, row_data in df.iterrows():
-                parent_identifier = None
-                if "Nom Tableau Parent" in row_data and row_data["Nom Tableau Parent"] and row_data["Nom Tableau Parent"] != "N/A":
-                    parent_identifier = ("Tableau", row_data["Nom Tableau Parent"])
-                elif "Nom Hiérarchie Parente" in row_data and row_data["Nom Hiérarchie Parente"] and row_data["Nom Hiérarchie Parente"] != "N/A":
-                    parent_identifier = ("Hiérarchie", row_data["Nom Hiérarchie Parente"])
-                elif "Nom Colonne Parente" in row_data and row_data["Nom Colonne Parente"] and row_data["Nom Colonne Parente"] != "N/A":
-                    parent_identifier = ("Colonne", row_data["Nom Colonne Parente"])
-                elif "Nom Mesure Parent" in row_data and row_data["Nom Mesure Parent"] and row_data["Nom Mesure Parent"] != "N/A":
-                    parent_identifier = ("Mesure", row_data["Nom Mesure Parent"])
-                elif "Nom Partition Parente" in row_data and row_data["Nom Partition Parente"] and row_data["Nom Partition Parente"] != "N/A":
-                    parent_identifier = ("Partition", row_data["Nom Partition Parente"])
-                elif "Nom Relation Parente" in row_data and row_data["Nom Relation Parente"] and row_data["Nom Relation Parente"] != "N/A":
-                    parent_identifier = ("Relation", row_data["Nom Relation Parente"])
-                elif table_title == "Tables":
-                    parent_identifier = ("Tableau", row_data["Nom Tableau"])
-                elif table_title == "Relations":
-                    parent_identifier = ("Relation", row_data["Nom Relation"])
-                elif table_title == "Cultures":
-                    parent_identifier = ("Culture", row_data["Nom Culture"])
-
-                row_fill = None
+            parent_identifiers = iter_parent_identifiers(df, table_title)
+            for row_values, parent_identifier in zip(df.to_numpy(dtype=object).tolist(), parent_identifiers):
+                color = None
                 if parent_identifier:
                     if parent_identifier not in parent_colors:
                         parent_colors[parent_identifier] = get_distinct_color(parent_identifier[1])
-                    row_fill = PatternFill(start_color=parent_colors[parent_identifier], end_color=parent_colors[parent_identifier], fill_type="solid")
+                    color = parent_colors[parent_identifier]
+                if color not in style_templates:
+                    row_fill = PatternFill(start_color=color, end_color=color, fill_type="solid") if color else None
+                    style_templates[color] = styled_cell(None, fill=row_fill, border=thin_black_border)
+                sheet.append([cell_like(color, value) for value in row_values])
 
-                for col_index, column_name in enumerate(df.columns, start=1):
-                    cell = sheet.cell(row=current_row, column=col_index, value=row_data[column_name])
-                    if row_fill:
-                        cell.fill = row_fill
-                    cell.border = thin_black_border
-                    col_letter = get_column_letter(col_index)
-                    cell_value_str = str(row_data[column_name]) if row_data[column_name] is not None else ""
-                    cell_length = min(len(cell_value_str), 80)
-                    global_column_widths[col_letter] = max(global_column_widths.get(col_letter, 0), cell_length)
-
-                current_row += 1
-
-        current_row += 2
-
-    for col_letter, width in global_column_widths.items():
-        adjusted_width = (width + 2) * 0.9
-        if adjusted_width > 80:
-            adjusted_width = 80
-        elif adjusted_width < 10:
-            adjusted_width = 10
-        sheet.column_dimensions[col_letter].width = adjusted_width
+        sheet.append([])
+        sheet.append([])
 
-def run_structured_single_sheet_extraction(datamodelschema_json_path, output_directory):
-    """Exécute l'extraction et le formatage des données structurées en une seule feuille."""
+def run_structured_single_sheet_extraction(datamodel, output_directory):
+    """
+    Exécute l'extraction et le formatage des données structurées en une seule feuille,
+    à partir du modèle DataModelSchema déjà chargé en mémoire.
+    """
     excel_filename = "Data_Structure.xlsx"
     excel_output_path = os.path.join(output_directory, excel_filename)
     excel_sheet_name = "Structured Data"
 
     print(f"\n{'='*50}")
     print("Début de l'extraction des données structurées pour une seule feuille Excel.")
-    print(f"Source JSON : {datamodelschema_json_path}")
     print(f"Fichier Excel de sortie : {excel_output_path}")
 
-    if not datamodelschema_json_path or not os.path.exists(datamodelschema_json_path):
-        print("Erreur : Le fichier DataModelSchema.json n'a pas été trouvé pour l'extraction des données structurées.")
+    if not datamodel:
+        print("Erreur : Aucun modèle DataModelSchema disponible pour l'extraction des données structurées.")
         return False
 
     try:
-        with open(datamodelschema_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        from openpyxl import Workbook
 
-        dfs = process_data_model_for_structured_sheet(data)
+        with measure_stage("model_flatten") as record:
+            dfs = process_data_model_for_structured_sheet(datamodel)
+            record["rows"] = sum(len(df) for df in dfs.values())
 
-        workbook = Workbook()
-        if 'Sheet' in workbook.sheetnames:
-            workbook.remove(workbook['Sheet'])
+        with measure_stage("excel_write", target=excel_filename, rows=record["rows"]):
+            # Classeur en écriture seule : les lignes sont envoyées au fichier au fil de l'eau
+            workbook = Workbook(write_only=True)
 
-        write_dfs_to_single_sheet(dfs, workbook, sheet_name=excel_sheet_name)
-        workbook.save(excel_output_path)
+            write_dfs_to_single_sheet(dfs, workbook, sheet_name=excel_sheet_name)
+            workbook.save(excel_output_path)
 
         if dfs:
             print(f"Extraction des données structurées terminée avec succès.")
@@ -645,12 +980,6 @@ def run_structured_single_sheet_extraction(datamodelschema_json_path, output_dir
             print("Aucune donnée pertinente à extraire pour les données structurées.")
             return False
 
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier spécifié est introuvable à {datamodelschema_json_path} pour les données structurées.")
-        return False
-    except json.JSONDecodeError:
-        print(f"Erreur : Impossible de décoder le fichier JSON pour les données structurées. Assurez-vous qu'il est correctement formaté.")
-        return False
     except ImportError:
         print("Erreur : Les bibliothèques nécessaires (pandas ou openpyxl) ne sont pas installées.")
         print("Veuillez les installer en exécutant : pip install pandas openpyxl")
@@ -661,34 +990,143 @@ def run_structured_single_sheet_extraction(datamodelschema_json_path, output_dir
 
 # --- Fonctions pour l'extraction des KPIs ---
 
-def find_executable(executable_name):
-    """Recherche un exécutable uniquement dans Downloads, Desktop et le dossier cible."""
-    search_paths = [
-        os.path.expanduser("~/Downloads"),           # Dossier Downloads
-        os.path.expanduser("~/Desktop"),            # Bureau (Desktop)
-        output_directory                            # Data Extractor (dossier cible)
-    ]
+# Exécutables pbi-tools recherchés et variables d'environnement permettant de les désigner
+PBI_TOOLS_EXECUTABLES = ("pbi-tools.exe", "pbi-tools.core.exe")
+PBI_TOOLS_ENVIRONMENT_VARIABLES = {
+    "pbi-tools.exe": "PBI_TOOLS_PATH",
+    "pbi-tools.core.exe": "PBI_TOOLS_CORE_PATH",
+}
+
+def get_pbi_tools_config_path(output_dir):
+    """
+    Retourne le fichier par défaut où sont mémorisés les emplacements de pbi-tools déjà trouvés
+    (pour éviter de reparcourir les dossiers à chaque exécution) : 'Cache/pbi_tools_paths.json'
+    du répertoire de sortie.
+    """
+    return os.path.join(output_dir, "Cache", "pbi_tools_paths.json")
 
+def find_executables(executable_names, search_paths=None):
+    """
+    Recherche plusieurs exécutables en un seul parcours de Downloads, Desktop et, sous Windows,
+    du dossier cible (ou de search_paths). Le parcours s'arrête dès que tous les noms ont été trouvés.
+    Retourne un dictionnaire {nom: chemin complet} des exécutables trouvés (aucune fenêtre n'est affichée).
+    """
+    if search_paths is None:
+        search_paths = [
+            os.path.expanduser("~/Downloads"),           # Dossier Downloads
+            os.path.expanduser("~/Desktop"),            # Bureau (Desktop)
+        ]
+        if os.name == "nt":
+            search_paths.append(output_directory)       # Data Extractor (dossier cible)
+
+    remaining = set(executable_names)
+    found = {}
     for path in search_paths:
+        if not remaining:
+            break
         if os.path.exists(path):
             for root, _, files in os.walk(path):
-                if executable_name in files:
-                    full_path = os.path.join(root, executable_name)
+                for executable_name in remaining.intersection(files):
+                    found[executable_name] = os.path.join(root, executable_name)
                     print(f"Trouvé '{executable_name}' dans : {root}")
-                    return full_path
+                remaining.difference_update(found)
+                if not remaining:
+                    break
 
-    # Si non trouvé, afficher un popup
-    root = tk.Tk()
-    root.withdraw()  # Masquer la fenêtre principale
-    messagebox.showerror("Erreur", "Téléchargez et Installez pbi-tools.exe et pbi-tools.core.exe et déplacez les dans Data_Extractor.")
-    root.destroy()
+    for executable_name in sorted(remaining):
+        print(f"Erreur : '{executable_name}' introuvable dans {', '.join(search_paths)}.")
+    return found
+
+def find_executable(executable_name, search_paths=None):
+    """
+    Recherche un exécutable uniquement dans Downloads, Desktop et le dossier cible.
+    Retourne son chemin complet, ou None s'il est introuvable (aucune fenêtre n'est affichée).
+    """
+    return find_executables([executable_name], search_paths).get(executable_name)
+
+def load_pbi_tools_config(config_path):
+    """Lit les emplacements de pbi-tools mémorisés. Retourne un dictionnaire (vide si absent ou illisible)."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_pbi_tools_config(paths, config_path):
+    """Mémorise les emplacements de pbi-tools (écriture atomique). Une erreur d'écriture n'est pas bloquante."""
+    try:
+        os.makedirs(os.path.dirname(config_path), exist_ok=True)
+        temp_path = f"{config_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(paths, f, indent=4)
+        os.replace(temp_path, config_path)
+    except OSError as e:
+        print(f"Avertissement : Impossible de mémoriser l'emplacement de pbi-tools : {e}")
+
+def find_executable_on_path(executable_name):
+    """Cherche un exécutable dans le PATH, avec ou sans l'extension '.exe'."""
+    candidates = [executable_name]
+    stem, extension = os.path.splitext(executable_name)
+    if extension.lower() == ".exe":
+        candidates.append(stem)
+    for candidate in candidates:
+        full_path = shutil.which(candidate)
+        if full_path:
+            return full_path
     return None
 
-def find_layout_file(directory):
-    """Recherche le fichier 'Layout' (sans extension) dans un répertoire et ses sous-répertoires."""
-    for root, _, files in os.walk(directory):
-        if 'Layout' in files:
-            return os.path.join(root, 'Layout')
+def resolve_pbi_tools(pbi_tools_path=None, pbi_tools_core_path=None, config_path=None, search_paths=None):
+    """
+    Détermine les chemins de pbi-tools.exe et pbi-tools.core.exe, dans l'ordre :
+    chemins explicites, variables d'environnement (PBI_TOOLS_PATH, PBI_TOOLS_CORE_PATH), PATH,
+    emplacements mémorisés lors d'une exécution précédente, puis un seul parcours des dossiers
+    de recherche pour les exécutables encore manquants.
+    Les emplacements trouvés sont mémorisés dans config_path (s'il est indiqué) pour les exécutions suivantes.
+    Retourne le tuple (pbi_tools_path, pbi_tools_core_path) ; un chemin introuvable vaut None.
+    """
+    resolved = {"pbi-tools.exe": pbi_tools_path, "pbi-tools.core.exe": pbi_tools_core_path}
+    cached = load_pbi_tools_config(config_path) if config_path else {}
+
+    for executable_name in PBI_TOOLS_EXECUTABLES:
+        if resolved[executable_name]:
+            continue
+        environment_path = os.environ.get(PBI_TOOLS_ENVIRONMENT_VARIABLES[executable_name])
+        if environment_path and os.path.isfile(environment_path):
+            resolved[executable_name] = environment_path
+            continue
+        path_on_path = find_executable_on_path(executable_name)
+        if path_on_path:
+            resolved[executable_name] = path_on_path
+            continue
+        cached_path = cached.get(executable_name)
+        if cached_path and os.path.isfile(cached_path):
+            resolved[executable_name] = cached_path
+
+    missing = [executable_name for executable_name in PBI_TOOLS_EXECUTABLES if not resolved[executable_name]]
+    if missing:
+        print(f"Recherche de {', '.join(missing)} dans les dossiers habituels.")
+        resolved.update(find_executables(missing, search_paths))
+
+    found = {name: os.path.abspath(path) for name, path in resolved.items() if path and os.path.isfile(path)}
+    if config_path and found and any(cached.get(name) != path for name, path in found.items()):
+        save_pbi_tools_config({**cached, **found}, config_path)
+
+    return resolved["pbi-tools.exe"], resolved["pbi-tools.core.exe"]
+
+def find_zip_member(zip_ref, member_name):
+    """
+    Recherche une entrée de l'archive par son nom de base (ex. 'Layout') à partir
+    du répertoire central, sans rien décompresser.
+    Privilégie l'emplacement standard 'Report/<nom>' s'il existe.
+    """
+    names = zip_ref.namelist()
+    preferred = f"Report/{member_name}"
+    if preferred in names:
+        return preferred
+    for name in names:
+        if name.rsplit('/', 1)[-1] == member_name:
+            return name
     return None
 
 def find_datamodelschema_file(directory):
@@ -698,571 +1136,1571 @@ def find_datamodelschema_file(directory):
             return os.path.join(root, 'DataModelSchema')
     return None
 
-def extract_layout_json_from_pbix_or_file(source_file_path, output_dir):
-    """Extrait le fichier 'Layout' d'un fichier Power BI (.pbix ou .file) comme Layout.json."""
-    print(f"Extraction du fichier Layout.json à partir du fichier Power BI.")
-    if not os.path.exists(source_file_path):
-        print(f"Erreur : Le fichier source n'existe pas : {source_file_path}")
+def read_layout_from_pbix(source_file_path):
+    """
+    Lit l'entrée 'Layout' directement dans l'archive Power BI (.pbix, .pbit ou .file).
+    Seule cette entrée est décompressée, en mémoire : le reste de l'archive
+    (notamment le DataModel) n'est jamais extrait sur le disque.
+    Retourne le contenu décodé, ou None en cas d'échec.
+    """
+    try:
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            layout_member = find_zip_member(zip_ref, 'Layout')
+            if not layout_member:
+                print(f"Erreur : Le fichier 'Layout' n'a pas été trouvé dans l'archive ou ses sous-dossiers.")
+                return None
+            with measure_stage("zip_read", target="Layout") as record:
+                raw_layout = zip_ref.read(layout_member)
+                record["bytes"] = len(raw_layout)
+    except zipfile.BadZipFile:
+        print(f"Erreur : Le fichier '{os.path.basename(source_file_path)}' ne semble pas être une archive ZIP valide.")
+        return None
+    except Exception as e:
+        print(f"Erreur lors de l'ouverture ou de la lecture de l'archive : {e}")
         return None
 
-    os.makedirs(output_dir, exist_ok=True)
-    json_files_dir = os.path.join(output_dir, "JSON Files")
-    os.makedirs(json_files_dir, exist_ok=True)
-    temp_dir = None
-    extracted_layout_path = None
-    layout_output_path = os.path.join(json_files_dir, 'Layout.json')
+    with measure_stage("layout_decode", bytes=len(raw_layout)):
+        content = decode_text_bytes(raw_layout, from_json_start=True)
+    if content is None:
+        print(f"Erreur : Impossible de lire le contenu du fichier 'Layout'.")
+    return content
 
-    try:
-        temp_dir = tempfile.mkdtemp()
-        try:
-            with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-        except zipfile.BadZipFile:
-            print(f"Erreur : Le fichier '{os.path.basename(source_file_path)}' ne semble pas être une archive ZIP valide.")
-            return None
-        except Exception as e:
-            print(f"Erreur lors de l'ouverture ou de l'extraction de l'archive : {e}")
-            return None
+def requires_pbi_tools(source_file_path):
+    """Indique si le modèle de données du fichier ne peut être obtenu qu'avec pbi-tools (archive à 'DataModel' compressé)."""
+    if is_powerbi_project(source_file_path):
+        return False
+    return detect_datamodel_member(source_file_path) != 'DataModelSchema'
 
-        extracted_layout_path_temp = find_layout_file(temp_dir)
-        if not extracted_layout_path_temp:
-            print(f"Erreur : Le fichier 'Layout' n'a pas été trouvé dans l'archive ou ses sous-dossiers.")
-            return None
+def detect_datamodel_member(source_file_path):
+    """
+    Détermine, à partir du seul répertoire central de l'archive, sous quelle forme le modèle
+    de données est présent : 'DataModelSchema' (modèle JSON en clair, ex. modèles .pbit),
+    'DataModel' (modèle compressé des .pbix, qui nécessite pbi-tools) ou None.
+    """
+    try:
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            names = set(zip_ref.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return None
+    for member_name in ('DataModelSchema', 'DataModel'):
+        if member_name in names:
+            return member_name
+    return None
 
-        content = read_file_with_multiple_encodings(extracted_layout_path_temp)
-        if content:
-            try:
-                start_idx = content.find('{')
-                if start_idx > 0:
-                    content = content[start_idx:]
-                data = json.loads(content)
-                with open(layout_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
-                print(f"Fichier 'Layout.json' extrait avec succès.")
-                extracted_layout_path = layout_output_path
-            except json.JSONDecodeError as e:
-                print(f"Erreur : Le contenu du fichier 'Layout' n'est pas un JSON valide : {e}")
-                return None
-            except Exception as e:
-                print(f"Erreur lors de la sauvegarde du fichier JSON : {e}")
+def read_datamodelschema_from_zip(source_file_path):
+    """
+    Lit l'entrée 'DataModelSchema' directement dans l'archive (en mémoire), sans pbi-tools.
+    Retourne le contenu décodé, ou None si l'archive ne contient pas cette entrée.
+    """
+    try:
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            if 'DataModelSchema' not in zip_ref.namelist():
                 return None
-        else:
-            print(f"Erreur : Impossible de lire le contenu du fichier 'Layout'.")
-            return None
-
-    finally:
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            with measure_stage("zip_read", target="DataModelSchema") as record:
+                raw_schema = zip_ref.read('DataModelSchema')
+                record["bytes"] = len(raw_schema)
+    except (zipfile.BadZipFile, OSError):
+        return None
 
-    return extracted_layout_path
+    content = decode_text_bytes(raw_schema)
+    if content is None:
+        print(f"Erreur : Impossible de lire DataModelSchema avec les encodages essayés.")
+    return content
 
-def extract_datamodelschema_from_pbix(source_file_path, output_dir, pbi_tools_path, pbi_tools_core_path):
+def extract_layout_json_from_pbix_or_file(source_file_path, output_dir, json_output="pretty", stream=False):
     """
-    Convertit un fichier .pbix en .pbit à l'aide de pbi-tools, extrait DataModelSchema
-    du .pbit, et le sauvegarde en tant que DataModelSchema.json dans le répertoire de sortie.
+    Lit le 'Layout' d'un fichier Power BI (.pbix, .pbit, .file) ou le 'report.json' d'un projet .pbip,
+    l'analyse une seule fois et retourne les données en mémoire (consommées par l'étape des KPIs).
+    La copie 'JSON Files/Layout.json' est écrite selon json_output (JSON_OUTPUT_MODES) ; en mode 'raw',
+    le texte d'origine est recopié sans être resérialisé.
+    Pour un rapport PBIR, retourne directement le chemin de son dossier 'definition'. Avec stream,
+    le Layout n'est pas chargé : la copie est écrite en flux et le chemin du fichier source est retourné
+    (voir save_layout_stream_side_output).
     """
-    print("Extraction du fichier DataModelSchema.json à partir du fichier Power BI.")
-    try:
-        if not os.path.exists(source_file_path):
-            print(f"Erreur : Le fichier .pbix n'a pas été trouvé dans : {source_file_path}")
-            return None
+    print(f"Extraction du fichier Layout.json à partir du fichier Power BI.")
+    if not os.path.exists(source_file_path):
+        print(f"Erreur : Le fichier source n'existe pas : {source_file_path}")
+        return None
 
-        if not os.path.exists(pbi_tools_path):
-            print(f"Erreur : L'exécutable pbi-tools n'a pas été trouvé dans le chemin spécifié : {pbi_tools_path}")
-            return None
+    if is_powerbi_project(source_file_path):
+        pbir_definition_dir = find_pbir_definition_dir(source_file_path)
+        if pbir_definition_dir:
+            # Les pages et visuels sont déjà des fichiers JSON : ils sont lus directement par l'étape des KPIs
+            print(f"Rapport au format PBIR : pages et visuels lus directement depuis '{pbir_definition_dir}'.")
+            return pbir_definition_dir
+    if stream:
+        return save_layout_stream_side_output(source_file_path, output_dir, json_output)
+
+    if is_powerbi_project(source_file_path):
+        content = read_layout_from_pbip(source_file_path)
+    else:
+        content = read_layout_from_pbix(source_file_path)
+    if not content:
+        return None
 
-        if not os.path.exists(pbi_tools_core_path):
-            print(f"Erreur : L'exécutable pbi-tools.core n'a pas été trouvé dans : {pbi_tools_core_path}")
-            return None
+    try:
+        with measure_stage("layout_parse"):
+            data = parse_json(content)
+    except json.JSONDecodeError as e:
+        print(f"Erreur : Le contenu du fichier 'Layout' n'est pas un JSON valide : {e}")
+        return None
 
-        os.makedirs(output_dir, exist_ok=True)
-        json_files_dir = os.path.join(output_dir, "JSON Files")
-        os.makedirs(json_files_dir, exist_ok=True)
-        temp_dir = None
-        default_extract_folder = os.path.splitext(source_file_path)[0]
-        output_pbit_path = None
-        extracted_datamodelschema_path = None
-        datamodelschema_output_path = os.path.join(json_files_dir, 'DataModelSchema.json')
+    try:
+        if save_json_side_output(os.path.join(output_dir, "JSON Files", 'Layout.json'), data, content, json_output):
+            print(f"Fichier 'Layout.json' extrait avec succès.")
+    except Exception as e:
+        # La copie est annexe : les données analysées restent transmises à l'étape des KPIs
+        print(f"Erreur lors de la sauvegarde du fichier JSON : {e}")
+
+    return data
+
+# --- Projets Power BI (PBIP) : modèle sémantique TMDL / model.bim et report.json ---
+
+POWERBI_PROJECT_EXTENSION = '.pbip'
+
+# Types d'objets TMDL et collection du DataModelSchema (TMSL) dans laquelle ils sont rangés.
+# None désigne un objet unique, stocké directement sous son type (ex. 'linguisticMetadata').
+TMDL_OBJECT_COLLECTIONS = {
+    "database": None,
+    "model": None,
+    "table": "tables",
+    "column": "columns",
+    "measure": "measures",
+    "partition": "partitions",
+    "hierarchy": "hierarchies",
+    "level": "levels",
+    "annotation": "annotations",
+    "extendedProperty": "extendedProperties",
+    "variation": "variations",
+    "relationship": "relationships",
+    "cultureInfo": "cultures",
+    "linguisticMetadata": None,
+    "translations": None,
+    "expression": "expressions",
+    "dataSource": "dataSources",
+    "role": "roles",
+    "member": "members",
+    "tablePermission": "tablePermissions",
+    "columnPermission": "columnPermissions",
+    "perspective": "perspectives",
+    "perspectiveTable": "tables",
+    "perspectiveColumn": "columns",
+    "perspectiveMeasure": "measures",
+    "perspectiveHierarchy": "hierarchies",
+    "calculationGroup": None,
+    "calculationItem": "calculationItems",
+    "queryGroup": "queryGroups",
+}
+
+# Propriété recevant l'expression écrite après '=' sur la ligne de déclaration d'un objet
+TMDL_DEFAULT_PROPERTIES = {
+    "column": "expression",
+    "measure": "expression",
+    "partition": "sourceType",
+    "annotation": "value",
+    "extendedProperty": "value",
+    "expression": "expression",
+    "calculationItem": "expression",
+    "tablePermission": "filterExpression",
+    "linguisticMetadata": "content",
+}
+
+# Propriétés d'une partition TMDL qui appartiennent à sa 'source' dans le DataModelSchema
+TMDL_PARTITION_SOURCE_PROPERTIES = ("source", "entityName", "expressionSource", "schemaName")
+
+TMDL_INTEGER_PROPERTIES = ("compatibilityLevel", "ordinal")
+
+TMDL_PROPERTY_PATTERN = re.compile(r"([A-Za-z_][\w]*)\s*(?:(:|=)\s*(.*))?$")
+
+def read_tmdl_name(text, stop_at_dot=False):
+    """
+    Lit un nom TMDL au début de text : entre apostrophes (avec '' pour une apostrophe)
+    ou sans espace (ni point si stop_at_dot). Retourne le tuple (nom, reste de la ligne).
+    """
+    text = text.lstrip()
+    if not text.startswith("'"):
+        match = re.match(r"[^\s=.]*" if stop_at_dot else r"[^\s=]*", text)
+        return match.group(0), text[match.end():]
+    name_chars = []
+    index = 1
+    while index < len(text):
+        char = text[index]
+        if char == "'":
+            if text[index + 1:index + 2] == "'":
+                name_chars.append("'")
+                index += 2
+                continue
+            return "".join(name_chars), text[index + 1:]
+        name_chars.append(char)
+        index += 1
+    return "".join(name_chars), ""
+
+def split_tmdl_reference(reference):
+    """Découpe une référence qualifiée TMDL (ex. Ventes.'Clé Produit') en liste de noms."""
+    names = []
+    rest = reference
+    while True:
+        name, rest = read_tmdl_name(rest, stop_at_dot=True)
+        names.append(name)
+        rest = rest.lstrip()
+        if not rest.startswith('.'):
+            return names
+        rest = rest[1:]
+
+def convert_tmdl_value(property_name, text):
+    """Convertit la valeur texte d'une propriété TMDL (booléens, entiers connus, chaînes entre guillemets)."""
+    text = text.strip()
+    if text == "true":
+        return True
+    if text == "false":
+        return False
+    if property_name in TMDL_INTEGER_PROPERTIES and re.fullmatch(r"-?\d+", text):
+        return int(text)
+    if len(text) >= 2 and text.startswith('"') and text.endswith('"'):
+        return text[1:-1].replace('""', '"')
+    return text
+
+def get_tmdl_indentation(line):
+    """Niveau d'indentation d'une ligne TMDL (une tabulation ou quatre espaces par niveau)."""
+    whitespace = line[:len(line) - len(line.lstrip())]
+    return whitespace.count('\t') + whitespace.count(' ') // 4
+
+def dedent_tmdl_lines(lines):
+    """Retire l'indentation commune d'un bloc d'expression multiligne."""
+    non_blank_lines = [line for line in lines if line.strip()]
+    if not non_blank_lines:
+        return ""
+    margin = min(len(line) - len(line.lstrip()) for line in non_blank_lines)
+    return "\n".join(line[margin:].rstrip() for line in lines).strip("\n")
+
+def read_tmdl_expression(lines, start_index, inline_text, threshold):
+    """
+    Lit l'expression commençant après '=' à la ligne start_index : le texte sur la même ligne,
+    puis les lignes suivantes plus indentées que threshold, ou un bloc délimité par ```.
+    Retourne le tuple (expression, index de la première ligne non consommée).
+    """
+    index = start_index + 1
+    if inline_text.startswith("```"):
+        block = []
+        while index < len(lines) and lines[index].strip() != "```":
+            block.append(lines[index])
+            index += 1
+        return dedent_tmdl_lines(block), index + 1
+
+    block = []
+    last_content_index = index
+    while index < len(lines):
+        line = lines[index]
+        if line.strip():
+            if get_tmdl_indentation(line) <= threshold:
+                break
+            last_content_index = index + 1
+        block.append(line)
+        index += 1
+    block = block[:last_content_index - start_index - 1]
+    expression = dedent_tmdl_lines(block)
+    if inline_text:
+        expression = f"{inline_text}\n{expression}" if expression else inline_text
+    return expression, start_index + 1 + len(block)
+
+def parse_tmdl_document(text):
+    """
+    Analyse un document TMDL (un fichier du dossier 'definition') en une seule passe guidée
+    par l'indentation. Chaque objet devient un dictionnaire au format du DataModelSchema,
+    rangé dans la collection de son parent (TMDL_OBJECT_COLLECTIONS).
+    Retourne la liste des objets de premier niveau sous forme de tuples (type, objet) ;
+    les lignes 'ref <type> <nom>' sont retournées comme objets de type 'ref'.
+    """
+    lines = text.lstrip('\ufeff').splitlines()
+    top_level_objects = []
+    created_objects = []
+    # Pile des objets ouverts : (indentation, objet)
+    stack = []
+    description_lines = []
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+        if not stripped:
+            index += 1
+            continue
+        indentation = get_tmdl_indentation(line)
 
-        try:
-            temp_dir = tempfile.mkdtemp()
+        if stripped.startswith("///"):
+            description_lines.append(stripped[3:].strip())
+            index += 1
+            continue
 
-            if os.path.exists(default_extract_folder):
-                print(f"Suppression du dossier d'extraction existant créé par pbi-tools : {os.path.basename(default_extract_folder)}")
-                shutil.rmtree(default_extract_folder, ignore_errors=True)
+        while stack and stack[-1][0] >= indentation:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
 
-            print("Exécution de pbi-tools extract pour générer les données brutes.")
-            try:
-                cmd = [pbi_tools_path, "extract", source_file_path, "-modelSerialization", "Raw"]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-                if result.stderr:
-                    print(f"Erreurs stderr : {result.stderr.strip()}")
-                if os.path.exists(default_extract_folder):
-                    print(f"Extraction pbi-tools réussie dans : {os.path.basename(default_extract_folder)}/")
-                else:
-                    print(f"Erreur : Dossier d'extraction par défaut non trouvé après l'exécution.")
-                    return None
-            except subprocess.CalledProcessError as e:
-                print(f"Erreur lors de l'extraction de pbi-tools (code {e.returncode}) :")
-                print(f"Sortie : {e.stdout.strip()}")
-                print(f"Erreur : {e.stderr.strip()}")
-                return None
-            except Exception as e:
-                print(f"Erreur inattendue lors de l'exécution de pbi-tools extract : {e}")
-                return None
+        keyword, _, declaration = stripped.partition(' ')
+        declaration = declaration.strip()
 
-            datamodelschema_path = find_datamodelschema_file(default_extract_folder)
-            if datamodelschema_path:
-                print(f"Fichier DataModelSchema trouvé directement dans l'extraction Raw.")
-                content = read_file_with_multiple_encodings(datamodelschema_path)
-                if content:
-                    try:
-                        data = json.loads(content)
-                        with open(datamodelschema_output_path, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, indent=4, ensure_ascii=False)
-                        print(f"Fichier DataModelSchema.json extrait avec succès.")
-                        extracted_datamodelschema_path = datamodelschema_output_path
-                        return extracted_datamodelschema_path
-                    except json.JSONDecodeError as e:
-                        print(f"Erreur : Le contenu de DataModelSchema n'est pas un JSON valide : {e}")
-                        return None
-                    except Exception as e:
-                        print(f"Erreur lors de la sauvegarde de DataModelSchema.json : {e}")
-                        return None
-                else:
-                    print(f"Erreur : Impossible de lire DataModelSchema avec les encodages essayés.")
-                    return None
+        if keyword == "ref" and parent is None:
+            ref_type, _, ref_name = declaration.partition(' ')
+            top_level_objects.append(("ref", {"type": ref_type, "name": read_tmdl_name(ref_name)[0]}))
+            index += 1
+            continue
+
+        # 'nom: valeur' est une propriété ; 'objet =' n'est une déclaration que pour les objets uniques
+        # sans nom (ex. 'linguisticMetadata =')
+        is_declaration = (keyword in TMDL_OBJECT_COLLECTIONS and not declaration.startswith(':')
+                          and (not declaration.startswith('=') or TMDL_OBJECT_COLLECTIONS[keyword] is None))
+        if is_declaration:
+            name, rest = read_tmdl_name(declaration)
+            tmdl_object = {"name": name} if name else {}
+            if description_lines:
+                tmdl_object["description"] = "\n".join(description_lines)
+                description_lines = []
+            index += 1
+
+            rest = rest.strip()
+            if rest.startswith('='):
+                inline_text = rest[1:].strip()
+                expression, index = read_tmdl_expression(lines, index - 1, inline_text, indentation + 1)
+                tmdl_object[TMDL_DEFAULT_PROPERTIES.get(keyword, "expression")] = expression
+
+            if parent is None:
+                top_level_objects.append((keyword, tmdl_object))
+            elif TMDL_OBJECT_COLLECTIONS[keyword] is None:
+                parent[keyword] = tmdl_object
             else:
-                print(f"Aucun fichier DataModelSchema trouvé dans l'extraction Raw. Tentative de compilation en .pbit pour l'extraire.")
+                parent.setdefault(TMDL_OBJECT_COLLECTIONS[keyword], []).append(tmdl_object)
+            created_objects.append((keyword, tmdl_object))
+            stack.append((indentation, tmdl_object))
+            continue
 
-            model_folder = os.path.join(default_extract_folder, 'Model')
-            if not os.path.exists(model_folder) or not os.listdir(model_folder):
-                print(f"Avertissement : Aucun dossier 'Model' ou modèle de données trouvé dans l'extraction. Le fichier .pbix peut ne pas contenir de modèle de données à compiler.")
-                return None
+        description_lines = []
+        match = TMDL_PROPERTY_PATTERN.match(stripped)
+        index += 1
+        if not match or parent is None:
+            continue
+        property_name, separator, value = match.groups()
+        if separator is None:
+            parent[property_name] = True
+        elif separator == ':':
+            parent[property_name] = convert_tmdl_value(property_name, value)
+        else:
+            expression, index = read_tmdl_expression(lines, index - 1, value.strip(), indentation)
+            parent[property_name] = expression
+
+    for object_type, tmdl_object in created_objects:
+        normalize_tmdl_object(object_type, tmdl_object)
+    return top_level_objects
+
+def normalize_tmdl_object(object_type, tmdl_object):
+    """Ramène les propriétés d'un objet TMDL à la forme utilisée par le DataModelSchema."""
+    if object_type == "partition":
+        source = {"type": tmdl_object.pop("sourceType", "m")}
+        for property_name in TMDL_PARTITION_SOURCE_PROPERTIES:
+            if property_name in tmdl_object:
+                source["expression" if property_name == "source" else property_name] = tmdl_object.pop(property_name)
+        tmdl_object["source"] = source
+    elif object_type == "column" and "expression" in tmdl_object:
+        tmdl_object.setdefault("type", "calculated")
+    elif object_type == "relationship":
+        for side in ("from", "to"):
+            reference = tmdl_object.get(f"{side}Column")
+            if isinstance(reference, str):
+                names = split_tmdl_reference(reference)
+                if len(names) >= 2:
+                    tmdl_object[f"{side}Table"] = names[0]
+                    tmdl_object[f"{side}Column"] = names[-1]
+    elif object_type == "variation":
+        reference = tmdl_object.get("defaultHierarchy")
+        if isinstance(reference, str):
+            names = split_tmdl_reference(reference)
+            tmdl_object["defaultHierarchy"] = {"table": names[0], "hierarchy": names[-1]}
+    elif object_type == "hierarchy":
+        for ordinal, level in enumerate(tmdl_object.get("levels", [])):
+            level.setdefault("ordinal", ordinal)
+    elif object_type == "linguisticMetadata" and isinstance(tmdl_object.get("content"), str):
+        try:
+            tmdl_object["content"] = parse_json(tmdl_object["content"])
+        except json.JSONDecodeError:
+            pass
 
-            print("Exécution de pbi-tools.core compile pour générer un fichier .pbit.")
-            output_pbit_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(source_file_path))[0] + '.pbit')
-            try:
-                cmd = [pbi_tools_core_path, "compile", default_extract_folder, output_pbit_path, "PBIT", "True"]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-                if result.stderr:
-                    print(f"Erreurs stderr : {result.stderr.strip()}")
-                print(f"Compilation réussie en {os.path.basename(output_pbit_path)}.")
-            except subprocess.CalledProcessError as e:
-                print(f"Erreur lors de l'exécution de pbi-tools.core compile (code {e.returncode}) :")
-                print(f"Sortie : {e.stdout.strip()}")
-                print(f"Erreur : {e.stderr.strip()}")
-                return None
-            except Exception as e:
-                print(f"Erreur inattendue lors de l'exécution de pbi-tools.core compile : {e}")
-                return None
+def parse_tmdl_file(tmdl_path):
+    """Lit et analyse un fichier .tmdl. Retourne la liste des objets de premier niveau."""
+    with open(tmdl_path, 'r', encoding='utf-8-sig') as f:
+        return parse_tmdl_document(f.read())
 
-            if not os.path.exists(output_pbit_path):
-                print(f"Erreur : Le fichier .pbit n'a pas été créé à l'emplacement : {output_pbit_path}")
-                return None
+def load_tmdl_semantic_model(definition_dir, database_name=None):
+    """
+    Charge un modèle sémantique TMDL (dossier 'definition' d'un projet PBIP) et le retourne
+    sous la même forme que le DataModelSchema extrait par pbi-tools ({"name", "compatibilityLevel", "model"}).
+    Les fichiers .tmdl, nombreux et petits, sont lus et analysés en parallèle.
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-            print("Extraction de DataModelSchema depuis le fichier .pbit généré.")
-            try:
-                with zipfile.ZipFile(output_pbit_path, 'r') as zip_ref:
-                    datamodelschema_path_in_zip = None
-                    for file_name in zip_ref.namelist():
-                        if file_name == 'DataModelSchema':
-                            datamodelschema_path_in_zip = file_name
-                            break
-                    if not datamodelschema_path_in_zip:
-                        print(f"Erreur : Fichier DataModelSchema non trouvé dans l'archive .pbit.")
-                        return None
-
-                    zip_ref.extract(datamodelschema_path_in_zip, temp_dir)
-                    extracted_file_path = os.path.join(temp_dir, datamodelschema_path_in_zip)
-                    content = read_file_with_multiple_encodings(extracted_file_path)
-                    if content:
-                        try:
-                            data = json.loads(content)
-                            with open(datamodelschema_output_path, 'w', encoding='utf-8') as f:
-                                json.dump(data, f, indent=4, ensure_ascii=False)
-                            print(f"Fichier DataModelSchema.json extrait avec succès.")
-                            extracted_datamodelschema_path = datamodelschema_output_path
-                        except json.JSONDecodeError as e:
-                            print(f"Erreur : Le contenu de DataModelSchema n'est pas un JSON valide : {e}")
-                            return None
-                        except Exception as e:
-                            print(f"Erreur lors de la sauvegarde de DataModelSchema.json : {e}")
-                            return None
-                    else:
-                        print(f"Erreur : Impossible de lire DataModelSchema avec les encodages essayés.")
-                        return None
-            except zipfile.BadZipFile:
-                print(f"Erreur : Le fichier .pbit '{os.path.basename(output_pbit_path)}' n'est pas une archive ZIP valide.")
-                return None
-            except Exception as e:
-                print(f"Erreur lors de l'extraction de l'archive .pbit : {e}")
-                return None
+    tmdl_paths = sorted(glob.glob(os.path.join(definition_dir, "**", "*.tmdl"), recursive=True))
+    if not tmdl_paths:
+        return None
 
-        finally:
-            if os.path.exists(default_extract_folder):
-                print(f"Nettoyage du dossier d'extraction : {os.path.basename(default_extract_folder)}")
-                shutil.rmtree(default_extract_folder, ignore_errors=True)
+    with ThreadPoolExecutor(max_workers=min(8, len(tmdl_paths))) as executor:
+        parsed_files = list(executor.map(parse_tmdl_file, tmdl_paths))
+
+    database = {"name": database_name or "Modèle sans nom"}
+    model = {}
+    referenced_names = collections.defaultdict(list)
+    for top_level_objects in parsed_files:
+        for object_type, tmdl_object in top_level_objects:
+            if object_type == "ref":
+                referenced_names[tmdl_object["type"]].append(tmdl_object["name"])
+            elif object_type == "database":
+                database.update(tmdl_object)
+            elif object_type == "model":
+                tmdl_object.pop("name", None)
+                model.update(tmdl_object)
+            elif TMDL_OBJECT_COLLECTIONS.get(object_type):
+                model.setdefault(TMDL_OBJECT_COLLECTIONS[object_type], []).append(tmdl_object)
+
+    # Les lignes 'ref' de model.tmdl donnent l'ordre d'origine des tables, cultures, etc.
+    for ref_type, names in referenced_names.items():
+        collection_name = TMDL_OBJECT_COLLECTIONS.get(ref_type)
+        if collection_name in model:
+            positions = {name: position for position, name in enumerate(names)}
+            model[collection_name].sort(key=lambda item: positions.get(item.get("name"), len(positions)))
+
+    database["model"] = model
+    return database
+
+def resolve_pbip_artifacts(pbip_path):
+    """
+    Détermine les dossiers du rapport ('<nom>.Report') et du modèle sémantique ('<nom>.SemanticModel')
+    d'un projet PBIP à partir du fichier .pbip et du fichier definition.pbir du rapport.
+    Retourne le tuple (dossier du rapport, dossier du modèle) ; un dossier introuvable vaut None.
+    """
+    project_dir = os.path.dirname(os.path.abspath(pbip_path))
+    project_name = os.path.splitext(os.path.basename(pbip_path))[0]
 
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+    report_dir = os.path.join(project_dir, f"{project_name}.Report")
+    try:
+        with open(pbip_path, 'r', encoding='utf-8-sig') as f:
+            pbip = json.load(f)
+        for artifact in pbip.get("artifacts", []):
+            report_path = artifact.get("report", {}).get("path")
+            if report_path:
+                report_dir = os.path.normpath(os.path.join(project_dir, report_path))
+                break
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Avertissement : Lecture de '{os.path.basename(pbip_path)}' impossible ({e}), dossiers par défaut utilisés.")
 
-    except Exception as e:
-        print(f"Erreur générale dans extract_datamodelschema_from_pbix : {e}")
+    semantic_model_dir = os.path.join(project_dir, f"{project_name}.SemanticModel")
+    definition_pbir_path = os.path.join(report_dir, "definition.pbir")
+    if os.path.exists(definition_pbir_path):
+        try:
+            with open(definition_pbir_path, 'r', encoding='utf-8-sig') as f:
+                dataset_reference = json.load(f).get("datasetReference", {})
+            model_path = dataset_reference.get("byPath", {}).get("path") if isinstance(dataset_reference, dict) else None
+            if model_path:
+                semantic_model_dir = os.path.normpath(os.path.join(report_dir, model_path))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Avertissement : Lecture de 'definition.pbir' impossible : {e}")
+
+    return (report_dir if os.path.isdir(report_dir) else None,
+            semantic_model_dir if os.path.isdir(semantic_model_dir) else None)
+
+def is_powerbi_project(source_file_path):
+    """Indique si le fichier désigne un projet Power BI (.pbip) plutôt qu'une archive."""
+    return source_file_path.lower().endswith(POWERBI_PROJECT_EXTENSION)
+
+def load_semantic_model_from_pbip(pbip_path):
+    """
+    Charge le modèle sémantique d'un projet PBIP sans pbi-tools : dossier 'definition' au format TMDL,
+    ou à défaut fichier 'model.bim' (TMSL, même structure que le DataModelSchema).
+    Retourne le modèle (dictionnaire), ou None en cas d'échec.
+    """
+    _, semantic_model_dir = resolve_pbip_artifacts(pbip_path)
+    if not semantic_model_dir:
+        print(f"Erreur : Dossier du modèle sémantique introuvable pour le projet '{os.path.basename(pbip_path)}'.")
         return None
 
-    return extracted_datamodelschema_path
+    database_name = os.path.splitext(os.path.basename(semantic_model_dir))[0]
+    definition_dir = os.path.join(semantic_model_dir, "definition")
+    if os.path.isdir(definition_dir):
+        datamodel = load_tmdl_semantic_model(definition_dir, database_name)
+        if datamodel is not None:
+            return datamodel
 
-def extract_table_from_queryref(query_ref):
-    """Extrait le nom de la table du queryRef."""
-    if not isinstance(query_ref, str):
-        return "N/A"
+    model_bim_path = os.path.join(semantic_model_dir, "model.bim")
+    if os.path.exists(model_bim_path):
+        with open(model_bim_path, 'r', encoding='utf-8-sig') as f:
+            return parse_json(f.read())
 
-    match = re.search(r'\(([^.]+)\.|^([^.]+)\.', query_ref)
-    if match:
-        table_name = match.group(1) if match.group(1) else match.group(2)
-        return table_name.strip()
-    return "N/A"
+    print(f"Erreur : Aucun fichier .tmdl ni 'model.bim' trouvé dans : {semantic_model_dir}")
+    return None
 
-def extract_all_kpis_from_powerbi_report(json_file_path):
-    """Extrait les KPIs (mesures calculées) des données JSON de Layout."""
-    print("Analyse du fichier Layout.json pour extraire les KPIs.")
-    try:
-        with open(json_file_path, 'r', encoding='utf-16') as file:
-            content = file.read()
-            start_idx = content.find('{')
-            if start_idx > 0:
-                content = content[start_idx:]
-            data = json.loads(content)
-    except UnicodeDecodeError:
-        print("Erreur de décodage Unicode. Tentative avec l'encodage 'utf-8'.")
-        try:
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                start_idx = content.find('{')
-                if start_idx > 0:
-                    content = content[start_idx:]
-                data = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"Erreur de décodage JSON : {e}")
-            return None
-        except Exception as e:
-            print(f"Erreur lors de la lecture du fichier avec utf-8 : {e}")
-            return None
-    except json.JSONDecodeError as e:
-        print(f"Erreur de décodage JSON : {e}")
+def find_pbir_definition_dir(pbip_path):
+    """
+    Retourne le dossier 'definition' du rapport d'un projet PBIP enregistré au format PBIR
+    (une page et un visuel par fichier JSON), ou None pour un rapport au format 'report.json'.
+    """
+    report_dir, _ = resolve_pbip_artifacts(pbip_path)
+    if not report_dir:
         return None
-    except Exception as e:
-        print(f"Erreur lors de la lecture du fichier avec utf-16 : {e}")
+    definition_dir = os.path.join(report_dir, "definition")
+    return definition_dir if os.path.isdir(os.path.join(definition_dir, "pages")) else None
+
+def read_layout_from_pbip(pbip_path):
+    """
+    Lit le fichier 'report.json' du dossier rapport d'un projet PBIP (même contenu que l'entrée
+    'Layout' d'un .pbix). Retourne le contenu texte, ou None en cas d'échec.
+    """
+    report_dir, _ = resolve_pbip_artifacts(pbip_path)
+    report_json_path = os.path.join(report_dir, "report.json") if report_dir else None
+    if not report_json_path or not os.path.exists(report_json_path):
+        print(f"Erreur : Le fichier 'report.json' du projet '{os.path.basename(pbip_path)}' est introuvable.")
         return None
+    return read_text_file(report_json_path, from_json_start=True)
 
-    all_kpis = []
-    sections = data.get('sections', [])
-    for section_index, section in enumerate(sections):
-        section_name = section.get('displayName', f'Section {section_index + 1}')
-        for visual_container in section.get('visualContainers', []):
-            config_str = visual_container.get('config', '{}')
+# --- Cache disque du DataModelSchema ---
+
+# Compteurs du cache pour le processus courant
+datamodelschema_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+DATAMODELSCHEMA_CACHE_VERSION = 1
+
+def compute_datamodel_cache_key(source_file_path):
+    """
+    Calcule la clé de cache du modèle de données d'un fichier Power BI.
+    La clé est dérivée du CRC32 et des tailles de l'entrée 'DataModel' (ou 'DataModelSchema'),
+    lus dans le répertoire central de l'archive : rien n'est décompressé.
+    Retourne None si l'archive ne contient pas de modèle de données.
+    """
+    try:
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            names = set(zip_ref.namelist())
+            for member_name in ('DataModel', 'DataModelSchema'):
+                if member_name in names:
+                    info = zip_ref.getinfo(member_name)
+                    key_material = f"v{DATAMODELSCHEMA_CACHE_VERSION}|{info.filename}|{info.CRC:08x}|{info.file_size}|{info.compress_size}"
+                    return hashlib.sha256(key_material.encode()).hexdigest()
+    except (zipfile.BadZipFile, OSError):
+        return None
+    return None
+
+def get_datamodelschema_cache_directory(output_dir):
+    """Retourne le dossier par défaut du cache des DataModelSchema : 'Cache/DataModelSchema' du répertoire de sortie."""
+    return os.path.join(output_dir, "Cache", "DataModelSchema")
+
+def load_datamodelschema_from_cache(cache_key, cache_dir):
+    """Retourne le contenu JSON mis en cache pour cette clé (et le marque comme récemment utilisé), ou None."""
+    if not cache_key or not cache_dir:
+        return None
+    cache_path = os.path.join(cache_dir, f"{cache_key}.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        os.utime(cache_path, None)
+    except OSError:
+        datamodelschema_cache_stats["misses"] += 1
+        return None
+    datamodelschema_cache_stats["hits"] += 1
+    return content
+
+def remove_datamodelschema_from_cache(cache_key, cache_dir):
+    """Supprime une entrée du cache (entrée corrompue)."""
+    if not cache_key or not cache_dir:
+        return
+    try:
+        os.remove(os.path.join(cache_dir, f"{cache_key}.json"))
+    except OSError:
+        pass
+
+def store_datamodelschema_in_cache(cache_key, content, cache_dir, max_bytes=None):
+    """Enregistre le contenu JSON du DataModelSchema dans le cache, puis applique l'éviction LRU."""
+    if not cache_key or not cache_dir or content is None:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, f"{cache_key}.json")
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, cache_path)
+        evict_datamodelschema_cache(cache_dir, datamodelschema_cache_max_bytes if max_bytes is None else max_bytes)
+    except OSError as e:
+        print(f"Avertissement : Impossible d'écrire dans le cache DataModelSchema : {e}")
+
+def evict_datamodelschema_cache(cache_dir, max_bytes):
+    """Supprime les entrées les moins récemment utilisées jusqu'à ce que le cache tienne dans max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith('.json'):
             try:
-                config = json.loads(config_str)
-                visual_type = None
-                if 'singleVisual' in config and 'visualType' in config['singleVisual']:
-                    visual_type = config['singleVisual']['visualType']
-                if 'singleVisual' in config and 'projections' in config['singleVisual']:
-                    projections = config['singleVisual']['projections']
-                    for role, items in projections.items():
-                        for item in items:
-                            if 'queryRef' in item:
-                                query_ref = item['queryRef']
-                                base_name = query_ref
-                                alias = ""
-                                dax_formula = query_ref
-                                is_calculated = False
-                                source_table = extract_table_from_queryref(query_ref)
-                                data_transforms_str = visual_container.get('dataTransforms', '{}')
-                                try:
-                                    data_transforms = json.loads(data_transforms_str)
-                                    if 'selects' in data_transforms:
-                                        for select in data_transforms['selects']:
-                                            if select.get('queryName') == query_ref:
-                                                alias = select.get('displayName', "")
-                                                if 'expr' in select:
-                                                    expr = select['expr']
-                                                    if 'Aggregation' in str(expr) or 'Measure' in str(expr):
-                                                        is_calculated = True
-                                                    elif 'Column' in str(expr) or 'HierarchyLevel' in str(expr):
-                                                        is_calculated = False
-                                except json.JSONDecodeError:
-                                    pass
-                                measure_type = "Mesure Calculée" if is_calculated else "Mesure non Calculée"
-                                kpi = {
-                                    "Nom de Base": base_name,
-                                    "Alias Power BI": alias,
-                                    "Formule DAX": dax_formula,
-                                    "Type Visuel": visual_type,
-                                    "Type Mesure": measure_type,
-                                    "Source Table": source_table,
-                                    "Source": f"Visuel ({section_name})",
-                                }
-                                all_kpis.append(kpi)
-            except json.JSONDecodeError:
+                stat = entry.stat()
+            except OSError:
                 continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
 
-    model_kpis = []
-    def find_measures_in_json(data):
-        measures = []
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key == 'measures' and isinstance(value, list):
-                    for measure_def in value:
-                        name = measure_def.get('name', 'N/A')
-                        expression = measure_def.get('expression', 'N/A')
-                        display_name = measure_def.get('properties', {}).get('dataViewDisplayName', name)
-                        source_table = "N/A (Modèle)"
-                        measures.append({
-                            "Nom de Base": name,
-                            "Alias Power BI": display_name,
-                            "Formule DAX": expression,
-                            "Type Visuel": "N/A",
-                            "Type Mesure": "Mesure Calculée",
-                            "Source Table": source_table,
-                            "Source": "Modèle (potentiel)",
-                        })
-                elif isinstance(value, (dict, list)):
-                    measures.extend(find_measures_in_json(value))
-        elif isinstance(data, list):
-            for item in data:
-                measures.extend(find_measures_in_json(item))
-        return measures
-
-    model_kpis = find_measures_in_json(data)
-    final_kpis_list = all_kpis.copy()
-    for model_kpi in model_kpis:
-        found_in_visuals = False
-        for visual_kpi in final_kpis_list:
-            if visual_kpi['Nom de Base'] == model_kpi['Nom de Base']:
-                visual_kpi['Source'] += " et Modèle (potentiel)"
-                if model_kpi['Formule DAX'] != 'N/A' and visual_kpi['Formule DAX'] == visual_kpi['Nom de Base']:
-                    visual_kpi['Formule DAX'] = model_kpi['Formule DAX']
-                found_in_visuals = True
-                break
-        if not found_in_visuals:
-            final_kpis_list.append(model_kpi)
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+            datamodelschema_cache_stats["evictions"] += 1
+        except OSError:
+            continue
 
-    kpis_df = pd.DataFrame(final_kpis_list)
-    if 'Type Mesure' in kpis_df.columns:
-        kpis_df = kpis_df[kpis_df['Type Mesure'] == 'Mesure Calculée'].copy()
-        kpis_df = kpis_df.drop('Type Mesure', axis=1)
+# Modes d'écriture des copies annexes 'JSON Files/Layout.json' et 'DataModelSchema.json'
+JSON_OUTPUT_MODES = ("raw", "pretty", "compact", "gzip", "none")
 
-    cols = ["Nom de Base", "Alias Power BI", "Source Table", "Formule DAX", "Type Visuel", "Source"]
-    cols = [col for col in cols if col in kpis_df.columns]
-    kpis_df = kpis_df[cols]
-    if kpis_df is not None and not kpis_df.empty:
-        print("Extraction des KPIs terminée avec succès.")
+def save_json_side_output(output_path, data=None, raw_text=None, mode="pretty"):
+    """
+    Écrit la copie annexe d'un document JSON ('JSON Files/...') selon le mode choisi (JSON_OUTPUT_MODES) :
+    'raw' recopie le texte d'origine décodé, réencodé en UTF-8, sans le resérialiser ; 'pretty' l'indente ;
+    'compact' le resérialise sans espaces ; 'gzip' écrit le texte d'origine compressé (<nom>.gz) ;
+    'none' n'écrit rien. Sans texte d'origine (modèle construit en mémoire), 'raw' et 'gzip'
+    sérialisent data de façon compacte. Retourne le chemin écrit, ou None.
+    """
+    if mode == "none":
+        return None
+    if mode not in JSON_OUTPUT_MODES:
+        raise ValueError(f"Mode de sortie JSON inconnu : {mode}. Modes disponibles : {', '.join(JSON_OUTPUT_MODES)}.")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if mode == "pretty":
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        return output_path
+
+    if raw_text is None or mode == "compact":
+        raw_text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    if mode == "gzip":
+        output_path = f"{output_path}.gz"
+        with gzip.open(output_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(raw_text)
     else:
-        print("Aucun KPI pertinent (Mesure Calculée) n'a été extrait.")
-    return kpis_df
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(raw_text)
+    return output_path
 
-def run_kpi_extraction(output_directory):
+def run_pbi_tools_datamodelschema_extraction(source_file_path, pbi_tools_path, pbi_tools_core_path):
     """
-    Exécute l'extraction des KPIs depuis un fichier PBIX et retourne le DataFrame des KPIs.
-    Retourne également le chemin du DataModelSchema.json extrait si succès.
+    Lance pbi-tools extract (sérialisation Raw) puis, si nécessaire, pbi-tools.core compile
+    en .pbit, et retourne le contenu texte du DataModelSchema obtenu (ou None en cas d'échec).
     """
-    print(f"\n{'='*50}")
-    print("Début de l'extraction des KPIs à partir d'un fichier Power BI.")
-    
-    layout_json_path_in_output = os.path.join(output_directory, "JSON Files", "Layout.json")
-    datamodelschema_json_path_in_output = os.path.join(output_directory, "JSON Files", "DataModelSchema.json")
+    if not pbi_tools_path or not os.path.exists(pbi_tools_path):
+        print(f"Erreur : L'exécutable pbi-tools n'a pas été trouvé dans le chemin spécifié : {pbi_tools_path}")
+        return None
 
-    extracted_datamodelschema_file_path = None
+    if not pbi_tools_core_path or not os.path.exists(pbi_tools_core_path):
+        print(f"Erreur : L'exécutable pbi-tools.core n'a pas été trouvé dans : {pbi_tools_core_path}")
+        return None
+
+    temp_dir = None
+    default_extract_folder = os.path.splitext(source_file_path)[0]
 
     try:
-        print("Recherche des exécutables pbi-tools pour l'extraction des KPIs.")
-        pbi_tools_path = find_executable("pbi-tools.exe")
-        pbi_tools_core_path = find_executable("pbi-tools.core.exe")
+        temp_dir = tempfile.mkdtemp()
 
-        if not pbi_tools_path or not pbi_tools_core_path:
-            raise FileNotFoundError("Les exécutables pbi-tools.exe et/ou pbi-tools.core.exe n'ont pas été trouvés.")
+        if os.path.exists(default_extract_folder):
+            print(f"Suppression du dossier d'extraction existant créé par pbi-tools : {os.path.basename(default_extract_folder)}")
+            shutil.rmtree(default_extract_folder, ignore_errors=True)
 
-        print("Exécutables pbi-tools trouvés et prêts à être utilisés.")
-        # Déplacer les exécutables vers un sous-dossier pbi-tools dans Data Extractor
-        pbi_tools_subdir = os.path.join(output_directory, "pbi-tools")
-        os.makedirs(pbi_tools_subdir, exist_ok=True)
+        print("Exécution de pbi-tools extract pour générer les données brutes.")
         try:
-            shutil.move(pbi_tools_path, os.path.join(pbi_tools_subdir, "pbi-tools.exe"))
-            shutil.move(pbi_tools_core_path, os.path.join(pbi_tools_subdir, "pbi-tools.core.exe"))
-            pbi_tools_path = os.path.join(pbi_tools_subdir, "pbi-tools.exe")
-            pbi_tools_core_path = os.path.join(pbi_tools_subdir, "pbi-tools.core.exe")
-            print(f"Déplacement des exécutables vers {pbi_tools_subdir} effectué avec succès.")
+            cmd = [pbi_tools_path, "extract", source_file_path, "-modelSerialization", "Raw"]
+            with measure_stage("pbi_tools", child_processes=True, target="extract"):
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True, creationflags=SUBPROCESS_CREATION_FLAGS)
+            if result.stderr:
+                print(f"Erreurs stderr : {result.stderr.strip()}")
+            if os.path.exists(default_extract_folder):
+                print(f"Extraction pbi-tools réussie dans : {os.path.basename(default_extract_folder)}/")
+            else:
+                print(f"Erreur : Dossier d'extraction par défaut non trouvé après l'exécution.")
+                return None
+        except subprocess.CalledProcessError as e:
+            print(f"Erreur lors de l'extraction de pbi-tools (code {e.returncode}) :")
+            print(f"Sortie : {e.stdout.strip()}")
+            print(f"Erreur : {e.stderr.strip()}")
+            return None
         except Exception as e:
-            print(f"Erreur lors du déplacement des exécutables : {e}. Utilisation des chemins originaux.")
+            print(f"Erreur inattendue lors de l'exécution de pbi-tools extract : {e}")
+            return None
 
-        print("Ouverture de la fenêtre pour sélectionner un fichier Power BI.")
-        root = tk.Tk()
-        root.withdraw()
-        filetypes = [("Power BI Files", "*.pbix *.file"), ("All files", "*.*")]
-        source_powerbi_file = filedialog.askopenfilename(
-            title="Sélectionnez le fichier Power BI (.pbix or .file) pour l'extraction des KPIs et du schéma de données",
-            filetypes=filetypes
-        )
-        root.destroy()
+        datamodelschema_path = find_datamodelschema_file(default_extract_folder)
+        if datamodelschema_path:
+            print(f"Fichier DataModelSchema trouvé directement dans l'extraction Raw.")
+            content = read_text_file(datamodelschema_path)
+            if not content:
+                print(f"Erreur : Impossible de lire DataModelSchema avec les encodages essayés.")
+                return None
+            return content
 
-        if not source_powerbi_file:
-            print("Aucun fichier Power BI sélectionné. Extraction des KPIs et du schéma annulée.")
+        print(f"Aucun fichier DataModelSchema trouvé dans l'extraction Raw. Tentative de compilation en .pbit pour l'extraire.")
+
+        model_folder = os.path.join(default_extract_folder, 'Model')
+        if not os.path.exists(model_folder) or not os.listdir(model_folder):
+            print(f"Avertissement : Aucun dossier 'Model' ou modèle de données trouvé dans l'extraction. Le fichier .pbix peut ne pas contenir de modèle de données à compiler.")
+            return None
+
+        print("Exécution de pbi-tools.core compile pour générer un fichier .pbit.")
+        output_pbit_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(source_file_path))[0] + '.pbit')
+        try:
+            cmd = [pbi_tools_core_path, "compile", default_extract_folder, output_pbit_path, "PBIT", "True"]
+            with measure_stage("pbi_tools", child_processes=True, target="compile"):
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True, creationflags=SUBPROCESS_CREATION_FLAGS)
+            if result.stderr:
+                print(f"Erreurs stderr : {result.stderr.strip()}")
+            print(f"Compilation réussie en {os.path.basename(output_pbit_path)}.")
+        except subprocess.CalledProcessError as e:
+            print(f"Erreur lors de l'exécution de pbi-tools.core compile (code {e.returncode}) :")
+            print(f"Sortie : {e.stdout.strip()}")
+            print(f"Erreur : {e.stderr.strip()}")
+            return None
+        except Exception as e:
+            print(f"Erreur inattendue lors de l'exécution de pbi-tools.core compile : {e}")
+            return None
+
+        if not os.path.exists(output_pbit_path):
+            print(f"Erreur : Le fichier .pbit n'a pas été créé à l'emplacement : {output_pbit_path}")
+            return None
+
+        print("Extraction de DataModelSchema depuis le fichier .pbit généré.")
+        try:
+            with zipfile.ZipFile(output_pbit_path, 'r') as zip_ref:
+                if 'DataModelSchema' not in zip_ref.namelist():
+                    print(f"Erreur : Fichier DataModelSchema non trouvé dans l'archive .pbit.")
+                    return None
+                content = decode_text_bytes(zip_ref.read('DataModelSchema'))
+        except zipfile.BadZipFile:
+            print(f"Erreur : Le fichier .pbit '{os.path.basename(output_pbit_path)}' n'est pas une archive ZIP valide.")
+            return None
+        except Exception as e:
+            print(f"Erreur lors de l'extraction de l'archive .pbit : {e}")
+            return None
+
+        if not content:
+            print(f"Erreur : Impossible de lire DataModelSchema avec les encodages essayés.")
+            return None
+        return content
+
+    finally:
+        if os.path.exists(default_extract_folder):
+            print(f"Nettoyage du dossier d'extraction : {os.path.basename(default_extract_folder)}")
+            shutil.rmtree(default_extract_folder, ignore_errors=True)
+
+        if temp_dir and os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+def load_datamodelschema_from_archive(source_file_path, pbi_tools_path, pbi_tools_core_path, use_cache=True, cache_dir=None, cache_max_bytes=None):
+    """
+    Obtient le DataModelSchema d'une archive Power BI : lecture directe de l'entrée 'DataModelSchema'
+    si elle existe (modèles .pbit), sinon relecture depuis le cache ou exécution de pbi-tools.
+    Retourne le tuple (modèle chargé, texte JSON d'origine), ou (None, None) en cas d'échec.
+    """
+    content = None
+    data = None
+    from_cache = False
+    cache_key = None
+    if detect_datamodel_member(source_file_path) == 'DataModelSchema':
+        content = read_datamodelschema_from_zip(source_file_path)
+        if content is None:
             return None, None
+        print(f"DataModelSchema lu directement dans l'archive (pbi-tools non exécuté).")
+    else:
+        if use_cache and cache_dir:
+            cache_key = compute_datamodel_cache_key(source_file_path)
+            content = load_datamodelschema_from_cache(cache_key, cache_dir)
+            from_cache = content is not None
 
-        print(f"Fichier Power BI sélectionné : {os.path.basename(source_powerbi_file)}.")
+        if from_cache:
+            try:
+                with measure_stage("model_parse"):
+                    data = parse_json(content)
+                print(f"Modèle de données inchangé : DataModelSchema relu depuis le cache (pbi-tools non exécuté).")
+            except json.JSONDecodeError:
+                print("Avertissement : Entrée de cache DataModelSchema corrompue, nouvelle extraction avec pbi-tools.")
+                remove_datamodelschema_from_cache(cache_key, cache_dir)
+                from_cache = False
 
-        print("Extraction du fichier Layout.json à partir du fichier Power BI.")
-        extracted_layout_file = extract_layout_json_from_pbix_or_file(source_powerbi_file, output_directory)
-        print("Extraction du fichier DataModelSchema.json à partir du fichier Power BI.")
-        extracted_datamodelschema_file = extract_datamodelschema_from_pbix(
-            source_file_path=source_powerbi_file,
-            output_dir=output_directory,
-            pbi_tools_path=pbi_tools_path,
-            pbi_tools_core_path=pbi_tools_core_path
-        )
+        if not from_cache:
+            content = run_pbi_tools_datamodelschema_extraction(source_file_path, pbi_tools_path, pbi_tools_core_path)
+            if content is None:
+                return None, None
 
-        extracted_datamodelschema_file_path = extracted_datamodelschema_file
+    if data is None:
+        try:
+            with measure_stage("model_parse"):
+                data = parse_json(content)
+        except json.JSONDecodeError as e:
+            print(f"Erreur : Le contenu de DataModelSchema n'est pas un JSON valide : {e}")
+            return None, None
 
-        if extracted_layout_file and os.path.exists(extracted_layout_file):
-            df_kpis = extract_all_kpis_from_powerbi_report(extracted_layout_file)
-            if df_kpis is not None and not df_kpis.empty:
-                return df_kpis, extracted_datamodelschema_file_path
-            else:
-                return None, extracted_datamodelschema_file_path
+    if not from_cache:
+        store_datamodelschema_in_cache(cache_key, content, cache_dir, cache_max_bytes)
+    return data, content
+
+def extract_datamodelschema_from_pbix(source_file_path, output_dir, pbi_tools_path, pbi_tools_core_path, use_cache=True, cache_dir=None, cache_max_bytes=None, json_output="pretty"):
+    """
+    Obtient le DataModelSchema d'un fichier Power BI et le retourne sous forme de modèle JSON
+    chargé en mémoire (dictionnaire), ou None en cas d'échec.
+    Si l'archive contient déjà une entrée 'DataModelSchema' (modèles .pbit), elle est lue
+    directement en mémoire ; pbi-tools n'est lancé que pour les .pbix à 'DataModel' compressé.
+    Pour un projet .pbip, le modèle sémantique (TMDL ou model.bim) est chargé depuis ses fichiers.
+    Ce modèle unique alimente directement toutes les étapes suivantes (tables/colonnes,
+    données structurées, fichiers Excel) ; l'écriture de DataModelSchema.json dans le
+    répertoire de sortie n'est plus qu'une sortie annexe, selon json_output (JSON_OUTPUT_MODES).
+    Si le modèle de données n'a pas changé depuis une extraction précédente (même empreinte
+    de l'entrée DataModel), le résultat est relu depuis le cache et pbi-tools n'est pas lancé.
+    """
+    print("Extraction du fichier DataModelSchema.json à partir du fichier Power BI.")
+    try:
+        if not os.path.exists(source_file_path):
+            print(f"Erreur : Le fichier .pbix n'a pas été trouvé dans : {source_file_path}")
+            return None
+
+        content = None
+        if is_powerbi_project(source_file_path):
+            data = load_semantic_model_from_pbip(source_file_path)
+            if data is not None:
+                print(f"Modèle sémantique du projet PBIP chargé directement (pbi-tools non exécuté).")
         else:
-            print("Échec de l'extraction de Layout.json. Extraction des KPIs annulée.")
-            return None, extracted_datamodelschema_file_path
+            data, content = load_datamodelschema_from_archive(source_file_path, pbi_tools_path, pbi_tools_core_path, use_cache,
+                                                              cache_dir or get_datamodelschema_cache_directory(output_dir), cache_max_bytes)
+        if data is None:
+            return None
+
+        try:
+            if save_json_side_output(os.path.join(output_dir, "JSON Files", 'DataModelSchema.json'), data, content, json_output):
+                print(f"Fichier DataModelSchema.json extrait avec succès.")
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde de DataModelSchema.json : {e}")
+
+        return data
 
-    except FileNotFoundError as e:
-        print(f"Erreur : Un fichier exécutable pbi-tools nécessaire n'a pas été trouvé : {e}")
-        print("Veuillez placer 'pbi-tools.exe' et 'pbi-tools.core.exe' dans Downloads, le répertoire du script, ou Data Extractor.")
-        return None, None
     except Exception as e:
-        print(f"Une erreur est survenue lors de l'extraction des KPIs : {e}")
-        return None, None
+        print(f"Erreur générale dans extract_datamodelschema_from_pbix : {e}")
+        return None
+
+def extract_table_from_queryref(query_ref):
+    """Extrait le nom de la table du queryRef."""
+    if not isinstance(query_ref, str):
+        return "N/A"
+
+    match = re.search(r'\(([^.]+)\.|^([^.]+)\.', query_ref)
+    if match:
+        table_name = match.group(1) if match.group(1) else match.group(2)
+        return table_name.strip()
+    return "N/A"
+
+def is_calculated_select_expression(expr):
+    """
+    Indique si l'expression d'un 'select' de dataTransforms désigne une mesure calculée
+    (nœud 'Aggregation' ou 'Measure') plutôt qu'une colonne ou un niveau de hiérarchie.
+    La structure est parcourue directement, sans la convertir en chaîne.
+    """
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if 'Aggregation' in node or 'Measure' in node:
+                return True
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return False
+
+def index_data_transforms_selects(data_transforms_str):
+    """Analyse une seule fois le dataTransforms d'un visuel et indexe ses 'selects' par queryName."""
+    if not isinstance(data_transforms_str, str):
+        return {}
+    try:
+        data_transforms = parse_json(data_transforms_str)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data_transforms, dict):
+        return {}
+    return {select.get('queryName'): select for select in data_transforms.get('selects', []) if isinstance(select, dict)}
+
+def extract_kpis_from_visual_container(visual_container, section_name):
+    """
+    Extrait les KPIs (une ligne par queryRef projeté) d'un conteneur visuel du Layout.
+    Le config et le dataTransforms du visuel ne sont analysés qu'une seule fois.
+    """
+    try:
+        config = parse_json(visual_container.get('config', '{}'))
+    except (json.JSONDecodeError, TypeError):
+        return []
+    single_visual = config.get('singleVisual') if isinstance(config, dict) else None
+    if not isinstance(single_visual, dict) or not single_visual.get('projections'):
+        return []
+
+    visual_type = single_visual.get('visualType')
+    selects_by_query_name = index_data_transforms_selects(visual_container.get('dataTransforms', '{}'))
+
+    kpis = []
+    for role, items in single_visual['projections'].items():
+        for item in items:
+            if 'queryRef' not in item:
+                continue
+            query_ref = item['queryRef']
+            alias = ""
+            is_calculated = False
+            select = selects_by_query_name.get(query_ref)
+            if select is not None:
+                alias = select.get('displayName', "")
+                if 'expr' in select:
+                    is_calculated = is_calculated_select_expression(select['expr'])
+            kpis.append({
+                "Nom de Base": query_ref,
+                "Alias Power BI": alias,
+                "Formule DAX": query_ref,
+                "Type Visuel": visual_type,
+                "Type Mesure": "Mesure Calculée" if is_calculated else "Mesure non Calculée",
+                "Source Table": extract_table_from_queryref(query_ref),
+                "Source": f"Visuel ({section_name})",
+            })
+    return kpis
+
+# Branches du Layout pouvant contenir des définitions de mesures (mesures de rapport).
+# Elles existent au premier niveau du document ou dans sa chaîne 'config'.
+LAYOUT_MEASURE_BRANCHES = ('modelExtensions',)
+
+def iter_measures_in_json(data):
+    """
+    Parcourt une structure JSON avec une pile explicite (sans récursion) et produit,
+    au fil de l'eau et dans l'ordre du document, chaque définition trouvée sous une clé 'measures'.
+    """
+    stack = [iter(((None, data),))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+        key, value = entry
+        if key == 'measures' and isinstance(value, list):
+            for measure_def in value:
+                if isinstance(measure_def, dict):
+                    yield measure_def
+        elif isinstance(value, dict):
+            stack.append(iter(value.items()))
+        elif isinstance(value, list):
+            stack.append(((None, item) for item in value))
+
+def iter_layout_measure_definitions(layout_data):
+    """
+    Produit les définitions de mesures d'un Layout en ne parcourant que les branches qui peuvent
+    en contenir (LAYOUT_MEASURE_BRANCHES), au premier niveau et dans la chaîne 'config' décodée.
+    Les pages et visuels ('sections'), de loin la plus grosse partie du document, sont ignorés.
+    """
+    if not isinstance(layout_data, dict):
+        return
+    containers = [layout_data]
+    config_str = layout_data.get('config')
+    if isinstance(config_str, str):
+        try:
+            report_config = parse_json(config_str)
+        except json.JSONDecodeError:
+            report_config = None
+        if isinstance(report_config, dict):
+            containers.append(report_config)
+
+    for container in containers:
+        for branch in LAYOUT_MEASURE_BRANCHES:
+            if branch in container:
+                yield from iter_measures_in_json(container[branch])
+
+def build_model_kpi(measure_def):
+    """Construit la ligne KPI correspondant à une mesure définie dans le modèle (Layout)."""
+    name = measure_def.get('name', 'N/A')
+    properties = measure_def.get('properties')
+    display_name = properties.get('dataViewDisplayName', name) if isinstance(properties, dict) else name
+    return {
+        "Nom de Base": name,
+        "Alias Power BI": display_name,
+        "Formule DAX": measure_def.get('expression', 'N/A'),
+        "Type Visuel": "N/A",
+        "Type Mesure": "Mesure Calculée",
+        "Source Table": "N/A (Modèle)",
+        "Source": "Modèle (potentiel)",
+    }
+
+def merge_model_measures_into_visual_kpis(visual_kpis, model_kpis):
+    """
+    Fusionne les mesures du modèle avec les KPIs des visuels à l'aide d'un index sur 'Nom de Base'
+    (temps linéaire). Chaque occurrence visuelle d'une mesure est enrichie de la source
+    'Modèle (potentiel)' et de sa formule DAX ; les mesures absentes des visuels sont ajoutées
+    une seule fois, même si elles sont définies plusieurs fois dans le Layout.
+    """
+    visual_kpis_by_name = collections.defaultdict(list)
+    for visual_kpi in visual_kpis:
+        visual_kpis_by_name[visual_kpi['Nom de Base']].append(visual_kpi)
+
+    final_kpis_list = list(visual_kpis)
+    merged_names = set()
+    for model_kpi in model_kpis:
+        name = model_kpi['Nom de Base']
+        if name in merged_names:
+            continue
+        merged_names.add(name)
+
+        matching_visual_kpis = visual_kpis_by_name.get(name)
+        if not matching_visual_kpis:
+            final_kpis_list.append(model_kpi)
+            continue
+        for visual_kpi in matching_visual_kpis:
+            visual_kpi['Source'] += " et Modèle (potentiel)"
+            if model_kpi['Formule DAX'] != 'N/A' and visual_kpi['Formule DAX'] == visual_kpi['Nom de Base']:
+                visual_kpi['Formule DAX'] = model_kpi['Formule DAX']
+    return final_kpis_list
+
+def extract_kpis_from_pbir_visual(visual_document, section_name):
+    """
+    Extrait les KPIs (une ligne par projection) d'un fichier visual.json au format PBIR.
+    Chaque projection porte directement son expression ('field') et son éventuel nom affiché.
+    Les clés présentes mais nulles ("query": null, "projections": null...) sont traitées comme absentes.
+    """
+    visual = visual_document.get('visual') if isinstance(visual_document, dict) else None
+    if not isinstance(visual, dict):
+        return []
+    visual_type = visual.get('visualType')
+    query = visual.get('query') or {}
+    query_state = (query.get('queryState') or {}) if isinstance(query, dict) else None
+    if not isinstance(query_state, dict):
+        return []
+
+    kpis = []
+    for role, bucket in query_state.items():
+        if not isinstance(bucket, dict):
+            continue
+        projections = bucket.get('projections') or []
+        if not isinstance(projections, list):
+            continue
+        for projection in projections:
+            query_ref = projection.get('queryRef') if isinstance(projection, dict) else None
+            if not query_ref:
+                continue
+            is_calculated = is_calculated_select_expression(projection.get('field'))
+            kpis.append({
+                "Nom de Base": query_ref,
+                "Alias Power BI": projection.get('displayName') or projection.get('nativeQueryRef') or "",
+                "Formule DAX": query_ref,
+                "Type Visuel": visual_type,
+                "Type Mesure": "Mesure Calculée" if is_calculated else "Mesure non Calculée",
+                "Source Table": extract_table_from_queryref(query_ref),
+                "Source": f"Visuel ({section_name})",
+            })
+    return kpis
+
+def read_json_document(file_path):
+    """Lit un fichier JSON (UTF-8, avec ou sans BOM). Retourne None si le fichier est illisible."""
+    try:
+        with open(file_path, 'r', encoding='utf-8-sig') as f:
+            return parse_json(f.read())
+    except (OSError, ValueError) as e:
+        print(f"Avertissement : Fichier JSON ignoré '{file_path}' : {e}")
+        return None
+
+def list_pbir_page_dirs(definition_dir):
+    """Liste les dossiers de pages d'un rapport PBIR dans l'ordre du rapport (pages.json), les autres ensuite."""
+    pages_dir = os.path.join(definition_dir, "pages")
+    page_names = sorted(name for name in os.listdir(pages_dir) if os.path.isdir(os.path.join(pages_dir, name)))
+    pages_metadata = read_json_document(os.path.join(pages_dir, "pages.json")) if os.path.exists(os.path.join(pages_dir, "pages.json")) else None
+    page_order = (pages_metadata.get("pageOrder") or []) if isinstance(pages_metadata, dict) else []
+    positions = {name: position for position, name in enumerate(page_order)}
+    page_names.sort(key=lambda name: positions.get(name, len(positions)))
+    return [os.path.join(pages_dir, name) for name in page_names]
+
+def extract_kpis_from_pbir_definition(definition_dir):
+    """
+    Extrait la liste des KPIs d'un rapport au format PBIR (dossier 'definition').
+    Les fichiers page.json et visual.json, un par page et par visuel, sont lus et analysés en parallèle
+    (pool de threads) puis traités par la même logique que le Layout : KPIs des visuels, puis fusion
+    avec les mesures de rapport définies dans reportExtensions.json.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    page_dirs = list_pbir_page_dirs(definition_dir)
+    page_files = [os.path.join(page_dir, "page.json") for page_dir in page_dirs]
+    visual_files = []
+    for page_index, page_dir in enumerate(page_dirs):
+        for visual_file in sorted(glob.glob(os.path.join(page_dir, "visuals", "*", "visual.json"))):
+            visual_files.append((page_index, visual_file))
+
+    with ThreadPoolExecutor(max_workers=min(8, len(page_files) + len(visual_files) or 1)) as executor:
+        page_documents = list(executor.map(read_json_document, page_files))
+        visual_documents = list(executor.map(read_json_document, [visual_file for _, visual_file in visual_files]))
+
+    section_names = []
+    for page_index, page_document in enumerate(page_documents):
+        display_name = page_document.get('displayName') if isinstance(page_document, dict) else None
+        section_names.append(display_name or f'Section {page_index + 1}')
+
+    all_kpis = []
+    for (page_index, _), visual_document in zip(visual_files, visual_documents):
+        all_kpis.extend(extract_kpis_from_pbir_visual(visual_document, section_names[page_index]))
+
+    report_extensions_path = os.path.join(definition_dir, "reportExtensions.json")
+    report_extensions = read_json_document(report_extensions_path) if os.path.exists(report_extensions_path) else None
+    model_kpis = (build_model_kpi(measure_def) for measure_def in iter_measures_in_json(report_extensions or {}))
+    return merge_model_measures_into_visual_kpis(all_kpis, model_kpis)
+
+def read_layout_json_file(json_file_path):
+    """
+    Lit et analyse le fichier Layout.json (lecture unique, encodage détecté d'après les premiers octets).
+    Retourne les données, ou None en cas d'échec.
+    """
+    try:
+        content = read_text_file(json_file_path, from_json_start=True)
+        if content is None:
+            return None
+        return parse_json(content)
+    except json.JSONDecodeError as e:
+        print(f"Erreur de décodage JSON : {e}")
+        return None
+    except Exception as e:
+        print(f"Erreur lors de la lecture du fichier : {e}")
+        return None
+
+def extract_kpis_from_layout(data):
+    """Extrait la liste des KPIs d'un Layout (format historique : sections et visualContainers)."""
+    all_kpis = []
+    sections = data.get('sections', [])
+    for section_index, section in enumerate(sections):
+        section_name = section.get('displayName', f'Section {section_index + 1}')
+        for visual_container in section.get('visualContainers', []):
+            all_kpis.extend(extract_kpis_from_visual_container(visual_container, section_name))
+
+    model_kpis = (build_model_kpi(measure_def) for measure_def in iter_layout_measure_definitions(data))
+    return merge_model_measures_into_visual_kpis(all_kpis, model_kpis)
+
+# --- Lecture en flux du Layout (rapports volumineux) ---
+# Le Layout est lu et décodé par morceaux : seul le conteneur visuel en cours d'analyse est
+# désérialisé, au lieu du texte complet du document et de son arbre JSON.
+
+# Nombre de caractères lus à chaque remplissage du tampon de lecture
+LAYOUT_STREAM_CHUNK_SIZE = 1024 * 1024
+
+JSON_STREAM_DECODER = json.JSONDecoder()
+JSON_WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+JSON_NUMBER_CHARS_PATTERN = re.compile(r'[0-9eE.+-]*')
+
+@contextlib.contextmanager
+def open_layout_text_stream(source_file_path):
+    """
+    Ouvre le Layout en flux texte : entrée 'Layout' d'une archive Power BI (décompressée au fil
+    de la lecture), 'report.json' d'un projet PBIP ou fichier Layout.json. L'encodage est détecté
+    sur les premiers octets (detect_text_encoding) et le BOM éventuel est sauté.
+    Lève FileNotFoundError si le Layout est introuvable.
+    """
+    with contextlib.ExitStack() as stack:
+        if is_powerbi_project(source_file_path):
+            report_dir, _ = resolve_pbip_artifacts(source_file_path)
+            layout_path = os.path.join(report_dir, "report.json") if report_dir else None
+            if not layout_path or not os.path.exists(layout_path):
+                raise FileNotFoundError(f"Le fichier 'report.json' du projet '{os.path.basename(source_file_path)}' est introuvable.")
+            byte_stream = stack.enter_context(open(layout_path, 'rb'))
+        elif zipfile.is_zipfile(source_file_path):
+            zip_ref = stack.enter_context(zipfile.ZipFile(source_file_path, 'r'))
+            layout_member = find_zip_member(zip_ref, 'Layout')
+            if not layout_member:
+                raise FileNotFoundError("Le fichier 'Layout' n'a pas été trouvé dans l'archive ou ses sous-dossiers.")
+            byte_stream = stack.enter_context(zip_ref.open(layout_member))
+        else:
+            byte_stream = stack.enter_context(open(source_file_path, 'rb'))
+
+        encoding, byte_order_mark_length = detect_text_encoding(byte_stream.peek(4)[:4])
+        byte_stream.read(byte_order_mark_length)
+        yield stack.enter_context(io.TextIOWrapper(byte_stream, encoding=encoding))
+
+def new_json_stream_reader(text_stream, chunk_size=LAYOUT_STREAM_CHUNK_SIZE):
+    """Crée l'état de lecture d'un document JSON en flux : tampon courant, position, fin de flux."""
+    return {"stream": text_stream, "buffer": "", "pos": 0, "eof": False, "chunk_size": chunk_size}
+
+def fill_json_stream_buffer(reader, min_chars=0):
+    """
+    Ajoute au tampon le morceau suivant du flux (au moins min_chars caractères si possible),
+    après avoir retiré la partie déjà consommée. Retourne False en fin de flux.
+    """
+    if reader["eof"]:
+        return False
+    chunk = reader["stream"].read(max(reader["chunk_size"], min_chars))
+    if not chunk:
+        reader["eof"] = True
+        return False
+    reader["buffer"] = reader["buffer"][reader["pos"]:] + chunk
+    reader["pos"] = 0
+    return True
+
+def peek_json_stream_char(reader):
+    """Saute les blancs et retourne le prochain caractère significatif sans le consommer ('' en fin de flux)."""
+    while True:
+        reader["pos"] = JSON_WHITESPACE_PATTERN.match(reader["buffer"], reader["pos"]).end()
+        if reader["pos"] < len(reader["buffer"]):
+            return reader["buffer"][reader["pos"]]
+        if not fill_json_stream_buffer(reader):
+            return ''
+
+def consume_json_stream_char(reader, expected_chars):
+    """Consomme le prochain caractère significatif, qui doit figurer dans expected_chars, et le retourne."""
+    char = peek_json_stream_char(reader)
+    if not char or char not in expected_chars:
+        raise json.JSONDecodeError(f"Caractère attendu parmi {expected_chars!r}", reader["buffer"], reader["pos"])
+    reader["pos"] += 1
+    return char
+
+def read_json_stream_value(reader):
+    """
+    Décode la valeur JSON suivante du flux (json.JSONDecoder.raw_decode) en complétant le tampon
+    jusqu'à ce qu'elle y soit entière ; le tampon double au besoin pour les grosses valeurs.
+    """
+    peek_json_stream_char(reader)
+    while True:
+        try:
+            value, end = JSON_STREAM_DECODER.raw_decode(reader["buffer"], reader["pos"])
+        except json.JSONDecodeError:
+            if not fill_json_stream_buffer(reader, len(reader["buffer"]) - reader["pos"]):
+                raise
+            continue
+        # Un nombre coupé par la fin du tampon ('12' pour '125', '1500' pour '1500.5') se poursuit dans le morceau suivant
+        number_end = JSON_NUMBER_CHARS_PATTERN.match(reader["buffer"], end).end() if isinstance(value, (int, float)) else end
+        if number_end < len(reader["buffer"]) or not fill_json_stream_buffer(reader):
+            reader["pos"] = end
+            return value
+
+def iter_json_stream_object_keys(reader):
+    """
+    Parcourt les membres de l'objet JSON qui commence dans le flux et produit chacune de ses clés ;
+    l'appelant consomme la valeur associée (read_json_stream_value ou parcours imbriqué) avant de reprendre.
+    """
+    consume_json_stream_char(reader, '{')
+    if peek_json_stream_char(reader) == '}':
+        reader["pos"] += 1
+        return
+    while True:
+        key = read_json_stream_value(reader)
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Nom de propriété attendu", reader["buffer"], reader["pos"])
+        consume_json_stream_char(reader, ':')
+        yield key
+        if consume_json_stream_char(reader, ',}') == '}':
+            return
+
+def iter_json_stream_array_items(reader):
+    """
+    Parcourt les éléments du tableau JSON qui commence dans le flux et produit leur index ;
+    l'appelant consomme chaque élément avant de reprendre.
+    """
+    consume_json_stream_char(reader, '[')
+    if peek_json_stream_char(reader) == ']':
+        reader["pos"] += 1
+        return
+    item_index = 0
+    while True:
+        yield item_index
+        item_index += 1
+        if consume_json_stream_char(reader, ',]') == ']':
+            return
+
+def iter_layout_stream_events(text_stream, chunk_size=LAYOUT_STREAM_CHUNK_SIZE):
+    """
+    Parcourt un Layout en flux et produit des événements (type, index de page, objet, conteneur visuel) :
+    ('visual', i, page, conteneur) pour chaque conteneur visuel, ('section', i, page, None) à la fin
+    de chaque page, puis ('document', None, racine, None). 'page' contient les propriétés de la page
+    lues jusque-là (sans ses visualContainers) et 'racine' celles du premier niveau hors 'sections'.
+    """
+    reader = new_json_stream_reader(text_stream, chunk_size)
+    # Comme avec from_json_start, tout ce qui précède la première '{' est ignoré
+    while reader["buffer"].find('{', reader["pos"]) == -1:
+        reader["pos"] = len(reader["buffer"])
+        if not fill_json_stream_buffer(reader):
+            raise json.JSONDecodeError("Aucun objet JSON trouvé", reader["buffer"], reader["pos"])
+    reader["pos"] = reader["buffer"].find('{', reader["pos"])
+
+    document = {}
+    for key in iter_json_stream_object_keys(reader):
+        if key != 'sections' or peek_json_stream_char(reader) != '[':
+            document[key] = read_json_stream_value(reader)
+            continue
+        for section_index in iter_json_stream_array_items(reader):
+            if peek_json_stream_char(reader) != '{':
+                read_json_stream_value(reader)
+                continue
+            section = {}
+            for section_key in iter_json_stream_object_keys(reader):
+                if section_key != 'visualContainers' or peek_json_stream_char(reader) != '[':
+                    section[section_key] = read_json_stream_value(reader)
+                    continue
+                for _ in iter_json_stream_array_items(reader):
+                    yield 'visual', section_index, section, read_json_stream_value(reader)
+            yield 'section', section_index, section, None
+    yield 'document', None, document, None
+
+def iter_kpis_from_layout_stream(text_stream, chunk_size=LAYOUT_STREAM_CHUNK_SIZE):
+    """
+    Équivalent en flux de extract_kpis_from_layout : produit les mêmes lignes KPI, dans le même ordre,
+    en ne gardant qu'un conteneur visuel désérialisé à la fois. Les lignes des visuels sont conservées
+    jusqu'à la fin du document, car les mesures du modèle qui les complètent ('config',
+    'modelExtensions') sont en général écrites après les pages.
+    """
+    visual_kpis = []
+    pending_section_kpis = []
+    for event, section_index, container, visual_container in iter_layout_stream_events(text_stream, chunk_size):
+        if event == 'visual':
+            section_name = container.get('displayName', f'Section {section_index + 1}')
+            kpis = extract_kpis_from_visual_container(visual_container, section_name)
+            # Tant que le nom de la page n'a pas été lu, ses lignes attendent la fin de la page
+            if pending_section_kpis or 'displayName' not in container:
+                pending_section_kpis.extend(kpis)
+            else:
+                visual_kpis.extend(kpis)
+        elif event == 'section':
+            section_name = container.get('displayName', f'Section {section_index + 1}')
+            for kpi in pending_section_kpis:
+                kpi["Source"] = f"Visuel ({section_name})"
+            visual_kpis.extend(pending_section_kpis)
+            pending_section_kpis = []
+        else:
+            model_kpis = (build_model_kpi(measure_def) for measure_def in iter_layout_measure_definitions(container))
+            yield from merge_model_measures_into_visual_kpis(visual_kpis, model_kpis)
+
+def save_layout_stream_side_output(source_file_path, output_dir, json_output="pretty"):
+    """
+    Étape Layout en lecture en flux : écrit la copie 'JSON Files/Layout.json' par morceaux, sans charger
+    le document. Seuls les modes qui recopient le texte d'origine ('raw', 'gzip') sont possibles :
+    'pretty' et 'compact', qui exigent l'arbre complet, sont écrits comme 'raw'.
+    Retourne le chemin du fichier source, relu en flux par l'étape des KPIs, ou None en cas d'échec.
+    """
+    mode = json_output if json_output in ("raw", "gzip", "none") else "raw"
+    if mode != json_output:
+        print(f"Lecture en flux : la copie 'Layout.json' est écrite telle quelle (mode '{json_output}' indisponible).")
+    output_path = os.path.join(output_dir, "JSON Files", 'Layout.json')
+
+    try:
+        with open_layout_text_stream(source_file_path) as text_stream:
+            first_chunk = text_stream.read(LAYOUT_STREAM_CHUNK_SIZE)
+            json_start = first_chunk.find('{')
+            if json_start == -1:
+                print(f"Erreur : Le contenu du fichier 'Layout' n'est pas un JSON valide.")
+                return None
+            if mode == "none":
+                return source_file_path
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            if mode == "gzip":
+                output_file = gzip.open(f"{output_path}.gz", 'wt', encoding='utf-8', compresslevel=6)
+            else:
+                output_file = open(output_path, 'w', encoding='utf-8')
+            with output_file:
+                output_file.write(first_chunk[json_start:])
+                shutil.copyfileobj(text_stream, output_file, LAYOUT_STREAM_CHUNK_SIZE)
+    except (OSError, UnicodeDecodeError, zipfile.BadZipFile) as e:
+        print(f"Erreur lors de la lecture en flux du fichier 'Layout' : {e}")
+        return None
+
+    print(f"Fichier 'Layout.json' extrait avec succès.")
+    return source_file_path
+
+def extract_all_kpis_from_powerbi_report(json_file_path, stream=False):
+    """
+    Extrait les KPIs (mesures calculées) des données JSON de Layout : données déjà chargées en mémoire
+    (dictionnaire retourné par l'étape Layout), fichier Layout.json, ou dossier 'definition'
+    d'un rapport au format PBIR. Avec stream, le Layout du fichier indiqué (Layout.json, archive
+    Power BI ou projet .pbip) est lu en flux, un conteneur visuel à la fois.
+    """
+    import pandas as pd
+
+    with measure_stage("kpi_parse") as record:
+        if isinstance(json_file_path, dict):
+            print("Analyse du Layout pour extraire les KPIs.")
+            final_kpis_list = extract_kpis_from_layout(json_file_path)
+        elif os.path.isdir(json_file_path):
+            print("Analyse des pages et visuels du rapport PBIR pour extraire les KPIs.")
+            final_kpis_list = extract_kpis_from_pbir_definition(json_file_path)
+        elif stream:
+            print("Analyse en flux du Layout pour extraire les KPIs.")
+            try:
+                with open_layout_text_stream(json_file_path) as text_stream:
+                    final_kpis_list = list(iter_kpis_from_layout_stream(text_stream))
+            except json.JSONDecodeError as e:
+                print(f"Erreur de décodage JSON : {e}")
+                return None
+            except (OSError, UnicodeDecodeError, zipfile.BadZipFile) as e:
+                print(f"Erreur lors de la lecture en flux du fichier 'Layout' : {e}")
+                return None
+        else:
+            print("Analyse du fichier Layout.json pour extraire les KPIs.")
+            data = read_layout_json_file(json_file_path)
+            if data is None:
+                return None
+            final_kpis_list = extract_kpis_from_layout(data)
+        record["rows"] = len(final_kpis_list)
+
+    kpis_df = pd.DataFrame(final_kpis_list)
+    if 'Type Mesure' in kpis_df.columns:
+        kpis_df = kpis_df[kpis_df['Type Mesure'] == 'Mesure Calculée'].copy()
+        kpis_df = kpis_df.drop('Type Mesure', axis=1)
+
+    cols = ["Nom de Base", "Alias Power BI", "Source Table", "Formule DAX", "Type Visuel", "Source"]
+    cols = [col for col in cols if col in kpis_df.columns]
+    kpis_df = kpis_df[cols]
+    if kpis_df is not None and not kpis_df.empty:
+        print("Extraction des KPIs terminée avec succès.")
+    else:
+        print("Aucun KPI pertinent (Mesure Calculée) n'a été extrait.")
+    return kpis_df
 
 # --- Fonction pour fusionner les DataFrames dans Extracted_Data.xlsx ---
 
+# Couleurs de remplissage des lignes de l'onglet 'KPIs', attribuées par valeur de 'Source'
+KPI_SOURCE_COLORS = [
+    'D9E1F2', 'E2EFDA', 'FFF2CC', 'FCE4D6',
+    'E7E6E6', 'FBE4D5', 'C6E0B4', 'BDD7EE'
+]
+
+def is_blank_cell_value(value):
+    """Indique si une valeur est ignorée pour la largeur de colonne (valeur fausse : None, "", 0, False...)."""
+    try:
+        return not value
+    except (TypeError, ValueError):
+        return True
+
+def compute_merged_sheet_widths(df):
+    """
+    Calcule en une passe la largeur de chaque colonne d'un onglet de 'Extracted_Data.xlsx' :
+    plus longue valeur (en-tête compris), +4, x1.1, entre 10 et 100. Comme lors de l'ajustement
+    cellule par cellule, les valeurs fausses (None, "", 0, False) ne comptent pas.
+    """
+    from openpyxl.utils import get_column_letter
+
+    widths = {}
+    for col_idx, col_name in enumerate(df.columns, 1):
+        series = df.iloc[:, col_idx - 1]
+        max_length = len(str(col_name)) if col_name else 0
+        if not series.empty:
+            value_lengths = series.astype(str).str.len().mask(series.map(is_blank_cell_value).astype(bool), 0)
+            max_length = max(max_length, int(value_lengths.max()))
+        adjusted_width = min((max_length + 4) * 1.1, 100)
+        widths[get_column_letter(col_idx)] = max(adjusted_width, 10)
+    return widths
+
+def append_dataframe_rows(ws, df, row_colors, header_template, data_templates):
+    """
+    Écrit l'en-tête puis toutes les lignes d'un DataFrame en une seule passe (ws.append).
+    row_colors donne la couleur de chaque ligne ; les styles sont copiés depuis des cellules modèles.
+    """
+    from openpyxl.cell import WriteOnlyCell
+
+    def cell_like(template, value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell._style = copy.copy(template._style)
+        return cell
+
+    ws.append([cell_like(header_template, col_name) for col_name in df.columns])
+    for row_values, color in zip(df.to_numpy(dtype=object).tolist(), row_colors):
+        template = data_templates[color]
+        ws.append([cell_like(template, value) for value in row_values])
+
 def merge_excel_files(df_tables, df_kpis, output_directory):
     """
     Fusionne les DataFrames des tables/colonnes et des KPIs dans un fichier Excel unique
     avec des onglets séparés ('Données Granulaires' et 'KPIs').
+    Les couleurs sont résolues par table / source via une table de correspondance catégorielle,
+    les largeurs sont calculées de façon vectorisée et les lignes sont écrites en une seule passe.
     """
     print(f"\n{'='*50}")
     print("Début de la fusion des données dans un fichier Excel unique.")
-    
+
     output_file = os.path.join(output_directory, "Extracted_Data.xlsx")
     try:
-        wb = Workbook()
-        # Style pour l'en-tête (jaune, gras, bordures)
-        header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        header_font = Font(bold=True)
-        thin_border = Border(left=Side(style='thin', color='000000'), 
-                             right=Side(style='thin', color='000000'), 
-                             top=Side(style='thin', color='000000'), 
-                             bottom=Side(style='thin', color='000000'))
-        # Bordure standard pour les cellules de données
-        data_border = Border(left=Side(style='thin', color='000000'), 
-                            right=Side(style='thin', color='000000'), 
-                            top=Side(style='thin', color='000000'), 
-                            bottom=Side(style='thin', color='000000'))
-
-        # Écriture du DataFrame des tables/colonnes
-        if df_tables is not None and not df_tables.empty:
-            print("Écriture des données granulaires dans l'onglet 'Données Granulaires'.")
-            ws_tables = wb.create_sheet("Données Granulaires", 0)
-            # Écrire l'en-tête
-            for col_idx, col_name in enumerate(df_tables.columns, 1):
-                cell = ws_tables.cell(row=1, column=col_idx)
-                cell.value = col_name
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.border = thin_border
-            # Écrire les données avec la couleur basée sur 'Nom de la Table'
-            unique_tables = df_tables['Nom de la Table'].unique()
-            table_colors = {table: get_distinct_color(table) for table in unique_tables}
-            for row_idx, row in df_tables.iterrows():
-                table_name = row['Nom de la Table']
-                fill_color = PatternFill(start_color=table_colors[table_name], end_color=table_colors[table_name], fill_type="solid")
-                for col_idx, value in enumerate(row, 1):
-                    cell = ws_tables.cell(row=row_idx + 2, column=col_idx)
-                    cell.value = value
-                    cell.fill = fill_color
-                    cell.border = data_border
-            # Ajuster la largeur des colonnes
-            for col in ws_tables.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                adjusted_width = min((max_length + 4) * 1.1, 100)
-                ws_tables.column_dimensions[column].width = max(adjusted_width, 10)
-        else:
-            print("Aucune donnée de tables/colonnes à écrire dans l'onglet 'Données Granulaires'.")
-
-        # Écriture du DataFrame des KPIs (corrigé pour éviter les lignes vides)
-        if df_kpis is not None and not df_kpis.empty:
-            print("Écriture des KPIs dans l'onglet 'KPIs'.")
-            ws_kpis = wb.create_sheet("KPIs", 1)
-            # Définir les couleurs pour la colonne 'Source'
-            colors = [
-                'D9E1F2', 'E2EFDA', 'FFF2CC', 'FCE4D6',
-                'E7E6E6', 'FBE4D5', 'C6E0B4', 'BDD7EE'
-            ]
-            if 'Source' in df_kpis.columns:
-                unique_sources = df_kpis['Source'].unique()
-                source_colors = {source: colors[i % len(colors)] for i, source in enumerate(unique_sources)}
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import PatternFill, Border, Side, Font
+
+        with measure_stage("excel_write", target="Extracted_Data.xlsx",
+                           rows=sum(len(df) for df in (df_tables, df_kpis) if df is not None)):
+            # Classeur en écriture seule : largeurs fixées avant les lignes, lignes envoyées au fil de l'eau
+            wb = Workbook(write_only=True)
+            # Style pour l'en-tête (jaune, gras, bordures)
+            header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+            header_font = Font(bold=True)
+            thin_border = Border(left=Side(style='thin', color='000000'),
+                                 right=Side(style='thin', color='000000'),
+                                 top=Side(style='thin', color='000000'),
+                                 bottom=Side(style='thin', color='000000'))
+            # Bordure standard pour les cellules de données
+            data_border = Border(left=Side(style='thin', color='000000'),
+                                right=Side(style='thin', color='000000'),
+                                top=Side(style='thin', color='000000'),
+                                bottom=Side(style='thin', color='000000'))
+
+            def build_template(ws, fill, font=None, border=None):
+                template = WriteOnlyCell(ws)
+                template.fill = fill
+                if font:
+                    template.font = font
+                template.border = border
+                return template
+
+            def build_data_templates(ws, colors):
+                return {
+                    color: build_template(ws, PatternFill(start_color=color, end_color=color, fill_type="solid"), border=data_border)
+                    for color in set(colors)
+                }
+
+            # Écriture du DataFrame des tables/colonnes
+            if df_tables is not None and not df_tables.empty:
+                print("Écriture des données granulaires dans l'onglet 'Données Granulaires'.")
+                ws_tables = wb.create_sheet("Données Granulaires", 0)
+                for column, width in compute_merged_sheet_widths(df_tables).items():
+                    ws_tables.column_dimensions[column].width = width
+                # Couleur basée sur 'Nom de la Table' : une couleur par table distincte
+                unique_tables = df_tables['Nom de la Table'].unique()
+                table_colors = {table: get_distinct_color(table) for table in unique_tables}
+                row_colors = [
+                    table_colors[table] if table in table_colors else get_distinct_color(table)
+                    for table in df_tables['Nom de la Table']
+                ]
+                append_dataframe_rows(
+                    ws_tables, df_tables, row_colors,
+                    build_template(ws_tables, header_fill, header_font, thin_border),
+                    build_data_templates(ws_tables, row_colors)
+                )
             else:
-                source_colors = {}
-                print("Colonne 'Source' non trouvée dans les données KPIs. Utilisation de la couleur par défaut.")
-            # Écrire l'en-tête
-            for col_idx, col_name in enumerate(df_kpis.columns, 1):
-                cell = ws_kpis.cell(row=1, column=col_idx)
-                cell.value = col_name
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.border = thin_border
-            # Écrire les données sans lignes vides
-            for row_idx in range(len(df_kpis)):
-                row_data = df_kpis.iloc[row_idx]
-                source_value = row_data['Source'] if 'Source' in df_kpis.columns else 'Default'
-                fill_color = PatternFill(start_color=source_colors.get(source_value, 'FFFFFF'), 
-                                        end_color=source_colors.get(source_value, 'FFFFFF'), 
-                                        fill_type="solid")
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws_kpis.cell(row=row_idx + 2, column=col_idx)
-                    cell.value = value if pd.notna(value) else ""
-                    cell.fill = fill_color
-                    cell.border = data_border
-            # Ajuster la largeur des colonnes
-            for col in ws_kpis.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                adjusted_width = min((max_length + 4) * 1.1, 100)
-                ws_kpis.column_dimensions[column].width = max(adjusted_width, 10)
-        else:
-            print("Aucune donnée de KPIs à écrire dans l'onglet 'KPIs'.")
+                print("Aucune donnée de tables/colonnes à écrire dans l'onglet 'Données Granulaires'.")
 
-        # Supprimer la feuille par défaut
-        if "Sheet" in wb.sheetnames:
-            wb.remove(wb["Sheet"])
+            # Écriture du DataFrame des KPIs (corrigé pour éviter les lignes vides)
+            if df_kpis is not None and not df_kpis.empty:
+                print("Écriture des KPIs dans l'onglet 'KPIs'.")
+                ws_kpis = wb.create_sheet("KPIs", 1)
+                # Valeurs manquantes écrites comme chaînes vides
+                df_kpis_values = df_kpis.astype(object).where(df_kpis.notna(), "")
+                for column, width in compute_merged_sheet_widths(df_kpis_values).items():
+                    ws_kpis.column_dimensions[column].width = width
+                # Définir les couleurs pour la colonne 'Source'
+                if 'Source' in df_kpis.columns:
+                    # Une couleur par valeur distincte, valeurs manquantes comprises (ordre d'apparition)
+                    unique_sources = df_kpis['Source'].unique()
+                    source_colors = {source: KPI_SOURCE_COLORS[i % len(KPI_SOURCE_COLORS)] for i, source in enumerate(unique_sources)}
+                    row_colors = [source_colors.get(source, 'FFFFFF') for source in df_kpis['Source']]
+                else:
+                    row_colors = ['FFFFFF'] * len(df_kpis)
+                    print("Colonne 'Source' non trouvée dans les données KPIs. Utilisation de la couleur par défaut.")
+                append_dataframe_rows(
+                    ws_kpis, df_kpis_values, row_colors,
+                    build_template(ws_kpis, header_fill, header_font, thin_border),
+                    build_data_templates(ws_kpis, row_colors)
+                )
+            else:
+                print("Aucune donnée de KPIs à écrire dans l'onglet 'KPIs'.")
 
-        # Sauvegarder le fichier fusionné
-        wb.save(output_file)
+            # Sauvegarder le fichier fusionné
+            wb.save(output_file)
         print(f"Fichier Excel 'Extracted_Data.xlsx' généré avec succès.")
         return True
 
+    except ImportError:
+        print("Erreur : Les bibliothèques nécessaires (pandas ou openpyxl) ne sont pas installées.")
+        print("Veuillez les installer en exécutant : pip install pandas openpyxl")
+        return False
     except Exception as e:
         print(f"Erreur lors de la fusion des données dans 'Extracted_Data.xlsx' : {str(e)}")
         if os.path.exists(output_file):
@@ -1273,66 +2711,1073 @@ def merge_excel_files(df_tables, df_kpis, output_directory):
                 print(f"Impossible de supprimer le fichier corrompu '{os.path.basename(output_file)}'.")
         return False
 
-# --- Point d'entrée principal ---
+# --- Sortie en colonnes (Parquet / Arrow IPC), sans mise en forme Excel ---
 
-if __name__ == "__main__":
-    print("Début de l'exécution du script d'extraction de données Power BI.")
-    print(f"Répertoire de sortie configuré : {output_directory}")
-
-    # Nettoyage des fichiers existants pour éviter les confusions
-    data_structure_path = os.path.join(output_directory, "Data_Structure.xlsx")
-    extracted_data_path = os.path.join(output_directory, "Extracted_Data.xlsx")
-    layout_json_path = os.path.join(output_directory, "JSON Files", "Layout.json")
-    datamodelschema_json_path = os.path.join(output_directory, "JSON Files", "DataModelSchema.json")
-
-    if os.path.exists(data_structure_path):
-        os.remove(data_structure_path)
-        print(f"Fichier précédent 'Data_Structure.xlsx' supprimé.")
-    if os.path.exists(extracted_data_path):
-        os.remove(extracted_data_path)
-        print(f"Fichier précédent 'Extracted_Data.xlsx' supprimé.")
-    if os.path.exists(layout_json_path):
-        os.remove(layout_json_path)
-        print(f"Fichier précédent 'Layout.json' supprimé.")
-    if os.path.exists(datamodelschema_json_path):
-        os.remove(datamodelschema_json_path)
-        print(f"Fichier précédent 'DataModelSchema.json' supprimé.")
+# Formats de sortie des données extraites : classeurs Excel mis en forme, ou un fichier par DataFrame
+OUTPUT_FORMATS = ("excel", "parquet", "arrow")
+
+# Dossier et extension des fichiers écrits pour chaque format en colonnes
+COLUMNAR_OUTPUT_DIRECTORIES = {"parquet": "Parquet Files", "arrow": "Arrow Files"}
+COLUMNAR_FILE_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
 
+# Colonnes de noms parents, très répétitives, encodées en dictionnaire (chaque valeur distincte n'est
+# stockée qu'une fois) ; s'y ajoutent toutes les colonnes dont le nom contient 'Parent' ou 'Parente'.
+COLUMNAR_DICTIONARY_COLUMNS = ("Nom de la Table", "Source Table", "Source", "Type Visuel")
+
+# Fichiers des tables/colonnes et des KPIs (équivalents des onglets d'Extracted_Data.xlsx)
+COLUMNAR_EXTRACTED_DATA_NAMES = ("Données Granulaires", "KPIs")
+
+def is_columnar_dictionary_column(column_name):
+    """Indique si une colonne est écrite en dictionnaire (noms d'entités parentes)."""
+    return column_name in COLUMNAR_DICTIONARY_COLUMNS or "Parent" in column_name
+
+def prepare_columnar_dataframe(df):
+    """
+    Prépare un DataFrame pour Arrow : les colonnes de noms parents passent en type 'category'
+    (converti en dictionnaire Arrow) et les colonnes mêlant texte et autres valeurs (listes, nombres)
+    sont converties en texte, valeurs manquantes conservées.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    for column in df.columns:
+        if is_columnar_dictionary_column(column):
+            df[column] = df[column].astype("category")
+        elif df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True).startswith("mixed"):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+def write_columnar_file(df, output_path, output_format):
+    """Écrit un DataFrame en Parquet ou en Arrow IPC (format de fichier Feather v2). Nécessite pyarrow."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(prepare_columnar_dataframe(df), preserve_index=False)
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, output_path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, output_path)
+    return output_path
+
+def write_columnar_files(named_dfs, output_directory, output_format):
+    """
+    Écrit chaque DataFrame de named_dfs (nom -> DataFrame) dans '<Format> Files/<nom>.<extension>'
+    du répertoire de sortie. Retourne le nombre de lignes écrites.
+    """
+    if output_format not in COLUMNAR_OUTPUT_DIRECTORIES:
+        raise ValueError(f"Format en colonnes inconnu : {output_format}. Formats disponibles : {', '.join(COLUMNAR_OUTPUT_DIRECTORIES)}.")
+    columnar_dir = os.path.join(output_directory, COLUMNAR_OUTPUT_DIRECTORIES[output_format])
+    os.makedirs(columnar_dir, exist_ok=True)
+    rows = 0
+    for name, df in named_dfs.items():
+        write_columnar_file(df, os.path.join(columnar_dir, name + COLUMNAR_FILE_EXTENSIONS[output_format]), output_format)
+        rows += len(df)
+    return rows
+
+def run_structured_columnar_extraction(datamodel, output_directory, output_format="parquet"):
+    """
+    Équivalent en colonnes de run_structured_single_sheet_extraction : chaque DataFrame de
+    process_data_model_for_structured_sheet (Tables, Colonnes, Mesures...) est écrit dans son
+    propre fichier, expressions M complètes, sans passer par la mise en forme Excel.
+    """
+    print(f"\n{'='*50}")
+    print(f"Début de l'extraction des données structurées au format {output_format}.")
+
+    if not datamodel:
+        print("Erreur : Aucun modèle DataModelSchema disponible pour l'extraction des données structurées.")
+        return False
+
+    try:
+        with measure_stage("model_flatten") as record:
+            dfs = process_data_model_for_structured_sheet(datamodel, truncate_expressions=False)
+            record["rows"] = sum(len(df) for df in dfs.values())
+
+        with measure_stage("columnar_write", target=output_format, rows=record["rows"]):
+            write_columnar_files(dfs, output_directory, output_format)
+
+        if dfs:
+            print(f"Extraction des données structurées terminée avec succès ({len(dfs)} fichiers {output_format}).")
+            return True
+        else:
+            print("Aucune donnée pertinente à extraire pour les données structurées.")
+            return False
+
+    except ImportError:
+        print("Erreur : Les bibliothèques nécessaires (pandas ou pyarrow) ne sont pas installées.")
+        print("Veuillez les installer en exécutant : pip install pandas pyarrow")
+        return False
+    except Exception as e:
+        print(f"Une erreur est survenue lors de l'extraction des données structurées : {e}")
+        return False
+
+def write_extracted_data_columnar(df_tables, df_kpis, output_directory, output_format="parquet"):
+    """
+    Équivalent en colonnes de merge_excel_files : les tables/colonnes ('Données Granulaires') et les
+    KPIs sont écrits chacun dans leur fichier, sans mise en forme.
+    """
+    print(f"\n{'='*50}")
+    print(f"Début de l'écriture des données granulaires et des KPIs au format {output_format}.")
+
+    named_dfs = {name: df for name, df in zip(COLUMNAR_EXTRACTED_DATA_NAMES, (df_tables, df_kpis)) if df is not None and not df.empty}
+    if not named_dfs:
+        print("Aucune donnée de tables/colonnes ni de KPIs à écrire.")
+        return False
     try:
-        print("Lancement de l'extraction des KPIs à partir du fichier Power BI.")
-        df_kpis, extracted_datamodelschema_path = run_kpi_extraction(output_directory)
+        with measure_stage("columnar_write", target=output_format) as record:
+            record["rows"] = write_columnar_files(named_dfs, output_directory, output_format)
+        print(f"Fichiers {output_format} {', '.join(named_dfs)} générés avec succès.")
+        return True
+    except ImportError:
+        print("Erreur : La bibliothèque nécessaire (pyarrow) n'est pas installée.")
+        print("Veuillez l'installer en exécutant : pip install pyarrow")
+        return False
+    except Exception as e:
+        print(f"Erreur lors de l'écriture des fichiers {output_format} : {e}")
+        return False
 
-        extraction_success = False
-        structured_success = False
-        merge_success = False
+# --- Catalogue SQLite des rapports extraits (recherche entre rapports) ---
+
+CATALOG_SCHEMA_VERSION = 1
+
+# Une ligne par rapport (clé : chemin absolu du fichier) ; les autres tables y sont rattachées par report_id.
+# Les noms sont comparés sans tenir compte de la casse, comme dans Power BI.
+CATALOG_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS reports (
+        report_id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        name TEXT COLLATE NOCASE,
+        content_hash TEXT,
+        extracted_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS tables (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        name TEXT COLLATE NOCASE,
+        is_hidden INTEGER,
+        description TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS columns (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        table_name TEXT COLLATE NOCASE,
+        name TEXT COLLATE NOCASE,
+        data_type TEXT,
+        source_column TEXT COLLATE NOCASE,
+        expression TEXT,
+        is_hidden INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS measures (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        table_name TEXT COLLATE NOCASE,
+        name TEXT COLLATE NOCASE,
+        expression TEXT,
+        format_string TEXT,
+        is_hidden INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS partitions (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        table_name TEXT COLLATE NOCASE,
+        name TEXT COLLATE NOCASE,
+        mode TEXT,
+        source_type TEXT,
+        source TEXT COLLATE NOCASE,
+        source_table TEXT COLLATE NOCASE,
+        expression TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS relationships (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        name TEXT,
+        from_table TEXT COLLATE NOCASE,
+        from_column TEXT COLLATE NOCASE,
+        to_table TEXT COLLATE NOCASE,
+        to_column TEXT COLLATE NOCASE,
+        cross_filtering TEXT,
+        is_active INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS visual_kpis (
+        report_id INTEGER NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+        base_name TEXT COLLATE NOCASE,
+        field_name TEXT COLLATE NOCASE,
+        alias TEXT,
+        dax_formula TEXT,
+        visual_type TEXT,
+        measure_type TEXT,
+        source_table TEXT COLLATE NOCASE,
+        source TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_reports_content_hash ON reports(content_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_tables_name ON tables(name)",
+    "CREATE INDEX IF NOT EXISTS idx_tables_report ON tables(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_columns_name ON columns(name, table_name)",
+    "CREATE INDEX IF NOT EXISTS idx_columns_table ON columns(table_name, name)",
+    "CREATE INDEX IF NOT EXISTS idx_columns_source_column ON columns(source_column)",
+    "CREATE INDEX IF NOT EXISTS idx_columns_report ON columns(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_measures_name ON measures(name, table_name)",
+    "CREATE INDEX IF NOT EXISTS idx_measures_report ON measures(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_partitions_source ON partitions(source)",
+    "CREATE INDEX IF NOT EXISTS idx_partitions_source_table ON partitions(source_table)",
+    "CREATE INDEX IF NOT EXISTS idx_partitions_report ON partitions(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_from ON relationships(from_column, from_table)",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_to ON relationships(to_column, to_table)",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_report ON relationships(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_visual_kpis_field ON visual_kpis(field_name, source_table)",
+    "CREATE INDEX IF NOT EXISTS idx_visual_kpis_base_name ON visual_kpis(base_name)",
+    "CREATE INDEX IF NOT EXISTS idx_visual_kpis_report ON visual_kpis(report_id)",
+)
+
+# Index plein texte des expressions DAX (mesures, colonnes et tables calculées, mesures de rapport)
+# et M (partitions, expressions partagées du modèle)
+CATALOG_FTS_SCHEMA = """CREATE VIRTUAL TABLE IF NOT EXISTS expressions_fts USING fts5(
+    object_name, table_name, expression,
+    report_id UNINDEXED, object_type UNINDEXED, language UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)"""
+
+# Tables et types d'expressions d'un rapport remplacés à chaque mise à jour, selon les données extraites
+# (modèle de données ou Layout) : ceux de l'autre source sont conservés.
+CATALOG_MODEL_TABLES = ("tables", "columns", "measures", "partitions", "relationships")
+CATALOG_MODEL_EXPRESSION_TYPES = ("column", "measure", "partition", "expression")
+CATALOG_LAYOUT_TABLES = ("visual_kpis",)
+CATALOG_LAYOUT_EXPRESSION_TYPES = ("report_measure",)
+
+def compute_report_content_hash(source_file_path):
+    """
+    Calcule l'empreinte du contenu d'un rapport Power BI. Pour une archive (.pbix/.pbit), elle est
+    dérivée du nom, du CRC32 et de la taille de chaque entrée, lus dans le répertoire central sans
+    rien décompresser ; pour un projet .pbip, du contenu des fichiers des dossiers du rapport et du
+    modèle ; sinon, du contenu du fichier.
+    """
+    digest = hashlib.sha256()
+    if zipfile.is_zipfile(source_file_path):
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            for info in sorted(zip_ref.infolist(), key=lambda i: i.filename):
+                digest.update(f"{info.filename}|{info.CRC:08x}|{info.file_size}\n".encode())
+        return digest.hexdigest()
+
+    paths = [source_file_path]
+    if is_powerbi_project(source_file_path):
+        for artifact_dir in resolve_pbip_artifacts(source_file_path):
+            if artifact_dir:
+                for root, dirs, files in os.walk(artifact_dir):
+                    dirs.sort()
+                    paths.extend(os.path.join(root, name) for name in sorted(files))
+    for path in paths:
+        digest.update(f"{os.path.relpath(path, os.path.dirname(source_file_path))}\n".encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def open_catalog(catalog_path):
+    """
+    Ouvre (et crée au besoin) le catalogue SQLite. Le journal WAL et le délai d'attente permettent
+    aux processus du mode batch d'écrire chacun leur rapport dans le même catalogue.
+    Retourne (connexion, index plein texte disponible).
+    """
+    import sqlite3
+
+    os.makedirs(os.path.dirname(os.path.abspath(catalog_path)), exist_ok=True)
+    connection = sqlite3.connect(catalog_path, timeout=60, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    fts_available = True
+    if connection.execute("PRAGMA user_version").fetchone()[0] < CATALOG_SCHEMA_VERSION:
+        connection.execute("BEGIN IMMEDIATE")
+        for statement in CATALOG_SCHEMA:
+            connection.execute(statement)
+        try:
+            connection.execute(CATALOG_FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"Avertissement : Index plein texte (FTS5) indisponible dans ce SQLite ({e}).")
+        connection.execute(f"PRAGMA user_version={CATALOG_SCHEMA_VERSION}")
+        connection.execute("COMMIT")
+    if not connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'expressions_fts'").fetchone():
+        fts_available = False
+    return connection, fts_available
+
+def build_catalog_model_rows(datamodel):
+    """
+    Retourne les lignes du catalogue issues du DataModelSchema : un dictionnaire
+    {table du catalogue: liste de tuples} et la liste des expressions DAX/M à indexer
+    (nom, table, expression, type d'objet, langage).
+    """
+    model_info = datamodel.get("model", {})
+    rows = {name: [] for name in CATALOG_MODEL_TABLES}
+    expressions = []
+
+    for table in model_info.get("tables", []):
+        table_name = table.get("name", "Table sans nom")
+        rows["tables"].append((table_name, int(bool(table.get("isHidden", False))), table.get("description")))
+
+        for column in table.get("columns", []):
+            column_name = column.get("name", "Colonne sans nom")
+            expression = normalize_expression(column["expression"]) if "expression" in column else None
+            rows["columns"].append((table_name, column_name, column.get("dataType"), column.get("sourceColumn"),
+                                    expression, int(bool(column.get("isHidden", False)))))
+            if expression:
+                expressions.append((column_name, table_name, expression, "column", "DAX"))
+
+        for measure in table.get("measures", []):
+            measure_name = measure.get("name", "Mesure sans nom")
+            expression = normalize_expression(measure.get("expression", ""))
+            rows["measures"].append((table_name, measure_name, expression, measure.get("formatString"),
+                                     int(bool(measure.get("isHidden", False)))))
+            if expression:
+                expressions.append((measure_name, table_name, expression, "measure", "DAX"))
+
+        for i, partition in enumerate(table.get("partitions", [])):
+            partition_name = partition.get("name", f"Partition {i+1}")
+            source = partition.get("source", {})
+            source_type = source.get("type")
+            source_data, source_table_name, expression = None, None, None
+            if source.get("expression"):
+                source_data, source_table_name, expression, _ = extract_source_info_from_m_expression(source["expression"], None)
+                expression = normalize_expression(expression)
+                expressions.append((partition_name, table_name, expression, "partition", "DAX" if source_type == "calculated" else "M"))
+            rows["partitions"].append((table_name, partition_name, partition.get("mode"), source_type,
+                                       None if source_data == "N/A" else source_data,
+                                       None if source_table_name == "N/A" else source_table_name, expression))
+
+    for relation in model_info.get("relationships", []):
+        rows["relationships"].append((relation.get("name"), relation.get("fromTable"), relation.get("fromColumn"),
+                                      relation.get("toTable"), relation.get("toColumn"),
+                                      relation.get("crossFilteringBehavior"), int(bool(relation.get("isActive", True)))))
+
+    for shared_expression in model_info.get("expressions", []):
+        if shared_expression.get("expression"):
+            expressions.append((shared_expression.get("name", "Expression sans nom"), None,
+                                normalize_expression(shared_expression["expression"]), "expression", "M"))
+
+    return rows, expressions
+
+def build_catalog_kpi_rows(df_kpis):
+    """Retourne les lignes 'visual_kpis' et les expressions DAX des mesures de rapport issues du DataFrame des KPIs."""
+    rows = []
+    expressions = []
+    indexed_measure_names = set()
+    for kpi in df_kpis.to_dict("records"):
+        base_name = kpi.get("Nom de Base")
+        source_table = kpi.get("Source Table")
+        field_name = base_name
+        if isinstance(base_name, str) and isinstance(source_table, str) and base_name.startswith(source_table + "."):
+            field_name = base_name[len(source_table) + 1:]
+        rows.append((base_name, field_name, kpi.get("Alias Power BI"), kpi.get("Formule DAX"), kpi.get("Type Visuel"),
+                     kpi.get("Type Mesure"), source_table, kpi.get("Source")))
+        # Mesures de rapport, seules ou fusionnées avec les visuels qui les utilisent ('Visuel (...) et Modèle (potentiel)')
+        source = kpi.get("Source")
+        formula = kpi.get("Formule DAX")
+        if (isinstance(source, str) and "Modèle (potentiel)" in source and formula not in (None, "N/A", base_name)
+                and base_name not in indexed_measure_names):
+            indexed_measure_names.add(base_name)
+            expressions.append((base_name, None, normalize_expression(formula), "report_measure", "DAX"))
+    return rows, expressions
+
+def update_report_catalog(catalog_path, source_file_path, datamodel=None, df_kpis=None):
+    """
+    Enregistre un rapport dans le catalogue SQLite (insertion ou mise à jour selon son chemin) :
+    tables, colonnes, mesures, partitions, relations, KPIs des visuels et index plein texte des
+    expressions. Seules les données extraites lors de cette exécution remplacent celles du rapport
+    déjà présentes ; l'empreinte du contenu est mise à jour à chaque fois.
+    """
+    print(f"\n{'='*50}")
+    print(f"Mise à jour du catalogue '{catalog_path}'.")
 
-        if extracted_datamodelschema_path and os.path.exists(extracted_datamodelschema_path):
-            print("Lancement de l'extraction des tables et colonnes visibles.")
-            df_tables = run_tables_columns_extraction(extracted_datamodelschema_path, output_directory)
+    if datamodel is None and df_kpis is None:
+        print("Aucune donnée de modèle ni de KPIs à enregistrer dans le catalogue.")
+        return False
 
-            print("Lancement de l'extraction des données structurées pour une seule feuille.")
-            structured_success = run_structured_single_sheet_extraction(extracted_datamodelschema_path, output_directory)
+    report_path = os.path.abspath(source_file_path)
+    connection = None
+    try:
+        with measure_stage("catalog_write", target="sqlite") as record:
+            content_hash = compute_report_content_hash(source_file_path)
+            replaced_tables, replaced_object_types = [], []
+            rows, expressions = {}, []
+            if datamodel is not None:
+                model_rows, model_expressions = build_catalog_model_rows(datamodel)
+                rows.update(model_rows)
+                expressions.extend(model_expressions)
+                replaced_tables.extend(CATALOG_MODEL_TABLES)
+                replaced_object_types.extend(CATALOG_MODEL_EXPRESSION_TYPES)
+            if df_kpis is not None:
+                rows["visual_kpis"], kpi_expressions = build_catalog_kpi_rows(df_kpis)
+                expressions.extend(kpi_expressions)
+                replaced_tables.extend(CATALOG_LAYOUT_TABLES)
+                replaced_object_types.extend(CATALOG_LAYOUT_EXPRESSION_TYPES)
+
+            connection, fts_available = open_catalog(catalog_path)
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO reports (path, name, content_hash, extracted_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET name = excluded.name, content_hash = excluded.content_hash, "
+                "extracted_at = excluded.extracted_at",
+                (report_path, os.path.splitext(os.path.basename(report_path))[0], content_hash,
+                 datetime.now().isoformat(timespec="seconds")))
+            report_id = connection.execute("SELECT report_id FROM reports WHERE path = ?", (report_path,)).fetchone()[0]
+
+            for table_name in replaced_tables:
+                connection.execute(f"DELETE FROM {table_name} WHERE report_id = ?", (report_id,))
+                table_rows = rows[table_name]
+                if table_rows:
+                    placeholders = ", ".join("?" * (len(table_rows[0]) + 1))
+                    connection.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})",
+                                           [(report_id,) + row for row in table_rows])
+            if fts_available:
+                for object_type in replaced_object_types:
+                    connection.execute("DELETE FROM expressions_fts WHERE report_id = ? AND object_type = ?", (report_id, object_type))
+                connection.executemany(
+                    "INSERT INTO expressions_fts (object_name, table_name, expression, report_id, object_type, language) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(name, table_name, expression, report_id, object_type, language)
+                     for name, table_name, expression, object_type, language in expressions])
+            connection.execute("COMMIT")
+            record["rows"] = sum(len(table_rows) for table_rows in rows.values())
+
+        print(f"Catalogue mis à jour : {record['rows']} lignes et {len(expressions)} expressions pour '{os.path.basename(report_path)}'.")
+        return True
 
-            print("Lancement de la fusion des données dans un fichier Excel unique.")
-            if df_tables is not None or df_kpis is not None:
-                merge_success = merge_excel_files(df_tables, df_kpis, output_directory)
+    except Exception as e:
+        if connection is not None and connection.in_transaction:
+            connection.execute("ROLLBACK")
+        print(f"Erreur lors de la mise à jour du catalogue : {e}")
+        return False
+    finally:
+        if connection is not None:
+            connection.close()
+
+def read_catalog_report_hash(catalog_path, source_file_path):
+    """Retourne l'empreinte du contenu enregistrée dans le catalogue pour ce rapport, ou None s'il n'y figure pas."""
+    import sqlite3
+
+    if not catalog_path or not os.path.exists(catalog_path):
+        return None
+    try:
+        connection = sqlite3.connect(catalog_path, timeout=60)
+        try:
+            row = connection.execute("SELECT content_hash FROM reports WHERE path = ?", (os.path.abspath(source_file_path),)).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def quote_fts_query(term):
+    """Transforme un texte libre en expression FTS5 : les mots sont cherchés tels quels et côte à côte."""
+    return '"' + term.replace('"', '""') + '"'
+
+def search_catalog(catalog_path, term, limit=200):
+    """
+    Recherche dans le catalogue les rapports qui utilisent une table, une colonne, une mesure ou une
+    source de données portant ce nom (sans tenir compte de la casse), ainsi que les expressions DAX/M
+    qui le contiennent (index plein texte). Retourne une liste de dictionnaires
+    (rapport, chemin, type, table, nom, détail).
+    """
+    lookups = (
+        ("Table", "SELECT r.name, r.path, t.name, t.name, NULL FROM tables t JOIN reports r USING (report_id) WHERE t.name = ?"),
+        ("Colonne", "SELECT r.name, r.path, c.table_name, c.name, c.data_type FROM columns c JOIN reports r USING (report_id) WHERE c.name = ?"),
+        ("Colonne source", "SELECT r.name, r.path, c.table_name, c.name, c.source_column FROM columns c JOIN reports r USING (report_id) WHERE c.source_column = ?"),
+        ("Mesure", "SELECT r.name, r.path, m.table_name, m.name, m.expression FROM measures m JOIN reports r USING (report_id) WHERE m.name = ?"),
+        ("Source", "SELECT r.name, r.path, p.table_name, p.name, p.source FROM partitions p JOIN reports r USING (report_id) WHERE p.source = ?"),
+        ("Table source", "SELECT r.name, r.path, p.table_name, p.name, p.source FROM partitions p JOIN reports r USING (report_id) WHERE p.source_table = ?"),
+        ("Relation", "SELECT r.name, r.path, l.from_table, l.from_column, l.to_table || '.' || l.to_column FROM relationships l JOIN reports r USING (report_id) WHERE l.from_column = ? OR l.to_column = ?"),
+        ("KPI visuel", "SELECT r.name, r.path, k.source_table, k.field_name, k.source FROM visual_kpis k JOIN reports r USING (report_id) WHERE k.field_name = ? OR k.base_name = ?"),
+    )
+    connection, fts_available = open_catalog(catalog_path)
+    matches = []
+    try:
+        for object_type, query in lookups:
+            parameters = (term,) * query.count("?")
+            for report_name, report_path, table_name, name, detail in connection.execute(query, parameters):
+                matches.append({"report": report_name, "path": report_path, "type": object_type,
+                                "table": table_name, "name": name, "detail": detail})
+        if fts_available and term.strip():
+            query = ("SELECT r.name, r.path, f.object_type, f.language, f.table_name, f.object_name, "
+                     "snippet(expressions_fts, 2, '[', ']', '…', 12) "
+                     "FROM expressions_fts f JOIN reports r ON r.report_id = f.report_id "
+                     "WHERE expressions_fts MATCH ? ORDER BY rank LIMIT ?")
+            for report_name, report_path, object_type, language, table_name, name, snippet in connection.execute(
+                    query, (f"expression : {quote_fts_query(term)}", limit)):
+                matches.append({"report": report_name, "path": report_path, "type": f"Expression {language} ({object_type})",
+                                "table": table_name, "name": name, "detail": snippet})
+    finally:
+        connection.close()
+    return matches[:limit]
+
+# --- Chaîne d'extraction complète, sans interface graphique ---
+
+POWERBI_FILE_EXTENSIONS = ('.pbix', '.pbit', '.file', POWERBI_PROJECT_EXTENSION)
+
+# Étapes de la chaîne d'extraction, dans l'ordre d'exécution
+PIPELINE_STAGES = ("layout", "kpis", "datamodelschema", "tables_columns", "data_structure", "extracted_data")
+
+# Étapes dont dépend chaque étape (ajoutées automatiquement à une sélection partielle)
+PIPELINE_STAGE_DEPENDENCIES = {
+    "layout": (),
+    "kpis": ("layout",),
+    "datamodelschema": (),
+    "tables_columns": ("datamodelschema",),
+    "data_structure": ("datamodelschema",),
+    "extracted_data": ("tables_columns", "kpis"),
+}
+
+# Fichiers d'une exécution précédente supprimés avant une nouvelle extraction
+PREVIOUS_OUTPUT_FILES = (
+    "Data_Structure.xlsx",
+    "Extracted_Data.xlsx",
+    os.path.join("JSON Files", "Layout.json"),
+    os.path.join("JSON Files", "Layout.json.gz"),
+    os.path.join("JSON Files", "DataModelSchema.json"),
+    os.path.join("JSON Files", "DataModelSchema.json.gz"),
+)
+
+# Dossier de l'état de l'extraction incrémentale et des DataFrames intermédiaires (voir find_reusable_stages)
+INCREMENTAL_DIRECTORY = "Incremental Files"
+
+# Dossiers d'une exécution précédente supprimés avant une nouvelle extraction (sorties en colonnes, état incrémental)
+PREVIOUS_OUTPUT_DIRECTORIES = tuple(COLUMNAR_OUTPUT_DIRECTORIES.values()) + (INCREMENTAL_DIRECTORY,)
+
+# Codes de sortie de la ligne de commande
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+
+def resolve_pipeline_stages(stages=None):
+    """
+    Complète une sélection d'étapes avec leurs dépendances et la retourne dans l'ordre d'exécution.
+    Sans sélection, toutes les étapes sont exécutées. Lève ValueError pour une étape inconnue.
+    """
+    if not stages:
+        return list(PIPELINE_STAGES)
+    unknown_stages = [stage for stage in stages if stage not in PIPELINE_STAGE_DEPENDENCIES]
+    if unknown_stages:
+        raise ValueError(f"Étape(s) inconnue(s) : {', '.join(unknown_stages)}. Étapes disponibles : {', '.join(PIPELINE_STAGES)}.")
+
+    selected_stages = set()
+    pending_stages = list(stages)
+    while pending_stages:
+        stage = pending_stages.pop()
+        if stage not in selected_stages:
+            selected_stages.add(stage)
+            pending_stages.extend(PIPELINE_STAGE_DEPENDENCIES[stage])
+    return [stage for stage in PIPELINE_STAGES if stage in selected_stages]
+
+def remove_previous_outputs(output_dir):
+    """Supprime les fichiers produits par une exécution précédente pour éviter les confusions."""
+    for relative_path in PREVIOUS_OUTPUT_FILES:
+        previous_path = os.path.join(output_dir, relative_path)
+        if os.path.exists(previous_path):
+            os.remove(previous_path)
+            print(f"Fichier précédent '{os.path.basename(previous_path)}' supprimé.")
+    for relative_path in PREVIOUS_OUTPUT_DIRECTORIES:
+        previous_path = os.path.join(output_dir, relative_path)
+        if os.path.isdir(previous_path):
+            shutil.rmtree(previous_path, ignore_errors=True)
+            print(f"Dossier précédent '{relative_path}' supprimé.")
+
+# --- Extraction incrémentale : seules les étapes dont les entrées ont changé sont refaites ---
+
+INCREMENTAL_STATE_VERSION = 1
+INCREMENTAL_STATE_FILE = "state.json"
+
+# Entrées de l'archive lues par chaque groupe d'étapes (la première trouvée est retenue)
+INCREMENTAL_INPUT_MEMBERS = {"layout": ("Layout",), "model": ("DataModelSchema", "DataModel")}
+
+# Groupes d'entrées dont dépend chaque étape
+STAGE_INPUT_GROUPS = {
+    "layout": ("layout",),
+    "kpis": ("layout",),
+    "datamodelschema": ("model",),
+    "tables_columns": ("model",),
+    "data_structure": ("model",),
+    "extracted_data": ("layout", "model"),
+    "catalog": ("layout", "model"),
+}
+
+# Étapes qui transmettent des données en mémoire à une autre étape : refaire la seconde oblige à refaire la première
+INCREMENTAL_IN_MEMORY_DEPENDENCIES = {
+    "kpis": ("layout",),
+    "tables_columns": ("datamodelschema",),
+    "data_structure": ("datamodelschema",),
+}
+
+# DataFrames intermédiaires conservés (JSON 'split') pour refaire 'extracted_data' sans refaire les étapes qui les produisent
+INCREMENTAL_DATAFRAME_FILES = {"kpis": "kpis.json", "tables_columns": "tables_columns.json"}
+
+def read_zip_member_signatures(source_file_path):
+    """
+    Lit dans le répertoire central de l'archive, sans rien décompresser, le nom, le CRC32 et la taille
+    des entrées dont dépendent les étapes (Layout, DataModel ou DataModelSchema).
+    Retourne {groupe: signature ou None}, ou None si le fichier n'est pas une archive (projet .pbip).
+    """
+    try:
+        with zipfile.ZipFile(source_file_path, 'r') as zip_ref:
+            signatures = {}
+            for group, member_names in INCREMENTAL_INPUT_MEMBERS.items():
+                signatures[group] = None
+                for member_name in member_names:
+                    member = find_zip_member(zip_ref, member_name)
+                    if member:
+                        info = zip_ref.getinfo(member)
+                        signatures[group] = {"member": member, "crc": f"{info.CRC:08x}", "size": info.file_size}
+                        break
+            return signatures
+    except (zipfile.BadZipFile, OSError):
+        return None
+
+def list_stage_output_paths(stage, output_format="excel"):
+    """Chemins, relatifs au dossier du rapport, des fichiers qu'une étape peut produire."""
+    if stage == "layout":
+        return [os.path.join("JSON Files", "Layout.json"), os.path.join("JSON Files", "Layout.json.gz")]
+    if stage == "datamodelschema":
+        return [os.path.join("JSON Files", "DataModelSchema.json"), os.path.join("JSON Files", "DataModelSchema.json.gz")]
+    if stage in INCREMENTAL_DATAFRAME_FILES:
+        return [os.path.join(INCREMENTAL_DIRECTORY, INCREMENTAL_DATAFRAME_FILES[stage])]
+    if output_format == "excel":
+        return {"data_structure": ["Data_Structure.xlsx"], "extracted_data": ["Extracted_Data.xlsx"]}.get(stage, [])
+    names = {"data_structure": STRUCTURED_ENTITY_ORDER, "extracted_data": COLUMNAR_EXTRACTED_DATA_NAMES}.get(stage, ())
+    return [os.path.join(COLUMNAR_OUTPUT_DIRECTORIES[output_format], name + COLUMNAR_FILE_EXTENSIONS[output_format]) for name in names]
+
+def remove_stage_outputs(output_dir, stages, output_format="excel"):
+    """Supprime uniquement les fichiers produits lors d'une exécution précédente par les étapes à refaire."""
+    for stage in stages:
+        for relative_path in list_stage_output_paths(stage, output_format):
+            previous_path = os.path.join(output_dir, relative_path)
+            if os.path.exists(previous_path):
+                os.remove(previous_path)
+                print(f"Fichier précédent '{os.path.basename(previous_path)}' supprimé.")
+
+def load_incremental_state(output_dir):
+    """Retourne l'état enregistré par la précédente extraction incrémentale du rapport, ou None."""
+    state_path = os.path.join(output_dir, INCREMENTAL_DIRECTORY, INCREMENTAL_STATE_FILE)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_incremental_state(output_dir, state):
+    """Enregistre l'état de l'extraction incrémentale (écriture atomique)."""
+    state_path = os.path.join(output_dir, INCREMENTAL_DIRECTORY, INCREMENTAL_STATE_FILE)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=4, ensure_ascii=False)
+    os.replace(temp_path, state_path)
+    return state_path
+
+def save_incremental_dataframe(df, output_dir, stage):
+    """Conserve le DataFrame produit par une étape pour une prochaine extraction incrémentale (écriture atomique)."""
+    df_path = os.path.join(output_dir, INCREMENTAL_DIRECTORY, INCREMENTAL_DATAFRAME_FILES[stage])
+    os.makedirs(os.path.dirname(df_path), exist_ok=True)
+    temp_path = f"{df_path}.tmp"
+    df.to_json(temp_path, orient="split", index=False, force_ascii=False)
+    os.replace(temp_path, df_path)
+
+def load_incremental_dataframe(output_dir, stage):
+    """Relit le DataFrame conservé par une étape réutilisée, ou None en cas d'échec."""
+    import pandas as pd
+
+    try:
+        df_path = os.path.join(output_dir, INCREMENTAL_DIRECTORY, INCREMENTAL_DATAFRAME_FILES[stage])
+        with open(df_path, 'r', encoding='utf-8') as f:
+            return pd.read_json(io.StringIO(f.read()), orient="split", dtype=False, convert_dates=False)
+    except Exception as e:
+        print(f"Avertissement : Données conservées de l'étape '{stage}' illisibles ({e}), l'étape est refaite.")
+        return None
+
+def load_reused_dataframes(output_dir, reused_stages, selected_stages):
+    """
+    Relit les DataFrames des étapes réutilisées dont 'extracted_data', à refaire, a besoin.
+    Une étape dont les données sont illisibles est retirée de reused_stages (avec les étapes qui lui
+    transmettent des données en mémoire) pour être refaite. Retourne {étape: DataFrame}.
+    """
+    reused_dataframes = {}
+    if "extracted_data" not in selected_stages or "extracted_data" in reused_stages:
+        return reused_dataframes
+    for stage in INCREMENTAL_DATAFRAME_FILES:
+        if stage in reused_stages:
+            df = load_incremental_dataframe(output_dir, stage)
+            if df is None:
+                reused_stages.discard(stage)
+                reused_stages.difference_update(INCREMENTAL_IN_MEMORY_DEPENDENCIES[stage])
+            else:
+                reused_dataframes[stage] = df
+    return reused_dataframes
+
+def find_reusable_stages(previous_state, signatures, options, stages, source_file_path, output_dir):
+    """
+    Retourne les étapes dont les sorties de l'exécution précédente peuvent être réutilisées : même
+    fichier source, mêmes options, mêmes entrées (CRC32 et taille des entrées de l'archive) et fichiers
+    produits toujours présents ; pour le catalogue, le rapport doit y figurer avec l'empreinte actuelle
+    de son contenu. Une étape refaite entraîne celles qui lui transmettent des données en mémoire
+    (INCREMENTAL_IN_MEMORY_DEPENDENCIES).
+    """
+    if (not previous_state or not signatures or previous_state.get("version") != INCREMENTAL_STATE_VERSION
+            or previous_state.get("source") != os.path.abspath(source_file_path)
+            or previous_state.get("options") != options):
+        return set()
+
+    previous_stages = previous_state.get("stages", {})
+    reusable_stages = set()
+    for stage in stages:
+        entry = previous_stages.get(stage)
+        if not entry:
+            continue
+        if any(entry["inputs"].get(group) != signatures.get(group) for group in STAGE_INPUT_GROUPS[stage]):
+            continue
+        if all(os.path.exists(os.path.join(output_dir, relative_path)) for relative_path in entry["outputs"]):
+            reusable_stages.add(stage)
+
+    if "catalog" in stages:
+        catalog_hash = read_catalog_report_hash(options["catalog"], source_file_path)
+        if catalog_hash != compute_report_content_hash(source_file_path):
+            reusable_stages.discard("catalog")
+        # Le catalogue ne reçoit que les données refaites : si le rapport en est absent, ou si aucune des
+        # entrées suivies n'a changé (autre entrée de l'archive modifiée), toutes les données sont refaites
+        catalog_inputs = previous_stages.get("catalog", {}).get("inputs", {})
+        changed_groups = [group for group in STAGE_INPUT_GROUPS["catalog"] if catalog_inputs.get(group) != signatures.get(group)]
+        if "catalog" not in reusable_stages and ("catalog" not in previous_stages or catalog_hash is None or not changed_groups):
+            reusable_stages -= {"kpis", "datamodelschema"}
+    for stage in stages:
+        if stage not in reusable_stages:
+            reusable_stages.difference_update(INCREMENTAL_IN_MEMORY_DEPENDENCIES.get(stage, ()))
+    return reusable_stages
+
+def build_incremental_state(previous_state, signatures, options, result, run_stages, output_dir, output_format="excel"):
+    """
+    Construit l'état enregistré après une extraction : entrées et fichiers produits de chaque étape réussie.
+    Les étapes réutilisées ou non sélectionnées conservent leur état précédent (si les options sont inchangées).
+    """
+    state_stages = {}
+    if previous_state and previous_state.get("version") == INCREMENTAL_STATE_VERSION and previous_state.get("options") == options:
+        state_stages = {stage: entry for stage, entry in previous_state.get("stages", {}).items() if stage not in run_stages}
+    for stage in run_stages:
+        if result["stages"].get(stage):
+            state_stages[stage] = {
+                "inputs": {group: signatures.get(group) for group in STAGE_INPUT_GROUPS[stage]},
+                "outputs": [relative_path for relative_path in list_stage_output_paths(stage, output_format)
+                            if os.path.exists(os.path.join(output_dir, relative_path))],
+            }
+    return {
+        "version": INCREMENTAL_STATE_VERSION,
+        "source": os.path.abspath(result["file"]),
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "options": options,
+        "members": signatures,
+        "stages": state_stages,
+    }
+
+def process_powerbi_report(source_powerbi_file, report_output_dir, pbi_tools_path, pbi_tools_core_path, use_cache=True, cache_dir=None, cache_max_bytes=None, stages=None, json_output="pretty", stream_layout=False, trace_memory=False, output_format="excel", catalog_path=None, incremental=False):
+    """
+    Exécute la chaîne d'extraction (Layout, KPIs, DataModelSchema, fichiers Excel) pour un seul
+    fichier Power BI, sans aucune interface graphique. stages restreint les étapes exécutées
+    (leurs dépendances sont ajoutées automatiquement) ; json_output choisit le mode d'écriture
+    des copies annexes du dossier 'JSON Files' (JSON_OUTPUT_MODES) ; stream_layout lit le Layout
+    en flux (mémoire bornée par le plus gros visuel, pour les rapports volumineux) ; trace_memory
+    active tracemalloc pour mesurer la mémoire allouée par Python (plus précis, mais plus lent) ;
+    output_format (OUTPUT_FORMATS) remplace les classeurs Excel par un fichier Parquet ou Arrow par DataFrame ;
+    catalog_path enregistre aussi le modèle et les KPIs du rapport dans ce catalogue SQLite (update_report_catalog) ;
+    incremental ne refait que les étapes dont les entrées de l'archive ont changé depuis l'exécution
+    précédente dans le même dossier et réutilise les autres sorties (find_reusable_stages).
+    Retourne un dictionnaire décrivant le succès, la durée et les erreurs de chaque étape, ainsi que
+    les mesures détaillées des étapes et sous-étapes ('metrics', voir measure_stage).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    stages = resolve_pipeline_stages(stages)
+    result = {
+        "file": source_powerbi_file,
+        "output_dir": report_output_dir,
+        "success": False,
+        "stages": {},
+        "timings": {},
+        "errors": [],
+    }
+    total_start = time.perf_counter()
+    cache_stats_before = dict(datamodelschema_cache_stats)
+    # Collecteur des mesures de measure_stage, rétabli à la sortie même en cas d'exception
+    with collect_stage_metrics() as metrics:
+        tracing_started = False
+        if trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                tracing_started = True
+
+        def run_stage(stage_name, func, *args, **kwargs):
+            with measure_stage(stage_name, kind="stage") as record:
+                try:
+                    value = func(*args, **kwargs)
+                except Exception as e:
+                    value = None
+                    result["errors"].append(f"{stage_name} : {e}")
+                # Étapes qui produisent un DataFrame (KPIs, tables/colonnes) : nombre de lignes
+                if hasattr(value, "shape"):
+                    record["rows"] = int(value.shape[0])
+            result["timings"][stage_name] = round(record["wall_s"], 3)
+            return value
+
+        try:
+            os.makedirs(report_output_dir, exist_ok=True)
+            selected_stages = stages + (["catalog"] if catalog_path else [])
+            incremental_options = {
+                "output_format": output_format,
+                "json_output": json_output,
+                "stream_layout": stream_layout,
+                "catalog": os.path.abspath(catalog_path) if catalog_path else None,
+            }
+            signatures = None
+            previous_state = None
+            reused_stages = set()
+            reused_dataframes = {}
+            if incremental:
+                signatures = read_zip_member_signatures(source_powerbi_file)
+                if signatures is None:
+                    print("Extraction incrémentale indisponible (le fichier n'est pas une archive) : toutes les étapes sont exécutées.")
+                else:
+                    previous_state = load_incremental_state(report_output_dir)
+                    reused_stages = find_reusable_stages(previous_state, signatures, incremental_options, selected_stages,
+                                                         source_powerbi_file, report_output_dir)
+                    reused_dataframes = load_reused_dataframes(report_output_dir, reused_stages, selected_stages)
+            run_stages = [stage for stage in selected_stages if stage not in reused_stages]
+
+            if reused_stages:
+                remove_stage_outputs(report_output_dir, run_stages, output_format)
+                for stage in selected_stages:
+                    if stage in reused_stages:
+                        result["stages"][stage] = True
+                        print(f"Étape '{stage}' réutilisée : ses entrées n'ont pas changé depuis l'exécution précédente.")
             else:
-                print("Aucune donnée extraite pour générer le fichier Excel.")
+                remove_previous_outputs(report_output_dir)
+            if incremental:
+                result["incremental"] = {"reused": [stage for stage in selected_stages if stage in reused_stages], "run": run_stages}
+
+            df_kpis = None
+            df_tables = None
+            datamodel = None
+
+            # pbi-tools tourne dans un thread pendant l'extraction du Layout et des KPIs :
+            # la durée par rapport devient max(layout, modèle) au lieu de leur somme.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                datamodelschema_future = None
+                if "datamodelschema" in run_stages:
+                    # Le thread reprend le contexte courant pour que ses mesures rejoignent celles du rapport
+                    datamodelschema_future = executor.submit(
+                        contextvars.copy_context().run, run_stage, "datamodelschema", extract_datamodelschema_from_pbix,
+                        source_file_path=source_powerbi_file,
+                        output_dir=report_output_dir,
+                        pbi_tools_path=pbi_tools_path,
+                        pbi_tools_core_path=pbi_tools_core_path,
+                        use_cache=use_cache,
+                        cache_dir=cache_dir,
+                        cache_max_bytes=cache_max_bytes,
+                        json_output=json_output
+                    )
+
+                if "layout" in run_stages:
+                    # Le Layout est analysé une seule fois : l'étape des KPIs reçoit les données en mémoire
+                    layout_data = run_stage("layout", extract_layout_json_from_pbix_or_file, source_powerbi_file, report_output_dir, json_output, stream_layout)
+                    result["stages"]["layout"] = layout_data is not None
+                    if layout_data is None:
+                        result["errors"].append("layout : Échec de l'extraction de Layout.json.")
+
+                    if "kpis" in run_stages:
+                        if layout_data is not None:
+                            df_kpis = run_stage("kpis", extract_all_kpis_from_powerbi_report, layout_data, stream_layout)
+                            result["stages"]["kpis"] = df_kpis is not None
+                            if incremental and df_kpis is not None:
+                                save_incremental_dataframe(df_kpis, report_output_dir, "kpis")
+                            if df_kpis is not None and df_kpis.empty:
+                                df_kpis = None
+                        else:
+                            result["stages"]["kpis"] = False
+
+                if datamodelschema_future is not None:
+                    datamodel = datamodelschema_future.result()
+                    result["stages"]["datamodelschema"] = datamodel is not None
+                    if datamodel is None:
+                        result["errors"].append("datamodelschema : Échec de l'extraction de DataModelSchema.json.")
+
+            if "tables_columns" in run_stages:
+                if datamodel is not None:
+                    df_tables = run_stage("tables_columns", run_tables_columns_extraction, datamodel, report_output_dir)
+                result["stages"]["tables_columns"] = df_tables is not None
+                if incremental and df_tables is not None:
+                    save_incremental_dataframe(df_tables, report_output_dir, "tables_columns")
+
+            # DataFrames des étapes réutilisées, relus avant l'exécution s'ils servent à refaire Extracted_Data
+            if "kpis" in reused_dataframes and not reused_dataframes["kpis"].empty:
+                df_kpis = reused_dataframes["kpis"]
+            if "tables_columns" in reused_dataframes:
+                df_tables = reused_dataframes["tables_columns"]
+
+            if "data_structure" in run_stages:
+                structured_success = False
+                if datamodel is not None:
+                    if output_format == "excel":
+                        structured_success = run_stage("data_structure", run_structured_single_sheet_extraction, datamodel, report_output_dir)
+                    else:
+                        structured_success = run_stage("data_structure", run_structured_columnar_extraction, datamodel, report_output_dir, output_format)
+                result["stages"]["data_structure"] = bool(structured_success)
+
+            if "extracted_data" in run_stages:
+                merge_success = False
+                model_available = datamodel is not None or "datamodelschema" in reused_stages
+                if model_available and (df_tables is not None or df_kpis is not None):
+                    if output_format == "excel":
+                        merge_success = run_stage("extracted_data", merge_excel_files, df_tables, df_kpis, report_output_dir)
+                    else:
+                        merge_success = run_stage("extracted_data", write_extracted_data_columnar, df_tables, df_kpis, report_output_dir, output_format)
+                else:
+                    result["errors"].append("extracted_data : Aucune donnée extraite pour générer le fichier Excel.")
+                result["stages"]["extracted_data"] = bool(merge_success)
+
+            if "catalog" in run_stages:
+                # Les données réutilisées sont déjà dans le catalogue : seules celles qui ont été refaites y sont remplacées
+                catalog_success = run_stage("catalog", update_report_catalog, catalog_path, source_powerbi_file, datamodel,
+                                            None if "kpis" in reused_stages else df_kpis)
+                result["stages"]["catalog"] = bool(catalog_success)
+
+            result["success"] = bool(result["stages"]) and all(result["stages"].values())
+
+            if signatures is not None:
+                save_incremental_state(report_output_dir, build_incremental_state(
+                    previous_state if reused_stages else None, signatures, incremental_options, result, run_stages,
+                    report_output_dir, output_format))
+
+        except Exception as e:
+            result["errors"].append(f"{type(e).__name__} : {e}")
+            result["errors"].append(traceback.format_exc())
+
+        result["cache"] = {name: datamodelschema_cache_stats[name] - cache_stats_before[name] for name in datamodelschema_cache_stats}
+        result["timings"]["total"] = round(time.perf_counter() - total_start, 3)
+        if tracing_started:
+            tracemalloc.stop()
+    result["metrics"] = metrics
+    return result
+
+# --- Mode batch : extraction d'un dossier complet de fichiers Power BI ---
+
+def collect_powerbi_files(inputs):
+    """
+    Construit la liste triée et dédoublonnée des fichiers Power BI à traiter
+    à partir de dossiers, de fichiers ou de motifs glob.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
         else:
-            print("Le fichier DataModelSchema.json n'a pas été extrait avec succès.")
-            print("Les extractions des tables/colonnes et des données structurées ne peuvent pas être effectuées.")
-            print("La fusion des données ne peut pas être réalisée.")
-            extraction_success = False
-        extraction_success = (extracted_datamodelschema_path is not None and os.path.exists(extracted_datamodelschema_path))
+            candidates = glob.glob(item, recursive=True) or [item]
+        for candidate in candidates:
+            if os.path.isfile(candidate) and candidate.lower().endswith(POWERBI_FILE_EXTENSIONS):
+                files.append(os.path.abspath(candidate))
+    return sorted(set(files))
+
+def build_report_output_dirs(powerbi_files, output_directory):
+    """Attribue à chaque rapport son propre sous-dossier de sortie (sans collision de noms)."""
+    output_dirs = {}
+    used_names = set()
+    for powerbi_file in powerbi_files:
+        report_name = os.path.splitext(os.path.basename(powerbi_file))[0]
+        candidate = report_name
+        suffix = 2
+        while candidate.lower() in used_names:
+            candidate = f"{report_name}_{suffix}"
+            suffix += 1
+        used_names.add(candidate.lower())
+        output_dirs[powerbi_file] = os.path.join(output_directory, candidate)
+    return output_dirs
+
+def run_batch_extraction(inputs, output_directory, pbi_tools_path, pbi_tools_core_path, max_workers=None, use_cache=True, cache_dir=None, cache_max_bytes=None, stages=None, json_output="pretty", stream_layout=False, trace_memory=False, output_format="excel", catalog_path=None, incremental=False):
+    """
+    Traite en parallèle (pool de processus) tous les fichiers Power BI désignés par inputs.
+    Chaque rapport est écrit dans son propre sous-dossier de output_directory et un manifeste
+    'batch_manifest.json' récapitule le succès, les durées, les erreurs et les mesures de chaque
+    fichier, ainsi qu'un bilan des mesures par étape pour l'ensemble du batch ('metrics').
+    Un seul fichier (ou max_workers=1) est traité directement, sans pool de processus.
+    Retourne le manifeste.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
 
-    except Exception as e:
-        print(f"Erreur lors de l'exécution du script : {e}")
-        import traceback
-        traceback.print_exc()
+    stages = resolve_pipeline_stages(stages)
+    powerbi_files = collect_powerbi_files(inputs)
+    print(f"\n{'='*50}")
+    print(f"Mode batch : {len(powerbi_files)} fichier(s) Power BI à traiter.")
+
+    os.makedirs(output_directory, exist_ok=True)
+    output_dirs = build_report_output_dirs(powerbi_files, output_directory)
+    # Cache commun à tous les rapports du batch
+    cache_dir = cache_dir or get_datamodelschema_cache_directory(output_directory)
+    started_at = datetime.now()
+    batch_start = time.perf_counter()
+    results = []
+
+    def report_done(report_result):
+        status = "Succès" if report_result["success"] else "Échec"
+        print(f"[{status}] {os.path.basename(report_result['file'])} ({report_result['timings'].get('total', 0)} s)")
+        results.append(report_result)
+
+    if len(powerbi_files) == 1 or max_workers == 1:
+        for powerbi_file in powerbi_files:
+            report_done(process_powerbi_report(powerbi_file, output_dirs[powerbi_file], pbi_tools_path, pbi_tools_core_path,
+                                               use_cache, cache_dir, cache_max_bytes, stages, json_output, stream_layout, trace_memory, output_format, catalog_path, incremental))
+    elif powerbi_files:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(process_powerbi_report, powerbi_file, output_dirs[powerbi_file], pbi_tools_path, pbi_tools_core_path,
+                                use_cache, cache_dir, cache_max_bytes, stages, json_output, stream_layout, trace_memory, output_format, catalog_path, incremental): powerbi_file
+                for powerbi_file in powerbi_files
+            }
+            for future in as_completed(futures):
+                powerbi_file = futures[future]
+                try:
+                    report_result = future.result()
+                except Exception as e:
+                    report_result = {
+                        "file": powerbi_file,
+                        "output_dir": output_dirs[powerbi_file],
+                        "success": False,
+                        "stages": {},
+                        "timings": {},
+                        "errors": [f"{type(e).__name__} : {e}"],
+                    }
+                report_done(report_result)
+
+    results.sort(key=lambda r: r["file"])
+    manifest = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "duration_s": round(time.perf_counter() - batch_start, 3),
+        "workers": max_workers or os.cpu_count(),
+        "stages": stages,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "failed": sum(1 for r in results if not r["success"]),
+        "cache": {
+            "hits": sum(r.get("cache", {}).get("hits", 0) for r in results),
+            "misses": sum(r.get("cache", {}).get("misses", 0) for r in results),
+            "evictions": sum(r.get("cache", {}).get("evictions", 0) for r in results),
+        },
+        "metrics": summarize_stage_metrics(results),
+        "reports": results,
+    }
+    manifest_path = os.path.join(output_directory, "batch_manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
 
-    # Affichage de la popup avec icônes
-    root = tk.Tk()
-    root.withdraw()
+    print(f"Mode batch terminé : {manifest['succeeded']} succès, {manifest['failed']} échec(s) en {manifest['duration_s']} s.")
+    print(f"Manifeste écrit dans : {manifest_path}")
+    return manifest
+
+# --- Interface graphique optionnelle (tkinter) ---
+
+def build_summary_message(report_result, output_dir):
+    """Construit le texte du résumé affiché en fin d'extraction dans l'interface graphique."""
+    stages = report_result["stages"]
+    extraction_success = stages.get("datamodelschema", False)
+    structured_success = extraction_success and stages.get("data_structure", False)
+    merge_success = extraction_success and stages.get("extracted_data", False)
+    # Les copies JSON peuvent être compressées ou désactivées (--json-output) : on s'appuie sur le résultat des étapes
+    layout_success = stages.get("layout", False)
 
     # Obtenir la date et l'heure actuelles
     current_time = datetime.now().strftime("%H:%M %z, %d/%m/%Y")
@@ -1341,28 +3786,230 @@ if __name__ == "__main__":
     failure_icon = "✘"
 
     # Vérification des résultats
-    if extraction_success and structured_success and merge_success:
-        message += f"- Extraction de la structure de données (Data_Structure) : {success_icon} [Succès]\n"
-        message += f"- Extraction des données granulaire + KPIs (Extracted_Data.xlsx) : {success_icon} [Succès]\n"
-    elif extraction_success and structured_success and not merge_success:
+    if structured_success:
         message += f"- Extraction de la structure de données (Data_Structure) : {success_icon} [Succès]\n"
-        message += f"- Extraction des données granulaire + KPIs (Extracted_Data.xlsx) : {failure_icon} [Échec]\n"
-    elif extraction_success and not structured_success and not merge_success:
-        message += f"- Extraction de la structure de données (Data_Structure) : {failure_icon} [Échec]\n"
-        message += f"- Extraction des données granulaire + KPIs (Extracted_Data.xlsx) : {failure_icon} [Échec]\n"
-    elif not extraction_success:
+    else:
         message += f"- Extraction de la structure de données (Data_Structure) : {failure_icon} [Échec]\n"
+    if merge_success:
+        message += f"- Extraction des données granulaire + KPIs (Extracted_Data.xlsx) : {success_icon} [Succès]\n"
+    else:
         message += f"- Extraction des données granulaire + KPIs (Extracted_Data.xlsx) : {failure_icon} [Échec]\n"
 
     # Vérification des fichiers JSON uniquement s'ils n'ont pas été extraits
-    if not os.path.exists(layout_json_path) and not os.path.exists(datamodelschema_json_path):
+    if not layout_success and not extraction_success:
         message += f"- Extraction des fichiers JSON (Layout.json et DataModelSchema.json) : {failure_icon} [Échec]\n"
-    elif not os.path.exists(layout_json_path) and os.path.exists(datamodelschema_json_path):
+    elif not layout_success and extraction_success:
         message += f"- Extraction du fichier JSON 'Layout.json' : {failure_icon} [Échec]\n"
-    elif os.path.exists(layout_json_path) and not os.path.exists(datamodelschema_json_path):
+    elif layout_success and not extraction_success:
         message += f"- Extraction du fichier JSON 'DataModelSchema.json' : {failure_icon} [Échec]\n"
+    return message
 
-    messagebox.showinfo("Résultat de l'Extraction", message, parent=root)
-    root.destroy()
+def run_gui(output_dir, pbi_tools_path=None, pbi_tools_core_path=None, use_cache=True, cache_dir=None, cache_max_bytes=None, pbi_tools_config=None, json_output="pretty", stream_layout=False, trace_memory=False, catalog_path=None, incremental=False):
+    """
+    Interface graphique historique : sélection du fichier Power BI par une fenêtre de dialogue,
+    puis exécution de process_powerbi_report (mêmes options que la ligne de commande) et affichage du résumé.
+    tkinter n'est importé qu'ici : la ligne de commande et le mode batch n'en dépendent pas.
+    """
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
 
-    print("Exécution du script d'extraction de données Power BI terminée.")
\ No newline at end of file
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        print("Début de l'exécution du script d'extraction de données Power BI.")
+        print(f"Répertoire de sortie configuré : {output_dir}")
+        os.makedirs(output_dir, exist_ok=True)
+
+        print("Ouverture de la fenêtre pour sélectionner un fichier Power BI.")
+        filetypes = [("Power BI Files", "*.pbix *.pbit *.pbip *.file"), ("All files", "*.*")]
+        source_powerbi_file = filedialog.askopenfilename(
+            title="Sélectionnez le fichier Power BI (.pbix, .pbit, .pbip or .file) pour l'extraction des KPIs et du schéma de données",
+            filetypes=filetypes,
+            parent=root
+        )
+        if not source_powerbi_file:
+            print("Aucun fichier Power BI sélectionné. Extraction des KPIs et du schéma annulée.")
+            return EXIT_FAILURE
+
+        print(f"Fichier Power BI sélectionné : {os.path.basename(source_powerbi_file)}.")
+
+        # Un modèle .pbit ou un projet .pbip contient déjà le modèle en clair : pbi-tools est inutile
+        if requires_pbi_tools(source_powerbi_file):
+            print("Recherche des exécutables pbi-tools pour l'extraction des KPIs.")
+            pbi_tools_path, pbi_tools_core_path = resolve_pbi_tools(pbi_tools_path, pbi_tools_core_path,
+                                                                    config_path=pbi_tools_config or get_pbi_tools_config_path(output_dir))
+            if not pbi_tools_path or not pbi_tools_core_path:
+                messagebox.showerror("Erreur", "Téléchargez et Installez pbi-tools.exe et pbi-tools.core.exe et déplacez les dans Data_Extractor.", parent=root)
+                return EXIT_FAILURE
+
+            print("Exécutables pbi-tools trouvés et prêts à être utilisés.")
+
+        report_result = process_powerbi_report(
+            source_powerbi_file, output_dir, pbi_tools_path, pbi_tools_core_path,
+            use_cache=use_cache, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes, json_output=json_output,
+            stream_layout=stream_layout, trace_memory=trace_memory, catalog_path=catalog_path, incremental=incremental
+        )
+        for error in report_result["errors"]:
+            print(f"Erreur : {error}")
+
+        messagebox.showinfo("Résultat de l'Extraction", build_summary_message(report_result, output_dir), parent=root)
+        return EXIT_SUCCESS if report_result["success"] else EXIT_FAILURE
+    finally:
+        root.destroy()
+
+# --- Point d'entrée principal (ligne de commande) ---
+
+def build_argument_parser():
+    """Construit l'analyseur des arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        description="Extraction des données d'un ou plusieurs rapports Power BI (Layout, KPIs, modèle de données, fichiers Excel). "
+                    "Sans fichier en entrée, l'interface graphique est ouverte.",
+        epilog=f"Codes de sortie : {EXIT_SUCCESS} = succès, {EXIT_FAILURE} = au moins un rapport en échec, {EXIT_USAGE} = arguments invalides ou aucun fichier."
+    )
+    parser.add_argument("inputs", nargs="*", metavar="ENTRÉE",
+                        help="Fichier(s) .pbix/.pbit/.pbip, dossier(s) ou motif(s) glob à traiter (un sous-dossier de sortie par rapport).")
+    parser.add_argument("--batch", nargs="+", default=[], metavar="DOSSIER_OU_MOTIF",
+                        help="Équivalent des entrées positionnelles (conservé pour compatibilité).")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Répertoire de sortie (défaut : dossier courant).")
+    parser.add_argument("--pbi-tools", dest="pbi_tools_path", default=None,
+                        help="Chemin de pbi-tools.exe (par défaut : variable PBI_TOOLS_PATH, PATH, emplacement mémorisé, puis recherche).")
+    parser.add_argument("--pbi-tools-core", dest="pbi_tools_core_path", default=None,
+                        help="Chemin de pbi-tools.core.exe (par défaut : variable PBI_TOOLS_CORE_PATH, PATH, emplacement mémorisé, puis recherche).")
+    parser.add_argument("--pbi-tools-config", default=None,
+                        help="Fichier où sont mémorisés les emplacements de pbi-tools trouvés (défaut : Cache/pbi_tools_paths.json du répertoire de sortie).")
+    parser.add_argument("--stages", default=None,
+                        help=f"Étapes à exécuter, séparées par des virgules, parmi : {', '.join(PIPELINE_STAGES)} (défaut : toutes).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre de processus en parallèle (défaut : nombre de CPU).")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Dossier du cache des DataModelSchema déjà extraits par pbi-tools (défaut : Cache/DataModelSchema du répertoire de sortie).")
+    parser.add_argument("--cache-max-mb", type=int, default=datamodelschema_cache_max_bytes // (1024 * 1024),
+                        help="Taille maximale du cache en Mo (éviction LRU au-delà).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Désactive le cache et relance toujours pbi-tools.")
+    parser.add_argument("--json-output", choices=JSON_OUTPUT_MODES, default="pretty",
+                        help="Écriture des copies 'JSON Files/Layout.json' et 'DataModelSchema.json' : raw (texte d'origine "
+                             "en UTF-8, sans resérialisation), pretty (indenté, défaut), compact, gzip (.json.gz) ou none.")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="excel",
+                        help="Format des données extraites : excel (Data_Structure.xlsx et Extracted_Data.xlsx, défaut), "
+                             "parquet ou arrow (un fichier par entité, expressions complètes, sans mise en forme ; nécessite pyarrow).")
+    parser.add_argument("--catalog", default=None, metavar="FICHIER",
+                        help="Enregistre aussi les tables, colonnes, mesures, partitions, relations et KPIs de chaque rapport "
+                             "dans ce catalogue SQLite (mis à jour rapport par rapport, avec index plein texte des expressions DAX/M).")
+    parser.add_argument("--catalog-search", default=None, metavar="TEXTE",
+                        help="Recherche dans le catalogue (--catalog) les rapports qui utilisent une table, colonne, mesure ou "
+                             "source de données portant ce nom, ou dont une expression DAX/M le contient, puis s'arrête.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne refait que les étapes dont les entrées de l'archive (Layout, DataModel/DataModelSchema) ont changé "
+                             "depuis la dernière extraction dans le même dossier de sortie (CRC32 et taille lus sans décompression) ; "
+                             "les autres sorties sont réutilisées.")
+    parser.add_argument("--stream-layout", action="store_true",
+                        help="Lit le Layout en flux, un visuel à la fois (rapports volumineux) ; la copie Layout.json "
+                             "est alors écrite telle quelle (modes raw, gzip ou none).")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Mesure aussi la mémoire allouée par Python (tracemalloc) pour chaque étape ; ralentit l'extraction.")
+    parser.add_argument("--prometheus-textfile", default=None, metavar="FICHIER",
+                        help="Écrit aussi les mesures de l'exécution au format texte Prometheus (collecteur textfile de node_exporter).")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default=None,
+                        help="Analyseur JSON : auto (orjson s'il est installé, défaut), orjson ou json "
+                             f"(équivaut à la variable d'environnement {JSON_BACKEND_ENVIRONMENT_VARIABLE}).")
+    parser.add_argument("--gui", action="store_true",
+                        help="Ouvre l'interface graphique (tkinter) pour choisir le fichier.")
+    return parser
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande. Retourne le code de sortie."""
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    inputs = list(args.inputs) + list(args.batch)
+    cache_max_bytes = args.cache_max_mb * 1024 * 1024
+    args.output_dir = os.path.abspath(args.output_dir or os.getcwd())
+    cache_dir = args.cache_dir or get_datamodelschema_cache_directory(args.output_dir)
+    pbi_tools_config = args.pbi_tools_config or get_pbi_tools_config_path(args.output_dir)
+
+    try:
+        stages = resolve_pipeline_stages([stage.strip() for stage in args.stages.split(",") if stage.strip()] if args.stages else None)
+    except ValueError as e:
+        parser.print_usage(sys.stderr)
+        print(f"Erreur : {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.json_backend:
+        # Passé par l'environnement pour que les processus du mode batch fassent le même choix
+        os.environ[JSON_BACKEND_ENVIRONMENT_VARIABLE] = args.json_backend
+        select_json_backend(args.json_backend)
+
+    if args.catalog_search is not None:
+        if not args.catalog or not os.path.exists(args.catalog):
+            parser.print_usage(sys.stderr)
+            print("Erreur : --catalog-search nécessite un catalogue existant (--catalog FICHIER).", file=sys.stderr)
+            return EXIT_USAGE
+        start = time.perf_counter()
+        matches = search_catalog(args.catalog, args.catalog_search)
+        for match in matches:
+            location = ".".join(str(part) for part in (match["table"], match["name"]) if part)
+            detail = " ".join(str(match["detail"]).split()) if match["detail"] is not None else ""
+            print(f"{match['report']} | {match['type']} | {location} | {detail}")
+        print(f"{len(matches)} résultat(s) en {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return EXIT_SUCCESS
+
+    if args.gui or not inputs:
+        # Le résumé de l'interface graphique suppose toutes les étapes et les classeurs Excel
+        unsupported_options = [option for option, used in (("--stages", args.stages), ("--output-format", args.output_format != "excel")) if used]
+        if unsupported_options:
+            parser.print_usage(sys.stderr)
+            print(f"Erreur : {', '.join(unsupported_options)} non disponible(s) avec l'interface graphique. "
+                  "Indiquez un ou plusieurs fichiers en entrée.", file=sys.stderr)
+            return EXIT_USAGE
+        try:
+            import tkinter
+        except ImportError as e:
+            parser.print_usage(sys.stderr)
+            print(f"Erreur : Interface graphique indisponible ({e}). Indiquez un ou plusieurs fichiers en entrée.", file=sys.stderr)
+            return EXIT_USAGE
+        try:
+            return run_gui(args.output_dir, args.pbi_tools_path, args.pbi_tools_core_path,
+                           use_cache=not args.no_cache, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                           pbi_tools_config=pbi_tools_config, json_output=args.json_output,
+                           stream_layout=args.stream_layout, trace_memory=args.trace_memory,
+                           catalog_path=args.catalog, incremental=args.incremental)
+        except tkinter.TclError as e:
+            # Pas d'affichage disponible (ex. session sans serveur graphique)
+            parser.print_usage(sys.stderr)
+            print(f"Erreur : Interface graphique indisponible ({e}). Indiquez un ou plusieurs fichiers en entrée.", file=sys.stderr)
+            return EXIT_USAGE
+
+    if not collect_powerbi_files(inputs):
+        print(f"Erreur : Aucun fichier Power BI ({', '.join(POWERBI_FILE_EXTENSIONS)}) trouvé pour : {' '.join(inputs)}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.output_format != "excel":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print(f"Erreur : Le format '{args.output_format}' nécessite pyarrow. Veuillez l'installer en exécutant : pip install pyarrow", file=sys.stderr)
+            return EXIT_FAILURE
+
+    pbi_tools_path = args.pbi_tools_path
+    pbi_tools_core_path = args.pbi_tools_core_path
+    # pbi-tools n'est utile que pour les fichiers dont le modèle n'est pas déjà en clair (.pbit, .pbip)
+    if "datamodelschema" in stages and any(requires_pbi_tools(powerbi_file) for powerbi_file in collect_powerbi_files(inputs)):
+        pbi_tools_path, pbi_tools_core_path = resolve_pbi_tools(pbi_tools_path, pbi_tools_core_path, config_path=pbi_tools_config)
+        if not pbi_tools_path or not pbi_tools_core_path:
+            print("Avertissement : pbi-tools.exe et/ou pbi-tools.core.exe introuvable(s). Seuls les modèles déjà en cache pourront être extraits.")
+
+    manifest = run_batch_extraction(inputs, args.output_dir, pbi_tools_path, pbi_tools_core_path, max_workers=args.workers,
+                                    use_cache=not args.no_cache, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                                    stages=stages, json_output=args.json_output, stream_layout=args.stream_layout,
+                                    trace_memory=args.trace_memory, output_format=args.output_format,
+                                    catalog_path=args.catalog, incremental=args.incremental)
+    if args.prometheus_textfile:
+        try:
+            print(f"Mesures Prometheus écrites dans : {write_prometheus_textfile(manifest, args.prometheus_textfile)}")
+        except OSError as e:
+            print(f"Erreur lors de l'écriture du fichier Prometheus : {e}")
+    return EXIT_SUCCESS if manifest["failed"] == 0 else EXIT_FAILURE
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# --- Mesure du temps d'import de Data_Extractor ---
+# Lance plusieurs interpréteurs neufs (comme le fait le mode batch pour chaque processus),
+# mesure la durée de "import Data_Extractor" et vérifie qu'aucune dépendance lourde
+# (pandas, openpyxl, tkinter...) n'est chargée à l'import.
+#
+# Utilisation : python benchmarks/bench_import_time.py [--repeat 10] [--max-ms 100]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules qui ne doivent être importés que par les étapes qui les utilisent
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "tkinter", "concurrent.futures", "multiprocessing")
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import Data_Extractor\n"
+    "elapsed = time.perf_counter() - start\n"
+    "loaded = [m for m in {heavy!r} if m in sys.modules]\n"
+    "print(elapsed, ','.join(loaded))\n"
+)
+
+def measure_import_once(python_executable):
+    """Importe Data_Extractor dans un nouvel interpréteur et retourne (durée en s, modules lourds chargés)."""
+    completed = subprocess.run(
+        [python_executable, "-c", IMPORT_SNIPPET.format(heavy=HEAVY_MODULES)],
+        cwd=REPO_DIRECTORY, capture_output=True, text=True, check=True
+    )
+    elapsed, _, loaded = completed.stdout.strip().partition(" ")
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure le temps d'import de Data_Extractor dans des processus neufs.")
+    parser.add_argument("--repeat", type=int, default=10, help="Nombre d'interpréteurs lancés (défaut : 10).")
+    parser.add_argument("--max-ms", type=float, default=None, help="Échec (code 1) si la médiane dépasse ce seuil en millisecondes.")
+    parser.add_argument("--python", default=sys.executable, help="Interpréteur Python à utiliser.")
+    args = parser.parse_args(argv)
+
+    durations = []
+    loaded_modules = set()
+    for _ in range(args.repeat):
+        elapsed, loaded = measure_import_once(args.python)
+        durations.append(elapsed * 1000)
+        loaded_modules.update(loaded)
+
+    median_ms = statistics.median(durations)
+    print(f"Import de Data_Extractor ({args.repeat} processus) : médiane {median_ms:.1f} ms, "
+          f"min {min(durations):.1f} ms, max {max(durations):.1f} ms")
+
+    exit_code = 0
+    if loaded_modules:
+        print(f"Erreur : modules lourds chargés à l'import : {', '.join(sorted(loaded_modules))}")
+        exit_code = 1
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"Erreur : la médiane ({median_ms:.1f} ms) dépasse le seuil de {args.max_ms:.1f} ms.")
+        exit_code = 1
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# --- Comparaison des backends JSON (orjson / json) sur l'analyse d'un rapport ---
+# Pour chaque backend disponible, mesure l'analyse du Layout (document principal et chaînes
+# 'config' / 'dataTransforms' de chaque visuel, via extract_kpis_from_layout) et, si présent,
+# celle du DataModelSchema, puis affiche l'accélération par rapport au module json standard.
+#
+# Sans argument, un Layout synthétique est généré (--pages, --visuals).
+# Utilisation : python benchmarks/bench_json_backend.py [rapport.pbix|rapport.pbit|Layout.json ...] [--repeat 5]
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import zipfile
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+
+import Data_Extractor  # noqa: E402
+
+def build_synthetic_layout(pages, visuals, seed=1):
+    """Génère un Layout au format historique : chaque visuel porte ses chaînes JSON 'config' et 'dataTransforms'."""
+    rnd = random.Random(seed)
+    sections = []
+    for page_index in range(pages):
+        visual_containers = []
+        for visual_index in range(visuals):
+            selects, values = [], []
+            for projection_index in range(6):
+                table = f"Table{rnd.randint(0, 9)}"
+                query_name = f"{table}.Mesure{rnd.randint(0, 49)}"
+                values.append({"queryRef": query_name})
+                selects.append({
+                    "queryName": query_name, "displayName": f"Alias {projection_index}",
+                    "expr": {"Measure": {"Expression": {"SourceRef": {"Entity": table}}, "Property": query_name.split(".")[1]}},
+                })
+            config = {"name": f"visuel{page_index}_{visual_index}",
+                      "singleVisual": {"visualType": rnd.choice(["tableEx", "card", "barChart"]), "projections": {"Values": values}}}
+            visual_containers.append({"x": visual_index * 10.5, "y": 0, "config": json.dumps(config),
+                                      "dataTransforms": json.dumps({"selects": selects}), "filters": "[]"})
+        sections.append({"displayName": f"Page {page_index + 1}", "visualContainers": visual_containers, "filters": "[]"})
+    return json.dumps({"id": 0, "sections": sections, "config": json.dumps({"version": "5.0"})})
+
+def load_report_texts(path):
+    """Retourne (texte du Layout, texte du DataModelSchema ou None) pour un .pbix/.pbit ou un Layout.json."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            layout_text = Data_Extractor.decode_text_bytes(archive.read("Report/Layout"), from_json_start=True)
+            model_text = None
+            if "DataModelSchema" in names:
+                model_text = Data_Extractor.decode_text_bytes(archive.read("DataModelSchema"), from_json_start=True)
+        return layout_text, model_text
+    return Data_Extractor.read_text_file(path, from_json_start=True), None
+
+def time_report(layout_text, model_text, repeat):
+    """Médiane (en s) de l'analyse complète d'un rapport avec le backend courant."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Data_Extractor.extract_kpis_from_layout(Data_Extractor.parse_json(layout_text))
+        if model_text is not None:
+            Data_Extractor.parse_json(model_text)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare les backends JSON sur l'analyse du Layout et du DataModelSchema.")
+    parser.add_argument("reports", nargs="*", help="Fichiers .pbix/.pbit ou Layout.json (défaut : Layout synthétique).")
+    parser.add_argument("--pages", type=int, default=50, help="Pages du Layout synthétique (défaut : 50).")
+    parser.add_argument("--visuals", type=int, default=40, help="Visuels par page du Layout synthétique (défaut : 40).")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures par backend (défaut : 5).")
+    args = parser.parse_args(argv)
+
+    if args.reports:
+        reports = [(os.path.basename(path), *load_report_texts(path)) for path in args.reports]
+    else:
+        reports = [(f"synthétique ({args.pages} pages x {args.visuals} visuels)",
+                    build_synthetic_layout(args.pages, args.visuals), None)]
+
+    backends = ["json"]
+    if Data_Extractor.select_json_backend("orjson") == "orjson":
+        backends.append("orjson")
+
+    for name, layout_text, model_text in reports:
+        size_mib = (len(layout_text) + len(model_text or "")) / (1024 * 1024)
+        print(f"{name} : {size_mib:.1f} Mio de JSON")
+        timings = {}
+        for backend in backends:
+            Data_Extractor.select_json_backend(backend)
+            timings[backend] = time_report(layout_text, model_text, args.repeat)
+            print(f"  {backend:<7} {timings[backend] * 1000:8.1f} ms")
+        if "orjson" in timings:
+            print(f"  accélération orjson : x{timings['json'] / timings['orjson']:.2f}")
+        else:
+            print("  orjson n'est pas installé : seul le module json standard a été mesuré.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# --- Banc de mesure de la chaîne d'extraction sur des rapports synthétiques ---
+# Génère, pour chaque échelle, un rapport synthétique (synthetic_pbix.py) puis mesure :
+#   kpis                 extract_all_kpis_from_powerbi_report sur le Layout déjà analysé
+#   data_structure       process_data_model_for_structured_sheet sur le DataModelSchema
+#   data_structure_xlsx  write_dfs_to_single_sheet + enregistrement de Data_Structure.xlsx
+#   extracted_data_xlsx  merge_excel_files (Extracted_Data.xlsx)
+#   pipeline             process_powerbi_report complet sur le .pbix, avec fake_pbi_tools.py (option --pipeline)
+#
+# Avec --baseline, les médianes sont comparées à une référence enregistrée par --save-baseline : une mesure
+# plus lente que la référence de plus de --tolerance (et d'au moins --min-delta-ms) est signalée comme
+# régression (code 1). La référence dépend de la machine : elle n'est pas versionnée, et la comparaison est
+# ignorée si elle a été enregistrée sur une autre plateforme, version de Python ou avec un autre backend JSON.
+#
+# Utilisation : python benchmarks/bench_pipeline.py [--scales small,medium] [--repeat 3] [--pipeline]
+#               [--baseline référence.json [--save-baseline]] [--tolerance 0.25] [--output résultats.json]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIRECTORY))
+sys.path.insert(0, BENCHMARKS_DIRECTORY)
+
+import Data_Extractor  # noqa: E402
+from fake_pbi_tools import install_fake_pbi_tools  # noqa: E402
+from synthetic_pbix import build_datamodelschema, build_layout, write_synthetic_pbix  # noqa: E402
+
+# Champs qui doivent être identiques entre la référence et les mesures pour qu'elles soient comparables
+BASELINE_ENVIRONMENT_FIELDS = ("python", "platform", "json_backend")
+
+# Tailles des rapports générés (pages x visuels x projections ; tables x colonnes x mesures)
+SCALES = {
+    "small": {"pages": 5, "visuals": 10, "projections": 4, "tables": 10, "columns": 15, "measures": 5},
+    "medium": {"pages": 20, "visuals": 25, "projections": 6, "tables": 40, "columns": 25, "measures": 10},
+    "large": {"pages": 60, "visuals": 40, "projections": 8, "tables": 150, "columns": 30, "measures": 20},
+}
+
+def time_call(func, repeat):
+    """Exécute func repeat fois (sorties console masquées) et retourne les durées en secondes."""
+    durations = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+    return durations
+
+def run_scale(scale_name, work_dir, repeat, with_pipeline, fake_pbi_tools_paths):
+    """Génère le rapport d'une échelle et mesure chaque étape. Retourne {étape: statistiques}."""
+    from openpyxl import Workbook
+
+    size = SCALES[scale_name]
+    layout = build_layout(**size)
+    datamodelschema = build_datamodelschema(size["tables"], size["columns"], size["measures"])
+    scale_dir = os.path.join(work_dir, scale_name)
+    os.makedirs(scale_dir, exist_ok=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_kpis = Data_Extractor.extract_all_kpis_from_powerbi_report(layout)
+        dfs = Data_Extractor.process_data_model_for_structured_sheet(datamodelschema)
+        df_tables = Data_Extractor.extract_table_column_names(datamodelschema)
+
+    def write_data_structure():
+        workbook = Workbook(write_only=True)
+        Data_Extractor.write_dfs_to_single_sheet(dfs, workbook)
+        workbook.save(os.path.join(scale_dir, "Data_Structure.xlsx"))
+
+    benchmarks = {
+        "kpis": lambda: Data_Extractor.extract_all_kpis_from_powerbi_report(layout),
+        "data_structure": lambda: Data_Extractor.process_data_model_for_structured_sheet(datamodelschema),
+        "data_structure_xlsx": write_data_structure,
+        "extracted_data_xlsx": lambda: Data_Extractor.merge_excel_files(df_tables, df_kpis, scale_dir),
+    }
+    if with_pipeline:
+        pbix_path = write_synthetic_pbix(os.path.join(scale_dir, f"synthetique_{scale_name}.pbix"), layout, datamodelschema)
+        pbi_tools_path, pbi_tools_core_path = fake_pbi_tools_paths
+        benchmarks["pipeline"] = lambda: Data_Extractor.process_powerbi_report(
+            pbix_path, os.path.join(scale_dir, "sortie"), pbi_tools_path, pbi_tools_core_path, use_cache=False)
+
+    results = {"size": size, "kpi_rows": len(df_kpis), "structure_rows": sum(len(df) for df in dfs.values()), "timings": {}}
+    for name, func in benchmarks.items():
+        durations = time_call(func, repeat)
+        results["timings"][name] = {"median_s": round(statistics.median(durations), 4), "min_s": round(min(durations), 4)}
+        print(f"  {scale_name:<7} {name:<20} médiane {statistics.median(durations) * 1000:9.1f} ms   min {min(durations) * 1000:9.1f} ms")
+    return results
+
+def compare_with_baseline(results, baseline, tolerance, min_delta_s):
+    """Retourne la liste des régressions (échelle, étape, médiane, référence) par rapport à la référence."""
+    regressions = []
+    for scale_name, scale_results in results["scales"].items():
+        baseline_timings = baseline.get("scales", {}).get(scale_name, {}).get("timings", {})
+        for name, timing in scale_results["timings"].items():
+            reference = baseline_timings.get(name)
+            if reference is None:
+                continue
+            median, reference_median = timing["median_s"], reference["median_s"]
+            if median > reference_median * (1 + tolerance) and median - reference_median >= min_delta_s:
+                regressions.append((scale_name, name, median, reference_median))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les étapes de Data_Extractor sur des rapports synthétiques.")
+    parser.add_argument("--scales", default="small,medium", help=f"Échelles mesurées, parmi : {', '.join(SCALES)} (défaut : small,medium).")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures par étape (défaut : 3).")
+    parser.add_argument("--pipeline", action="store_true", help="Mesure aussi la chaîne complète avec le substitut de pbi-tools.")
+    parser.add_argument("--baseline", default=None, help="Fichier de référence à comparer aux mesures (aucune comparaison par défaut).")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre les mesures comme nouvelle référence dans le fichier --baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Ralentissement toléré par rapport à la référence (défaut : 0.25, soit 25 %%).")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0, help="Écart minimal, en ms, pour signaler une régression (défaut : 10).")
+    parser.add_argument("--output", default=None, help="Écrit aussi les mesures dans ce fichier JSON.")
+    args = parser.parse_args(argv)
+
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline nécessite --baseline FICHIER")
+
+    scale_names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown_scales = [name for name in scale_names if name not in SCALES]
+    if unknown_scales:
+        parser.error(f"échelle(s) inconnue(s) : {', '.join(unknown_scales)}")
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": Data_Extractor.select_json_backend(),
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="data_extractor_bench_") as work_dir:
+        fake_pbi_tools_paths = install_fake_pbi_tools(os.path.join(work_dir, "pbi-tools")) if args.pipeline else None
+        for scale_name in scale_names:
+            results["scales"][scale_name] = run_scale(scale_name, work_dir, args.repeat, args.pipeline, fake_pbi_tools_paths)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"Référence enregistrée dans : {args.baseline}")
+        return 0
+
+    if not args.baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Aucune référence trouvée ({args.baseline}) : lancez le banc avec --save-baseline pour en créer une.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    different_fields = [field for field in BASELINE_ENVIRONMENT_FIELDS if baseline.get(field) != results[field]]
+    if different_fields:
+        for field in different_fields:
+            print(f"Référence enregistrée avec un autre environnement : {field} = {baseline.get(field)} (mesures : {results[field]}).")
+        print("Comparaison ignorée : régénérez la référence sur cette machine avec --save-baseline.")
+        return 0
+    regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+    if not regressions:
+        print(f"Aucune régression par rapport à la référence (tolérance {args.tolerance:.0%}).")
+        return 0
+    for scale_name, name, median, reference_median in regressions:
+        print(f"Régression : {scale_name} / {name} : {median * 1000:.1f} ms contre {reference_median * 1000:.1f} ms "
+              f"(x{median / reference_median:.2f})")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# --- Substitut local de pbi-tools pour les rapports synthétiques ---
+# Reproduit les deux commandes utilisées par Data_Extractor, avec les mêmes arguments et les mêmes
+# fichiers produits, pour mesurer la chaîne complète sans pbi-tools ni Windows :
+#   extract <fichier.pbix> -modelSerialization Raw
+#       -> <fichier>/Model/DataModelSchema (UTF-16-LE), relu depuis l'entrée 'DataModel' synthétique
+#   compile <dossier> <sortie.pbit> PBIT True
+#       -> archive .pbit contenant l'entrée 'DataModelSchema' du dossier
+# La variable d'environnement FAKE_PBI_TOOLS_DELAY (secondes) simule la durée de lancement de pbi-tools.
+#
+# install_fake_pbi_tools(dossier) crée les deux lanceurs (pbi-tools / pbi-tools.core) à passer à
+# Data_Extractor à la place des vrais exécutables.
+import os
+import stat
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_pbix import read_synthetic_datamodelschema  # noqa: E402
+
+DELAY_ENVIRONMENT_VARIABLE = "FAKE_PBI_TOOLS_DELAY"
+
+def extract(source_file_path):
+    """Écrit le dossier d'extraction 'Raw' à côté du fichier, comme pbi-tools extract."""
+    extract_folder = os.path.splitext(source_file_path)[0]
+    model_folder = os.path.join(extract_folder, "Model")
+    os.makedirs(model_folder, exist_ok=True)
+    with open(os.path.join(model_folder, "DataModelSchema"), "wb") as f:
+        f.write(read_synthetic_datamodelschema(source_file_path))
+    print(f"Extraction terminée : {extract_folder}")
+
+def compile_pbit(extract_folder, output_path):
+    """Assemble une archive .pbit à partir du DataModelSchema du dossier d'extraction, comme pbi-tools.core compile."""
+    with open(os.path.join(extract_folder, "Model", "DataModelSchema"), "rb") as f:
+        schema_bytes = f.read()
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("DataModelSchema", schema_bytes)
+    print(f"Compilation terminée : {output_path}")
+
+def install_fake_pbi_tools(directory):
+    """
+    Crée dans directory deux lanceurs qui exécutent ce script avec l'interpréteur courant
+    (script shell sous Linux/macOS, fichier .cmd sous Windows).
+    Retourne (chemin pbi-tools, chemin pbi-tools.core).
+    """
+    os.makedirs(directory, exist_ok=True)
+    script_path = os.path.abspath(__file__)
+    launchers = []
+    for name in ("pbi-tools", "pbi-tools.core"):
+        if os.name == "nt":
+            launcher_path = os.path.join(directory, f"{name}.cmd")
+            content = f'@"{sys.executable}" "{script_path}" %*\r\n'
+        else:
+            launcher_path = os.path.join(directory, name)
+            content = f'#!/bin/sh\nexec "{sys.executable}" "{script_path}" "$@"\n'
+        with open(launcher_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.chmod(launcher_path, os.stat(launcher_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        launchers.append(launcher_path)
+    return launchers[0], launchers[1]
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    time.sleep(float(os.environ.get(DELAY_ENVIRONMENT_VARIABLE, "0")))
+    if len(argv) >= 2 and argv[0] == "extract":
+        extract(argv[1])
+        return 0
+    if len(argv) >= 3 and argv[0] == "compile":
+        compile_pbit(argv[1], argv[2])
+        return 0
+    print("Utilisation : fake_pbi_tools.py extract <fichier.pbix> | compile <dossier> <sortie.pbit> PBIT True", file=sys.stderr)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# --- Générateur de rapports Power BI synthétiques (Layout, DataModelSchema, archives .pbix/.pbit) ---
+# Les vrais fichiers .pbix ne peuvent pas être partagés : ce module fabrique des documents de même
+# forme, de taille paramétrable, pour mesurer les performances de Data_Extractor.
+#
+#  - Layout : N pages x M visuels x K projections, avec des chaînes 'config' et 'dataTransforms'
+#    semblables à celles de Power BI Desktop (prototypeQuery, objets de mise en forme, selects...).
+#  - DataModelSchema : tables, colonnes, mesures, partitions M, hiérarchies, relations, cultures et annotations.
+#  - Archive .pbix : entrée 'Report/Layout' en UTF-16-LE et entrée 'DataModel' opaque. Le vrai DataModel
+#    est compressé (XPress9) et seul pbi-tools sait le lire ; ici, il contient le DataModelSchema compressé
+#    en gzip derrière l'en-tête SYNTHETIC_DATAMODEL_HEADER, que fake_pbi_tools.py sait relire.
+#  - Archive .pbit : entrée 'DataModelSchema' en clair, lue directement sans pbi-tools.
+#
+# Utilisation : python benchmarks/synthetic_pbix.py FICHIER.pbix [--pages 20] [--visuals 25] [--projections 6]
+#               [--tables 40] [--columns 25] [--measures 10] [--seed 1] [--pbit]
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import uuid
+import zipfile
+
+# En-tête de l'entrée 'DataModel' synthétique (relue par fake_pbi_tools.py)
+SYNTHETIC_DATAMODEL_HEADER = b"DATA-EXTRACTOR-SYNTHETIC-DATAMODEL\n"
+
+VISUAL_TYPES = ("tableEx", "pivotTable", "card", "multiRowCard", "barChart", "clusteredColumnChart", "lineChart", "pieChart", "slicer")
+COLUMN_DATA_TYPES = ("string", "int64", "double", "dateTime", "decimal", "boolean")
+AGGREGATION_FUNCTIONS = (0, 1, 2, 3, 4, 5)
+
+def new_lineage_tag(rnd):
+    """Identifiant de lignage (GUID) reproductible pour une graine donnée."""
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+def table_name(index):
+    """Nom de la table d'index donné dans le modèle synthétique."""
+    return f"Table {index:03d}"
+
+def literal(value):
+    """Expression littérale d'une propriété de mise en forme."""
+    return {"expr": {"Literal": {"Value": value}}}
+
+def build_formatting_objects(rnd, title):
+    """Objets de mise en forme d'un visuel ('objects' et 'vcObjects'), qui pèsent l'essentiel d'un config réel."""
+    objects = {
+        "labels": [{"properties": {"show": literal("true"), "fontSize": literal(f"{rnd.randint(8, 14)}D"),
+                                   "color": {"solid": {"color": literal(f"'#{rnd.randrange(0x1000000):06X}'")}}}}],
+        "categoryAxis": [{"properties": {"show": literal("true"), "concatenateLabels": literal("false")}}],
+        "valueAxis": [{"properties": {"show": literal("true"), "gridlineShow": literal("false")}}],
+        "legend": [{"properties": {"show": literal("true"), "position": literal("'Top'")}}],
+        "dataPoint": [{"properties": {"fill": {"solid": {"color": {"expr": {"ThemeDataColor": {"ColorId": rnd.randint(0, 9), "Percent": 0}}}}}},
+                       "selector": {"data": [{"dataViewWildcard": {"matchingOption": 1}}]}}],
+    }
+    vc_objects = {
+        "title": [{"properties": {"show": literal("true"), "text": literal(f"'{title}'")}}],
+        "background": [{"properties": {"show": literal("false"), "transparency": literal("0D")}}],
+        "border": [{"properties": {"show": literal("false")}}],
+    }
+    return objects, vc_objects
+
+def build_field_expression(kind, source_ref, property_name, function=0):
+    """Expression d'un champ (mesure, agrégation, colonne ou niveau de hiérarchie) relative à source_ref."""
+    if kind == "Measure":
+        return {"Measure": {"Expression": {"SourceRef": source_ref}, "Property": property_name}}
+    column = {"Column": {"Expression": {"SourceRef": source_ref}, "Property": property_name}}
+    if kind == "Aggregation":
+        return {"Aggregation": {"Expression": column, "Function": function}}
+    if kind == "Column":
+        return column
+    return {"HierarchyLevel": {"Expression": {"Hierarchy": {"Expression": {"PropertyVariationSource": {
+        "Expression": {"SourceRef": source_ref}, "Name": "Variation", "Property": property_name}},
+        "Hierarchy": "Hiérarchie de dates"}}, "Level": "Année"}}
+
+def build_projection(rnd, tables, columns, measures, role):
+    """
+    Tire une projection au hasard et retourne (queryRef, expression de la prototypeQuery, expression du select,
+    nom affiché, (alias de la source, table)). Comme dans Power BI, la requête désigne la table par un alias
+    et le select par son nom.
+    """
+    table_index = rnd.randrange(tables)
+    entity = table_name(table_index)
+    source_alias = f"t{table_index}"
+    kind = rnd.choices(("Measure", "Aggregation", "Column", "HierarchyLevel"), weights=(4, 3, 3, 1))[0]
+    function = rnd.choice(AGGREGATION_FUNCTIONS)
+    if kind == "Measure":
+        property_name = f"Mesure {rnd.randrange(measures):03d}"
+        query_ref = f"{entity}.{property_name}"
+    elif kind == "Aggregation":
+        property_name = f"Colonne {rnd.randrange(columns):03d}"
+        query_ref = f"{'Sum' if function == 0 else 'CountNonNull'}({entity}.{property_name})"
+    elif kind == "Column":
+        property_name = f"Colonne {rnd.randrange(columns):03d}"
+        query_ref = f"{entity}.{property_name}"
+    else:
+        property_name = "Colonne 000"
+        query_ref = f"{entity}.{property_name}.Variation.Hiérarchie de dates.Année"
+    expression = build_field_expression(kind, {"Source": source_alias}, property_name, function)
+    select_expression = build_field_expression(kind, {"Entity": entity}, property_name, function)
+    display_name = query_ref if rnd.random() < 0.6 else f"{property_name} ({role})"
+    return query_ref, expression, select_expression, display_name, (source_alias, entity)
+
+def build_visual_container(rnd, page_index, visual_index, projections, tables, columns, measures):
+    """Conteneur visuel au format du Layout : position, chaîne 'config', chaîne 'dataTransforms' et filtres."""
+    visual_type = rnd.choice(VISUAL_TYPES)
+    visual_name = f"{uuid.UUID(int=rnd.getrandbits(128)).hex[:20]}"
+    roles = ("Category", "Values", "Y", "Tooltips")
+    projection_map = {}
+    query_from = {}
+    query_select = []
+    selects = []
+    for projection_index in range(projections):
+        role = roles[projection_index % len(roles)] if visual_type not in ("card", "slicer") else "Values"
+        query_ref, expression, select_expression, display_name, (alias, entity) = build_projection(rnd, tables, columns, measures, role)
+        projection_map.setdefault(role, []).append({"queryRef": query_ref, **({"active": True} if role == "Category" else {})})
+        query_from[alias] = {"Name": alias, "Entity": entity, "Type": 0}
+        query_select.append({**expression, "Name": query_ref, "NativeReferenceName": display_name})
+        selects.append({"displayName": display_name, "queryName": query_ref, "roles": {role: True},
+                        "type": {"category": None, "underlyingType": rnd.choice((259, 260, 261, 519, 1))}, "expr": select_expression})
+
+    objects, vc_objects = build_formatting_objects(rnd, f"Visuel {page_index + 1}.{visual_index + 1}")
+    x, y = rnd.randint(0, 1000), rnd.randint(0, 600)
+    config = {
+        "name": visual_name,
+        "layouts": [{"id": 0, "position": {"x": x, "y": y, "z": visual_index, "width": 320, "height": 200, "tabOrder": visual_index}}],
+        "singleVisual": {
+            "visualType": visual_type,
+            "projections": projection_map,
+            "prototypeQuery": {"Version": 2, "From": list(query_from.values()), "Select": query_select},
+            "drillFilterOtherVisuals": True,
+            "hasDefaultSort": True,
+            "objects": objects,
+            "vcObjects": vc_objects,
+        },
+    }
+    data_transforms = {
+        "objects": objects,
+        "projectionOrdering": {role: list(range(len(items))) for role, items in projection_map.items()},
+        "queryMetadata": {"Select": [{"Restatement": select["displayName"], "Name": select["queryName"], "Type": select["type"]["underlyingType"]}
+                                     for select in selects]},
+        "visualElements": [{"DataRoles": [{"Name": role, "Projection": index, "isActive": False}
+                                          for role, items in projection_map.items() for index in range(len(items))]}],
+        "selects": selects,
+    }
+    return {
+        "x": float(x), "y": float(y), "z": float(visual_index), "width": 320.0, "height": 200.0,
+        "config": json.dumps(config, ensure_ascii=False),
+        "filters": "[]",
+        "query": json.dumps({"Commands": [{"SemanticQueryDataShapeCommand": {"Query": config["singleVisual"]["prototypeQuery"]}}]}),
+        "dataTransforms": json.dumps(data_transforms, ensure_ascii=False),
+    }
+
+def build_layout(pages=20, visuals=25, projections=6, tables=40, columns=25, measures=10, seed=1):
+    """
+    Construit un Layout synthétique (dictionnaire) : pages x visuels x projections, plus des mesures
+    de rapport dans 'modelExtensions' de la chaîne 'config', comme les écrit Power BI Desktop.
+    """
+    rnd = random.Random(seed)
+    sections = []
+    for page_index in range(pages):
+        visual_containers = [build_visual_container(rnd, page_index, visual_index, projections, tables, columns, measures)
+                             for visual_index in range(visuals)]
+        sections.append({
+            "id": page_index, "name": uuid.UUID(int=rnd.getrandbits(128)).hex[:20], "displayName": f"Page {page_index + 1}",
+            "filters": "[]", "ordinal": page_index, "visualContainers": visual_containers,
+            "config": json.dumps({"objects": {"background": [{"properties": {"transparency": {"expr": {"Literal": {"Value": "100D"}}}}}]}}),
+            "displayOption": 1, "width": 1280.0, "height": 720.0,
+        })
+    report_measures = [{"name": f"Mesure rapport {index:02d}", "dataType": 3,
+                        "expression": f"SUM('{table_name(index % tables)}'[Colonne {index % columns:03d}]) * 1.2",
+                        "formulaOverride": None, "formatInformation": {"formatString": "0.00"}}
+                       for index in range(max(1, measures // 2))]
+    config = {
+        "version": "5.43",
+        "themeCollection": {"baseTheme": {"name": "CY23SU08", "version": "5.43", "type": 2}},
+        "activeSectionIndex": 0,
+        "modelExtensions": [{"name": "extension", "entities": [{"name": table_name(0), "extends": table_name(0), "measures": report_measures}]}],
+        "defaultDrillFilterOtherVisuals": True,
+    }
+    return {"id": 0, "resourcePackages": [{"resourcePackage": {"name": "SharedResources", "type": 2, "items": [], "disabled": False}}],
+            "sections": sections, "config": json.dumps(config, ensure_ascii=False), "layoutOptimization": 0}
+
+def build_partition_expression(rnd, index):
+    """Expression M d'une partition (source Excel, SQL ou CSV), découpée en lignes comme dans le DataModelSchema."""
+    source_kind = rnd.choice(("excel", "sql", "csv"))
+    if source_kind == "excel":
+        source = f'    Source = Excel.Workbook(File.Contents("C:\\\\Data\\\\Classeur {index}.xlsx"), null, true),'
+        navigation = f'    Feuille = Source{{[Item="Feuille{index}",Kind="Sheet"]}}[Data],'
+    elif source_kind == "sql":
+        source = f'    Source = Sql.Database("serveur-{index % 3}.local", "Entrepot"),'
+        navigation = f'    Feuille = Source{{[Schema="dbo",Item="Table{index}"]}}[Data],'
+    else:
+        source = f'    Source = Csv.Document(File.Contents("C:\\\\Data\\\\export_{index}.csv"),[Delimiter=";", Encoding=65001]),'
+        navigation = "    Feuille = Table.PromoteHeaders(Source, [PromoteAllScalars=true]),"
+    return ["let", source, navigation,
+            '    Types = Table.TransformColumnTypes(Feuille,{{"Colonne 000", type text}}),',
+            "    Filtre = Table.SelectRows(Types, each [Colonne 000] <> null)",
+            "in", "    Filtre"]
+
+def build_datamodelschema(tables=40, columns=25, measures=10, seed=1):
+    """Construit un DataModelSchema synthétique (dictionnaire au format TMSL, comme dans un .pbit)."""
+    rnd = random.Random(seed)
+    model_tables = []
+    for index in range(tables):
+        name = table_name(index)
+        model_columns = []
+        for column_index in range(columns):
+            column = {"name": f"Colonne {column_index:03d}", "dataType": rnd.choice(COLUMN_DATA_TYPES),
+                      "sourceColumn": f"Colonne {column_index:03d}", "lineageTag": new_lineage_tag(rnd),
+                      "summarizeBy": rnd.choice(("none", "sum", "count")),
+                      "annotations": [{"name": "SummarizationSetBy", "value": "Automatic"}]}
+            if column_index % 7 == 6:
+                column.update({"type": "calculated", "sourceColumn": None,
+                               "expression": f"'{name}'[Colonne {column_index - 1:03d}] * 2", "isDataTypeInferred": True})
+            if column_index == 0:
+                column["variations"] = [{"name": "Variation", "relationship": new_lineage_tag(rnd), "isDefault": True,
+                                         "defaultHierarchy": {"table": f"LocalDateTable_{index}", "hierarchy": "Hiérarchie de dates"}}]
+            model_columns.append(column)
+        model_measures = [{"name": f"Mesure {measure_index:03d}", "lineageTag": new_lineage_tag(rnd), "formatString": "#,0.00",
+                           "expression": ["", f"VAR Total = SUM('{name}'[Colonne {measure_index % columns:03d}])",
+                                          f"RETURN DIVIDE(Total, COUNTROWS('{name}'))"],
+                           "annotations": [{"name": "PBI_FormatHint", "value": "{\"isDecimal\":true}"}]}
+                          for measure_index in range(measures)]
+        model_tables.append({
+            "name": name, "lineageTag": new_lineage_tag(rnd), "isHidden": index % 10 == 9,
+            "columns": model_columns, "measures": model_measures,
+            "partitions": [{"name": f"{name}-{new_lineage_tag(rnd)}", "mode": "import",
+                            "source": {"type": "m", "expression": build_partition_expression(rnd, index)}}],
+            "hierarchies": [{"name": "Hiérarchie", "lineageTag": new_lineage_tag(rnd),
+                             "levels": [{"name": f"Niveau {level}", "ordinal": level, "column": f"Colonne {level:03d}",
+                                         "lineageTag": new_lineage_tag(rnd)} for level in range(min(3, columns))]}],
+            "annotations": [{"name": "PBI_ResultType", "value": "Table"}, {"name": "PBI_NavigationStepName", "value": "Navigation"}],
+        })
+    relationships = [{"name": new_lineage_tag(rnd), "fromTable": table_name(index), "fromColumn": "Colonne 001",
+                      "toTable": table_name(index - 1), "toColumn": "Colonne 001"}
+                     for index in range(1, tables)]
+    return {
+        "name": new_lineage_tag(rnd),
+        "compatibilityLevel": 1550,
+        "model": {
+            "culture": "fr-FR", "dataAccessOptions": {"legacyRedirects": True, "returnErrorValuesAsNull": True},
+            "defaultPowerBIDataSourceVersion": "powerBI_V3", "sourceQueryCulture": "fr-FR",
+            "tables": model_tables,
+            "relationships": relationships,
+            "cultures": [{"name": "fr-FR", "linguisticMetadata": {"content": {"Version": "1.0.0", "Language": "fr-FR"}, "contentType": "json"}}],
+            "annotations": [{"name": "PBIDesktopVersion", "value": "2.121.0"}, {"name": "__PBI_TimeIntelligenceEnabled", "value": "1"}],
+        },
+    }
+
+def write_synthetic_pbix(path, layout, datamodelschema, pbit=False):
+    """
+    Écrit une archive de la forme d'un .pbix (DataModel opaque, lisible seulement par fake_pbi_tools.py)
+    ou, avec pbit, d'un .pbit (DataModelSchema en clair). Retourne le chemin écrit.
+    """
+    schema_bytes = json.dumps(datamodelschema, ensure_ascii=False).encode("utf-16-le")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Version", "1.28".encode("utf-16-le"))
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="utf-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("Report/Layout", json.dumps(layout, ensure_ascii=False).encode("utf-16-le"))
+        archive.writestr("Settings", "{}".encode("utf-16-le"))
+        if pbit:
+            archive.writestr("DataModelSchema", schema_bytes)
+        else:
+            # Le DataModel réel est déjà compressé : il est stocké tel quel, comme dans un vrai .pbix
+            archive.writestr("DataModel", SYNTHETIC_DATAMODEL_HEADER + gzip.compress(schema_bytes, compresslevel=6),
+                             compress_type=zipfile.ZIP_STORED)
+    return path
+
+def read_synthetic_datamodelschema(pbix_path):
+    """Relit le DataModelSchema (octets UTF-16-LE) caché dans l'entrée 'DataModel' d'un .pbix synthétique."""
+    with zipfile.ZipFile(pbix_path) as archive:
+        datamodel = archive.read("DataModel")
+    if not datamodel.startswith(SYNTHETIC_DATAMODEL_HEADER):
+        raise ValueError(f"{os.path.basename(pbix_path)} n'est pas un .pbix synthétique.")
+    return gzip.decompress(datamodel[len(SYNTHETIC_DATAMODEL_HEADER):])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un rapport Power BI synthétique (.pbix ou .pbit).")
+    parser.add_argument("output", help="Fichier .pbix/.pbit à écrire.")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--visuals", type=int, default=25, help="Visuels par page.")
+    parser.add_argument("--projections", type=int, default=6, help="Projections par visuel.")
+    parser.add_argument("--tables", type=int, default=40)
+    parser.add_argument("--columns", type=int, default=25, help="Colonnes par table.")
+    parser.add_argument("--measures", type=int, default=10, help="Mesures par table.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--pbit", action="store_true", help="Écrit un .pbit (DataModelSchema en clair) au lieu d'un .pbix.")
+    args = parser.parse_args(argv)
+
+    layout = build_layout(args.pages, args.visuals, args.projections, args.tables, args.columns, args.measures, args.seed)
+    datamodelschema = build_datamodelschema(args.tables, args.columns, args.measures, args.seed)
+    write_synthetic_pbix(args.output, layout, datamodelschema, pbit=args.pbit)
+    print(f"{args.output} : {os.path.getsize(args.output) / (1024 * 1024):.1f} Mio")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
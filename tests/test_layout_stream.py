@@ -0,0 +1,102 @@
+# Lecture en flux du Layout : mêmes lignes KPI que l'analyse en mémoire, quelle que soit la taille
+# des morceaux lus (nombres, littéraux et chaînes coupés entre deux morceaux).
+import io
+import json
+import zipfile
+
+import pytest
+
+import Data_Extractor
+
+CHUNK_SIZES = (1, 2, 3, 5, 7, 16, 64)
+
+def build_visual_container(name, visual_type, query_refs, x=12.75):
+    """Conteneur visuel au format historique : 'config' et 'dataTransforms' sont des chaînes JSON."""
+    projections = {"Values": [{"queryRef": query_ref} for query_ref in query_refs]}
+    selects = [{"queryName": query_ref, "displayName": f"Alias « {query_ref} »",
+                "expr": {"Measure": {"Expression": {"SourceRef": {"Entity": query_ref.split(".")[0]}},
+                                     "Property": query_ref.split(".")[1]}}}
+               for query_ref in query_refs]
+    config = {"name": name, "singleVisual": {"visualType": visual_type, "projections": projections}}
+    return {"x": x, "y": -3.5e2, "z": 1500, "width": 0.000125, "tabOrder": None, "hidden": False,
+            "config": json.dumps(config), "dataTransforms": json.dumps({"selects": selects}), "filters": "[]"}
+
+def build_layout():
+    """Layout couvrant les cas délicats : nom de page écrit après les visuels, page sans nom, mesures de rapport."""
+    model_extensions = [{"entities": [{"name": "Ventes", "measures": [
+        {"name": "Ventes.Total", "expression": "SUM(Ventes[Montant])"},
+        {"name": "Marge %", "expression": "DIVIDE([Marge], [Total])", "properties": {"dataViewDisplayName": "Marge"}},
+    ]}]}]
+    return {
+        "id": 0,
+        "resourcePackages": [{"resourcePackage": {"name": "Thème", "items": [], "disabled": True}}],
+        "sections": [
+            {"displayName": "Page 1", "ordinal": 0, "visualContainers": [
+                build_visual_container("v1", "card", ["Ventes.Total"]),
+                build_visual_container("v2", "tableEx", ["Ventes.Montant", "Clients.Nomé"], x=1e-7),
+            ]},
+            {"ordinal": 1, "visualContainers": [build_visual_container("v3", "barChart", ["Ventes.Total"])],
+             "displayName": "Page écrite après ses visuels"},
+            {"visualContainers": [build_visual_container("v4", "card", ["Stock.Quantité"]),
+                                  {"config": "{\"name\": \"sans projections\"}"}]},
+            {"displayName": "Page vide", "visualContainers": []},
+        ],
+        "config": json.dumps({"version": "5.43", "modelExtensions": model_extensions}),
+        "layoutOptimization": 0,
+        "trailing": [True, False, None, -0.5, 12345678901234567890],
+    }
+
+def stream_kpis(text, chunk_size):
+    return list(Data_Extractor.iter_kpis_from_layout_stream(io.StringIO(text), chunk_size))
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_stream_matches_in_memory_extraction(chunk_size, indent):
+    text = json.dumps(build_layout(), indent=indent, ensure_ascii=False)
+    expected = Data_Extractor.extract_kpis_from_layout(json.loads(text))
+    assert "Visuel (Page écrite après ses visuels) et Modèle (potentiel)" in [kpi["Source"] for kpi in expected]
+    assert stream_kpis(text, chunk_size) == expected
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_stream_skips_text_before_the_document(chunk_size):
+    text = "\ufeff  garbage " + json.dumps(build_layout())
+    assert stream_kpis(text, chunk_size) == Data_Extractor.extract_kpis_from_layout(build_layout())
+
+@pytest.mark.parametrize("chunk_size", (1, 4, 64))
+def test_numbers_split_across_chunks_are_read_whole(chunk_size):
+    text = '[1500.5, -12e-3, 7, true, null, "a\\"b"]'
+    reader = Data_Extractor.new_json_stream_reader(io.StringIO(text), chunk_size)
+    values = [Data_Extractor.read_json_stream_value(reader) for _ in Data_Extractor.iter_json_stream_array_items(reader)]
+    assert values == [1500.5, -12e-3, 7, True, None, 'a"b']
+
+@pytest.mark.parametrize("text", [
+    '{"sections": [{"displayName": "P", "visualContainers": [{"config": "{}"}',  # document tronqué
+    '{"sections": [{"displayName" "P"}]}',  # ':' manquant
+    '{"sections": [1 2]}',  # ',' manquante
+    'pas de JSON',
+    '',
+])
+@pytest.mark.parametrize("chunk_size", (1, 3, 64))
+def test_malformed_layout_raises_decode_error(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        stream_kpis(text, chunk_size)
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16-le", "utf-16"])
+def test_open_layout_text_stream_detects_encoding_in_archive(tmp_path, encoding):
+    text = json.dumps(build_layout(), ensure_ascii=False)
+    raw = text.encode(encoding)
+    if encoding == "utf-16-le":
+        raw = b"\xff\xfe" + raw
+    archive_path = tmp_path / "rapport.pbix"
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Report/Layout", raw)
+
+    with Data_Extractor.open_layout_text_stream(str(archive_path)) as text_stream:
+        kpis = list(Data_Extractor.iter_kpis_from_layout_stream(text_stream, 5))
+    assert kpis == Data_Extractor.extract_kpis_from_layout(build_layout())
+
+def test_open_layout_text_stream_reads_plain_file(tmp_path):
+    layout_path = tmp_path / "Layout.json"
+    layout_path.write_bytes(json.dumps(build_layout()).encode("utf-16-le"))
+    with Data_Extractor.open_layout_text_stream(str(layout_path)) as text_stream:
+        assert list(Data_Extractor.iter_kpis_from_layout_stream(text_stream, 7)) == Data_Extractor.extract_kpis_from_layout(build_layout())
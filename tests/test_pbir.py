@@ -0,0 +1,36 @@
+# Lecture des visuels PBIR : les clés présentes mais nulles ne doivent pas interrompre l'extraction.
+import json
+
+import Data_Extractor
+
+
+def make_visual(query):
+    return {"visual": {"visualType": "card", "query": query}}
+
+
+def test_null_query_and_query_state_are_ignored():
+    assert Data_Extractor.extract_kpis_from_pbir_visual(make_visual(None), "Page 1") == []
+    assert Data_Extractor.extract_kpis_from_pbir_visual(make_visual({"queryState": None}), "Page 1") == []
+
+
+def test_null_projections_and_fields_are_ignored():
+    query = {"queryState": {
+        "Values": {"projections": None},
+        "Category": {"projections": [
+            {"queryRef": "Ventes.Total", "field": None, "displayName": None, "nativeQueryRef": "Total"},
+            {"queryRef": "Sum(Ventes.Montant)", "field": {"Aggregation": {"Function": 0}}, "displayName": "Montant"},
+        ]},
+    }}
+    kpis = Data_Extractor.extract_kpis_from_pbir_visual(make_visual(query), "Page 1")
+    assert [kpi["Nom de Base"] for kpi in kpis] == ["Ventes.Total", "Sum(Ventes.Montant)"]
+    assert [kpi["Alias Power BI"] for kpi in kpis] == ["Total", "Montant"]
+    assert [kpi["Type Mesure"] for kpi in kpis] == ["Mesure non Calculée", "Mesure Calculée"]
+
+
+def test_null_page_order(tmp_path):
+    pages_dir = tmp_path / "pages"
+    for name in ("b", "a"):
+        (pages_dir / name).mkdir(parents=True)
+    (pages_dir / "pages.json").write_text(json.dumps({"pageOrder": None}), encoding="utf-8")
+    page_dirs = Data_Extractor.list_pbir_page_dirs(str(tmp_path))
+    assert [str(pages_dir / "a"), str(pages_dir / "b")] == page_dirs
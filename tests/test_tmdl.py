@@ -0,0 +1,152 @@
+# Analyse TMDL : les objets sont rangés au format du DataModelSchema (TMSL), comme l'extraction pbi-tools.
+import textwrap
+
+import Data_Extractor
+
+TABLE_TMDL = textwrap.dedent("""\
+    /// Table des ventes
+    table 'Ventes ''Europe'''
+    \tlineageTag: 1a2b
+    \tisHidden
+
+    \t/// Montant total
+    \tmeasure 'Total Ventes' = SUM(Ventes[Montant])
+    \t\tformatString: #,0.00
+    \t\tdisplayFolder: "Indicateurs ""clés"" 2024"
+
+    \tmeasure Marge =
+    \t\t\tVAR t = [Total Ventes]
+    \t\t\tRETURN
+    \t\t\t    DIVIDE(t - [Coût], t)
+    \t\tformatString: 0.0%
+
+    \tmeasure Bloc = ```
+    \t\t\tCALCULATE(
+    \t\t\t    [Total Ventes],
+    \t\t\t    ALL(Dates)
+    \t\t\t)
+    \t\t\t```
+
+    \tcolumn Montant
+    \t\tdataType: decimal
+    \t\tsourceColumn: Montant
+    \t\tsummarizeBy: sum
+
+    \t\tannotation SummarizationSetBy = Automatic
+
+    \tcolumn 'Montant TTC' = [Montant] * 1.2
+    \t\tdataType: double
+
+    \thierarchy Géographie
+    \t\tlevel Pays
+    \t\t\tcolumn: Pays
+    \t\tlevel Ville
+    \t\t\tcolumn: Ville
+
+    \tpartition Ventes-p = m
+    \t\tmode: import
+    \t\tsource =
+    \t\t\t\tlet
+    \t\t\t\t    Source = Excel.Workbook(File.Contents("C:\\\\data\\\\ventes.xlsx"), null, true)
+    \t\t\t\tin
+    \t\t\t\t    Source
+
+    \tannotation PBI_ResultType = Table
+    """)
+
+def parse_single(text):
+    objects = Data_Extractor.parse_tmdl_document(text)
+    assert len(objects) == 1
+    return objects[0]
+
+def test_table_names_descriptions_and_flags():
+    object_type, table = parse_single(TABLE_TMDL)
+    assert object_type == "table"
+    assert table["name"] == "Ventes 'Europe'"
+    assert table["description"] == "Table des ventes"
+    assert table["lineageTag"] == "1a2b"
+    assert table["isHidden"] is True
+    assert table["annotations"] == [{"name": "PBI_ResultType", "value": "Table"}]
+
+def test_measures_inline_multiline_and_fenced_expressions():
+    _, table = parse_single(TABLE_TMDL)
+    measures = {measure["name"]: measure for measure in table["measures"]}
+    assert list(measures) == ["Total Ventes", "Marge", "Bloc"]
+    assert measures["Total Ventes"]["expression"] == "SUM(Ventes[Montant])"
+    assert measures["Total Ventes"]["description"] == "Montant total"
+    assert measures["Total Ventes"]["displayFolder"] == 'Indicateurs "clés" 2024'
+    assert measures["Marge"]["expression"] == "VAR t = [Total Ventes]\nRETURN\n    DIVIDE(t - [Coût], t)"
+    assert measures["Marge"]["formatString"] == "0.0%"
+    assert measures["Bloc"]["expression"] == "CALCULATE(\n    [Total Ventes],\n    ALL(Dates)\n)"
+
+def test_columns_hierarchies_and_partitions_use_datamodelschema_shape():
+    _, table = parse_single(TABLE_TMDL)
+    columns = {column["name"]: column for column in table["columns"]}
+    assert columns["Montant"]["summarizeBy"] == "sum"
+    assert columns["Montant"]["annotations"] == [{"name": "SummarizationSetBy", "value": "Automatic"}]
+    assert "type" not in columns["Montant"]
+    assert columns["Montant TTC"] == {"name": "Montant TTC", "expression": "[Montant] * 1.2",
+                                      "dataType": "double", "type": "calculated"}
+
+    levels = table["hierarchies"][0]["levels"]
+    assert [(level["name"], level["column"], level["ordinal"]) for level in levels] == [("Pays", "Pays", 0), ("Ville", "Ville", 1)]
+
+    partition = table["partitions"][0]
+    assert partition["name"] == "Ventes-p"
+    assert partition["mode"] == "import"
+    assert partition["source"]["type"] == "m"
+    assert partition["source"]["expression"].splitlines()[0] == "let"
+    assert 'File.Contents("C:\\\\data\\\\ventes.xlsx")' in partition["source"]["expression"]
+
+def test_relationships_split_qualified_column_references():
+    text = textwrap.dedent("""\
+        relationship 3f1c
+        \tfromColumn: Ventes.'Clé Produit'
+        \ttoColumn: 'Produits ''Actifs'''.Clé
+        \tisActive: false
+        \tcrossFilteringBehavior: bothDirections
+        """)
+    object_type, relationship = parse_single(text)
+    assert object_type == "relationship"
+    assert relationship == {"name": "3f1c", "fromTable": "Ventes", "fromColumn": "Clé Produit",
+                            "toTable": "Produits 'Actifs'", "toColumn": "Clé", "isActive": False,
+                            "crossFilteringBehavior": "bothDirections"}
+
+def test_model_refs_integers_and_linguistic_metadata():
+    model_text = textwrap.dedent("""\
+        model Model
+        \tculture: fr-FR
+        \tdefaultPowerBIDataSourceVersion: powerBI_V3
+
+        ref table Ventes
+        ref table Dates
+        """)
+    objects = Data_Extractor.parse_tmdl_document("\ufeff" + model_text)
+    assert objects[0] == ("model", {"name": "Model", "culture": "fr-FR", "defaultPowerBIDataSourceVersion": "powerBI_V3"})
+    assert objects[1:] == [("ref", {"type": "table", "name": "Ventes"}), ("ref", {"type": "table", "name": "Dates"})]
+
+    _, database = parse_single("database\n\tcompatibilityLevel: 1567\n")
+    assert database == {"compatibilityLevel": 1567}
+
+    culture_text = textwrap.dedent("""\
+        cultureInfo fr-FR
+        \tlinguisticMetadata =
+        \t\t\t{"Version": "1.0.0", "Language": "fr-FR"}
+        \t\tcontentType: json
+        """)
+    _, culture = parse_single(culture_text)
+    assert culture["linguisticMetadata"] == {"content": {"Version": "1.0.0", "Language": "fr-FR"}, "contentType": "json"}
+
+def test_semantic_model_follows_ref_order(tmp_path):
+    definition_dir = tmp_path / "definition"
+    (definition_dir / "tables").mkdir(parents=True)
+    (definition_dir / "database.tmdl").write_text("database\n\tcompatibilityLevel: 1567\n", encoding="utf-8")
+    (definition_dir / "model.tmdl").write_text("model Model\n\tculture: fr-FR\n\nref table Ventes\nref table Dates\n", encoding="utf-8")
+    (definition_dir / "tables" / "Dates.tmdl").write_text("table Dates\n\tcolumn Date\n\t\tdataType: dateTime\n", encoding="utf-8")
+    (definition_dir / "tables" / "Ventes.tmdl").write_text(TABLE_TMDL.replace("table 'Ventes ''Europe'''", "table Ventes"), encoding="utf-8-sig")
+
+    database = Data_Extractor.load_tmdl_semantic_model(str(definition_dir), "Rapport")
+    assert database["name"] == "Rapport"
+    assert database["compatibilityLevel"] == 1567
+    assert database["model"]["culture"] == "fr-FR"
+    assert [table["name"] for table in database["model"]["tables"]] == ["Ventes", "Dates"]